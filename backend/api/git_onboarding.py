@@ -6,11 +6,66 @@ Handles Git provider connection testing and repository creation during onboardin
 from fastapi import APIRouter, HTTPException, status, Depends
 from pydantic import BaseModel, Field
 from typing import Optional
-import sqlite3
 from services.git_providers import get_git_client, GitProvider
 
 router = APIRouter(prefix="/api/onboarding/git", tags=["onboarding-git"])
 
+# Initial repository files; links and scripts are mappings keyed by id, as the inventory parser expects
+LINKS_TEMPLATE = """# LinkOps Configuration - Machines
+# This file defines all machines managed by LinkOps
+
+links: {}
+
+# Example machine configuration:
+# links:
+#   web-server-01:
+#     name: Web Server 01
+#     type: VPS
+#     host: 10.0.1.10
+#     port: 22
+#     user: linkops
+#     tags:
+#       - production
+#       - web
+#     enrollment:
+#       required: true
+#       clientId: LINKOPS-00000000-0000-0000-0000-000000000000
+#     ssh:
+#       keyRef: default_ed25519
+"""
+
+SCRIPTS_TEMPLATE = """# LinkOps Configuration - Scripts
+# This file defines all scripts that can be executed on machines
+
+scripts: {}
+
+# Example script configuration:
+# scripts:
+#   update-system:
+#     name: Update System
+#     description: Update and upgrade system packages
+#     path: scripts/update-system.sh
+#     estimatedDuration: 120
+#     tags:
+#       - maintenance
+#       - system
+"""
+
+SECRETS_TEMPLATE = """# LinkOps Secrets Configuration
+# Copy this file to secrets.ini and fill in your values
+# DO NOT commit secrets.ini to Git!
+
+[api_keys]
+# example_api_key = your-api-key-here
+
+[credentials]
+# example_username = your-username
+# example_password = your-password
+
+[tokens]
+# example_token = your-token-here
+"""
+
 
 class GitTestRequest(BaseModel):
     """Git connection test request"""
@@ -46,13 +101,6 @@ class GitCreateResponse(BaseModel):
     sshUrl: Optional[str] = None
 
 
-def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect('/var/lib/linkops/linkops.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
 @router.post("/test", response_model=GitTestResponse)
 async def test_git_connection(request: GitTestRequest):
     """
@@ -110,7 +158,6 @@ async def create_git_repository(request: GitCreateRequest):
     - Creates links.yaml and scripts.yaml
     - Updates user's onboarding status
     """
-    conn = None
     try:
         # Get appropriate client
         client = get_git_client(
@@ -135,87 +182,24 @@ async def create_git_repository(request: GitCreateRequest):
         repo_url = result.get("repo_url")
         clone_url = result.get("clone_url")
         ssh_url = result.get("ssh_url")
+        default_branch = result.get("default_branch", "main")
         
         # Create initial files
         try:
-            # Create links.yaml
-            links_content = """# LinkOps Configuration - Machines
-# This file defines all machines managed by LinkOps
-
-machines: []
-
-# Example machine configuration:
-# machines:
-#   - id: web-server-01
-#     name: Web Server 01
-#     hostname: web01.example.com
-#     ip: 10.0.1.10
-#     ssh_user: linkops
-#     ssh_key: ~/.ssh/id_ed25519
-#     tags:
-#       - production
-#       - web
-#     description: Primary web server
-"""
-            
-            await client.create_file(
-                owner=request.owner,
-                repo_name=request.repoName,
-                file_path="links.yaml",
-                content=links_content,
-                message="Initialize links.yaml"
-            )
-            
-            # Create scripts.yaml
-            scripts_content = """# LinkOps Configuration - Scripts
-# This file defines all scripts that can be executed on machines
-
-scripts: []
-
-# Example script configuration:
-# scripts:
-#   - id: update-system
-#     name: Update System
-#     description: Update and upgrade system packages
-#     command: |
-#       sudo apt-get update
-#       sudo apt-get upgrade -y
-#     tags:
-#       - maintenance
-#       - system
-"""
-            
-            await client.create_file(
-                owner=request.owner,
-                repo_name=request.repoName,
-                file_path="scripts.yaml",
-                content=scripts_content,
-                message="Initialize scripts.yaml"
-            )
-            
-            # Create secrets.ini.example
-            secrets_content = """# LinkOps Secrets Configuration
-# Copy this file to secrets.ini and fill in your values
-# DO NOT commit secrets.ini to Git!
-
-[api_keys]
-# example_api_key = your-api-key-here
-
-[credentials]
-# example_username = your-username
-# example_password = your-password
-
-[tokens]
-# example_token = your-token-here
-"""
-            
-            await client.create_file(
+            # All initial files in one commit (one request on GitLab/Gitea)
+            committed = await client.commit_files(
                 owner=request.owner,
                 repo_name=request.repoName,
-                file_path="secrets.ini.example",
-                content=secrets_content,
-                message="Add secrets.ini.example"
+                files={
+                    "links.yaml": LINKS_TEMPLATE,
+                    "scripts.yaml": SCRIPTS_TEMPLATE,
+                    "secrets.ini.example": SECRETS_TEMPLATE
+                },
+                message="Initialize LinkOps configuration",
+                branch=default_branch
             )
+            if not committed:
+                print("Warning: Failed to create initial files")
             
         except Exception as e:
             # Repository created but file creation failed
@@ -244,6 +228,3 @@ scripts: []
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Repository creation failed: {str(e)}"
         )
-    finally:
-        if conn:
-            conn.close()
@@ -0,0 +1,126 @@
+"""
+LinkOps - Git Webhook Endpoints
+Receives push events from GitHub, GitLab and Gitea/Forgejo and queues a debounced config repo sync
+"""
+
+from fastapi import APIRouter, HTTPException, Request, status
+from pydantic import BaseModel
+from typing import Optional
+import hashlib
+import hmac
+import json
+from services.git_providers import GitProvider
+from services.sync_debouncer import get_sync_debouncer
+
+router = APIRouter(prefix="/api/git/webhook", tags=["git-webhooks"])
+
+# Webhook settings (set from config at startup)
+WEBHOOK_SECRET: Optional[str] = None
+SYNC_BRANCH: Optional[str] = None
+
+# Push payloads list every commit; anything larger is not a config repo push
+MAX_PAYLOAD_BYTES = 5 * 1024 * 1024
+
+# Header carrying the event name, and the value that means "push"
+PUSH_EVENTS = {
+    GitProvider.GITHUB: ("x-github-event", "push"),
+    GitProvider.GITLAB: ("x-gitlab-event", "Push Hook"),
+    GitProvider.GITEA: ("x-gitea-event", "push"),
+    GitProvider.FORGEJO: ("x-forgejo-event", "push"),
+}
+
+
+class WebhookResponse(BaseModel):
+    """Webhook delivery response"""
+    accepted: bool
+    message: str
+    queued: bool = False
+
+
+def init_webhook_secret(secret: Optional[str], branch: Optional[str] = None):
+    """Initialize webhook secret and tracked branch from config"""
+    global WEBHOOK_SECRET, SYNC_BRANCH
+    WEBHOOK_SECRET = secret or None
+    SYNC_BRANCH = branch
+
+
+def webhooks_enabled() -> bool:
+    return WEBHOOK_SECRET is not None
+
+
+def hmac_sha256(secret: str, body: bytes) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(provider: GitProvider, headers, body: bytes) -> bool:
+    """
+    Check the delivery against the shared secret
+
+    - GitHub: X-Hub-Signature-256 = "sha256=" + HMAC-SHA256(body)
+    - GitLab: X-Gitlab-Token = secret (GitLab does not sign the body)
+    - Gitea/Forgejo: X-Gitea-Signature / X-Forgejo-Signature = HMAC-SHA256(body)
+
+    Both sides are compared as bytes: compare_digest rejects non-ASCII str,
+    and header values are whatever the caller sent.
+    """
+    secret = WEBHOOK_SECRET
+    if provider == GitProvider.GITHUB:
+        signature = headers.get("x-hub-signature-256", "")
+        expected = f"sha256={hmac_sha256(secret, body)}"
+    elif provider == GitProvider.GITLAB:
+        signature = headers.get("x-gitlab-token", "")
+        expected = secret
+    else:
+        # Forgejo sends both headers; Gitea only its own
+        signature = headers.get("x-forgejo-signature") or headers.get("x-gitea-signature") or ""
+        expected = hmac_sha256(secret, body)
+    return hmac.compare_digest(signature.encode(), expected.encode())
+
+
+@router.post("/{provider}", response_model=WebhookResponse, status_code=status.HTTP_202_ACCEPTED)
+async def receive_webhook(provider: GitProvider, request: Request):
+    """
+    Receive a push event for the config repository
+
+    - Verifies the provider signature against the configured secret
+    - Ignores non-push events and pushes to other branches
+    - Queues a sync; bursts of pushes are coalesced into one run
+    """
+    if not webhooks_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook secret not configured"
+        )
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_PAYLOAD_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Payload too large")
+
+    body = await request.body()
+    if len(body) > MAX_PAYLOAD_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Payload too large")
+
+    if not verify_signature(provider, request.headers, body):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook signature")
+
+    event_header, push_event = PUSH_EVENTS[provider]
+    event = request.headers.get(event_header, "")
+    if event != push_event:
+        # GitHub sends "ping" when the hook is created
+        return WebhookResponse(accepted=False, message=f"Ignored event: {event or 'unknown'}")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+
+    ref = payload.get("ref", "") if isinstance(payload, dict) else ""
+    if SYNC_BRANCH and ref != f"refs/heads/{SYNC_BRANCH}":
+        return WebhookResponse(accepted=False, message=f"Ignored push to {ref or 'unknown ref'}")
+
+    new_burst = get_sync_debouncer().request(f"{provider.value} push")
+    return WebhookResponse(
+        accepted=True,
+        message="Sync queued" if new_burst else "Sync already queued",
+        queued=True
+    )
@@ -0,0 +1,109 @@
+"""
+LinkOps - Inventory Query Endpoints
+Target selection, tag counts and jump-host tree lookups served from the in-memory index
+"""
+
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from services.inventory_index import get_inventory_index, TagExpressionError
+from services.enrollment_batch import get_enrollment_batch
+
+router = APIRouter(prefix="/api/inventory", tags=["inventory"])
+
+
+class SelectionResponse(BaseModel):
+    """Machines matching a target expression"""
+    expression: str
+    count: int
+    ids: List[str]
+    indexVersion: int
+
+
+class VerifyRequest(BaseModel):
+    """Machines to verify, by id or target expression"""
+    ids: Optional[List[str]] = None
+    expression: Optional[str] = None
+    force: bool = False
+
+
+class VerifyResponse(BaseModel):
+    """Enrollment check per machine"""
+    count: int
+    enrolled: int
+    results: Dict[str, Dict[str, Any]]
+
+
+class MachineTreeResponse(BaseModel):
+    """Position of a machine in the jump-host tree"""
+    id: str
+    parent: Optional[str] = None
+    ancestors: List[str]
+    children: List[str]
+    descendants: List[str]
+
+
+@router.get("/select", response_model=SelectionResponse)
+async def select_machines(q: str = Query(..., description="e.g. prod AND web NOT backup, type:VM, under:proxmox-01")):
+    """
+    Resolve a target expression for the Operations tab
+
+    - Bare words are tags; AND is implied between terms
+    - Supports OR, NOT/!, parentheses and type:/provider:/id:/parent:/under: selectors
+    """
+    index = get_inventory_index()
+    try:
+        ids = index.select(q)
+    except TagExpressionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid expression: {e}")
+
+    return SelectionResponse(expression=q, count=len(ids), ids=sorted(ids), indexVersion=index.version)
+
+
+@router.get("/tags", response_model=Dict[str, int])
+async def tag_counts():
+    """Number of machines per tag"""
+    index = get_inventory_index()
+    return {tag: len(ids) for tag, ids in sorted(index.by_tag.items())}
+
+
+@router.get("/machines/{machine_id}/tree", response_model=MachineTreeResponse)
+async def machine_tree(machine_id: str):
+    """Parent chain and everything reached through a machine"""
+    index = get_inventory_index()
+    if index.get(machine_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Machine not found: {machine_id}")
+
+    return MachineTreeResponse(
+        id=machine_id,
+        parent=index.parents.get(machine_id),
+        ancestors=index.ancestors_of(machine_id),
+        children=sorted(index.children_of(machine_id)),
+        descendants=sorted(index.descendants_of(machine_id))
+    )
+
+
+@router.post("/verify", response_model=VerifyResponse)
+async def verify_enrollment(request: VerifyRequest):
+    """
+    Check /etc/linkops/client_id on many machines at once
+
+    - Runs concurrently with per-host deadlines and per-jump-host limits
+    - Recent results are served from cache unless force is set
+    """
+    if request.expression:
+        try:
+            ids = sorted(get_inventory_index().select(request.expression))
+        except TagExpressionError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid expression: {e}")
+    elif request.ids:
+        ids = request.ids
+    else:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide ids or expression")
+
+    results = await get_enrollment_batch().verify_batch(ids, force=request.force)
+    return VerifyResponse(
+        count=len(results),
+        enrolled=sum(1 for result in results.values() if result.enrolled),
+        results={machine_id: result.to_dict() for machine_id, result in results.items()}
+    )
@@ -5,12 +5,17 @@ Handles first machine enrollment during onboarding
 
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Awaitable, Dict, Optional, List, Tuple
+import asyncio
+import os
+import pwd
+import socket
 import sqlite3
-import subprocess
+import time
 import uuid
-import os
 from datetime import datetime
+from db.database import get_db
+from services.inventory_index import rebuild_inventory_index
 
 router = APIRouter(prefix="/api/onboarding/machine", tags=["onboarding-machine"])
 
@@ -30,13 +35,7 @@ class MachineEnrollResponse(BaseModel):
     message: str
     clientId: Optional[str] = None
     machineId: Optional[str] = None
-
-
-def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect('/var/lib/linkops/linkops.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    timings: Optional[Dict[str, float]] = None
 
 
 def generate_client_id() -> str:
@@ -44,36 +43,52 @@ def generate_client_id() -> str:
     return f"LINKOPS-{uuid.uuid4()}"
 
 
-def create_ssh_user(username: str) -> bool:
+async def run_command(args: List[str], timeout: float = 30.0) -> Tuple[int, str, str]:
+    """Run a command without blocking the event loop"""
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, stdout.decode(), stderr.decode()
+
+
+def user_exists(username: str) -> bool:
+    """Check the local account database (replaces `id <user>`)"""
+    try:
+        pwd.getpwnam(username)
+        return True
+    except KeyError:
+        return False
+
+
+async def create_ssh_user(username: str) -> bool:
     """Create SSH user on local system"""
     try:
-        # Check if user already exists
-        result = subprocess.run(
-            ['id', username],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode == 0:
-            # User already exists
+        # Check if user already exists (NSS lookups may hit the network)
+        if await asyncio.to_thread(user_exists, username):
             return True
         
         # Create user with home directory
-        subprocess.run(
-            ['useradd', '-m', '-s', '/bin/bash', username],
-            check=True,
-            capture_output=True
-        )
+        returncode, _, stderr = await run_command(['useradd', '-m', '-s', '/bin/bash', username])
+        if returncode != 0:
+            print(f"Error creating user: {stderr.strip()}")
+            return False
         
         # Add user to sudo group (optional, for management tasks)
-        subprocess.run(
-            ['usermod', '-aG', 'sudo', username],
-            check=True,
-            capture_output=True
-        )
+        returncode, _, stderr = await run_command(['usermod', '-aG', 'sudo', username])
+        if returncode != 0:
+            print(f"Error creating user: {stderr.strip()}")
+            return False
         
         return True
-    except subprocess.CalledProcessError as e:
+    except (OSError, asyncio.TimeoutError) as e:
         print(f"Error creating user: {e}")
         return False
 
@@ -97,43 +112,38 @@ def install_client_id(client_id: str) -> bool:
         return False
 
 
-def test_ssh_connection(username: str, port: int) -> bool:
+async def test_ssh_connection(username: str, port: int) -> bool:
     """Test SSH connection to localhost"""
     try:
         # Simple test - check if user exists and can be accessed
-        result = subprocess.run(
-            ['id', username],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        return result.returncode == 0
+        return await asyncio.wait_for(asyncio.to_thread(user_exists, username), timeout=5)
     except Exception as e:
         print(f"Error testing SSH: {e}")
         return False
 
 
+def get_primary_ip() -> str:
+    """
+    Address of the interface used for outbound traffic (replaces `hostname -I`)
+    
+    Connecting a UDP socket only selects a route; no packet is sent.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(('10.255.255.255', 1))
+        return sock.getsockname()[0]
+    except OSError:
+        return '127.0.0.1'
+    finally:
+        sock.close()
+
+
 def get_machine_info() -> dict:
     """Get local machine information"""
     try:
-        # Get hostname
-        hostname = subprocess.run(
-            ['hostname'],
-            capture_output=True,
-            text=True
-        ).stdout.strip()
-        
-        # Get IP address
-        ip_result = subprocess.run(
-            ['hostname', '-I'],
-            capture_output=True,
-            text=True
-        )
-        ip = ip_result.stdout.strip().split()[0] if ip_result.stdout else '127.0.0.1'
-        
         return {
-            'hostname': hostname,
-            'ip': ip
+            'hostname': socket.gethostname(),
+            'ip': get_primary_ip()
         }
     except Exception as e:
         print(f"Error getting machine info: {e}")
@@ -143,6 +153,15 @@ def get_machine_info() -> dict:
         }
 
 
+async def timed(timings: Dict[str, float], step: str, awaitable: Awaitable[Any]) -> Any:
+    """Await a step and record its latency in milliseconds"""
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[step] = round((time.perf_counter() - started) * 1000, 2)
+
+
 @router.post("/enroll-self", response_model=MachineEnrollResponse)
 async def enroll_self_machine(request: MachineEnrollRequest):
     """
@@ -156,113 +175,127 @@ async def enroll_self_machine(request: MachineEnrollRequest):
     5. Update Git repository (links.yaml)
     6. Mark onboarding as complete
     """
-    conn = None
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
     try:
-        # Step 1: Create SSH user
-        if not create_ssh_user(request.sshUser):
-            return MachineEnrollResponse(
-                success=False,
-                message=f"Failed to create SSH user: {request.sshUser}"
-            )
+        # Steps 1 and 3 depend on each other; client ID install and the
+        # machine info lookup are independent and run alongside them
+        async def provision_ssh_user() -> Optional[str]:
+            # Step 1: Create SSH user
+            if not await timed(timings, "create_ssh_user", create_ssh_user(request.sshUser)):
+                return f"Failed to create SSH user: {request.sshUser}"
+            
+            # Step 3: Test SSH connection
+            if not await timed(timings, "test_ssh_connection", test_ssh_connection(request.sshUser, request.sshPort)):
+                return "SSH connection test failed"
+            return None
         
         # Step 2: Generate and install client ID
         client_id = generate_client_id()
-        if not install_client_id(client_id):
+        
+        ssh_user_error, client_id_installed, machine_info = await asyncio.gather(
+            provision_ssh_user(),
+            timed(timings, "install_client_id", asyncio.to_thread(install_client_id, client_id)),
+            # Step 4: Get machine info
+            timed(timings, "get_machine_info", asyncio.to_thread(get_machine_info))
+        )
+        
+        if ssh_user_error:
             return MachineEnrollResponse(
                 success=False,
-                message="Failed to install client ID"
+                message=ssh_user_error,
+                timings=timings
             )
         
-        # Step 3: Test SSH connection
-        if not test_ssh_connection(request.sshUser, request.sshPort):
+        if not client_id_installed:
             return MachineEnrollResponse(
                 success=False,
-                message="SSH connection test failed"
+                message="Failed to install client ID",
+                timings=timings
             )
         
-        # Step 4: Get machine info
-        machine_info = get_machine_info()
-        
-        # Step 5: Add machine to database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Parse tags
         tags_list = []
         if request.tags:
             tags_list = [tag.strip() for tag in request.tags.split(',') if tag.strip()]
         
-        cursor.execute("""
-            INSERT INTO machines (
-                id,
-                name,
-                type,
-                host,
-                port,
-                user,
-                ssh_key_ref,
+        # Step 5: Add machine to database
+        db_started = time.perf_counter()
+        async with get_db().write() as conn:
+            await conn.execute("""
+                INSERT INTO machines (
+                    id,
+                    name,
+                    type,
+                    host,
+                    port,
+                    user,
+                    ssh_key_ref,
+                    client_id,
+                    tags,
+                    enrollment_required,
+                    enrolled,
+                    status,
+                    last_seen,
+                    created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                request.machineName,
+                request.machineName,
+                'server',
+                machine_info['hostname'],
+                request.sshPort,
+                request.sshUser,
+                'local',  # No SSH key needed for local
                 client_id,
-                tags,
-                enrollment_required,
-                enrolled,
-                status,
-                last_seen,
-                created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            request.machineName,
-            request.machineName,
-            'server',
-            machine_info['hostname'],
-            request.sshPort,
-            request.sshUser,
-            'local',  # No SSH key needed for local
-            client_id,
-            ','.join(tags_list),
-            False,  # No enrollment required for self
-            True,   # Already enrolled
-            'online',
-            datetime.utcnow().isoformat(),
-            datetime.utcnow().isoformat()
-        ))
-        
-        # Step 6: Mark onboarding as complete for the user
-        # TODO: Get user ID from JWT token
-        # For now, update all users (should only be one during onboarding)
-        cursor.execute("""
-            UPDATE users 
-            SET onboarding_completed = TRUE,
-                onboarding_step = 3
-            WHERE onboarding_completed = FALSE
-        """)
-        
-        conn.commit()
+                ','.join(tags_list),
+                False,  # No enrollment required for self
+                True,   # Already enrolled
+                'online',
+                datetime.utcnow().isoformat(),
+                datetime.utcnow().isoformat()
+            ))
+
+            # Step 6: Mark onboarding as complete for the user
+            # TODO: Get user ID from JWT token
+            # For now, update all users (should only be one during onboarding)
+            await conn.execute("""
+                UPDATE users
+                SET onboarding_completed = TRUE,
+                    onboarding_step = 3
+                WHERE onboarding_completed = FALSE
+            """)
+        timings["save_machine"] = round((time.perf_counter() - db_started) * 1000, 2)
         
+        # Make the new machine visible to target selection. The machine is
+        # already saved, so a failed rebuild must not turn this into an error;
+        # the next sync rebuilds the index.
+        try:
+            await timed(timings, "rebuild_index", rebuild_inventory_index())
+        except Exception as e:
+            print(f"Error rebuilding inventory index after enrollment: {e}")
+
         # Step 7: Update Git repository would happen here
         # For now, we'll skip this as it requires Git integration
         # TODO: Add machine to links.yaml in Git repo
         
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        
         return MachineEnrollResponse(
             success=True,
             message="Machine enrolled successfully",
             clientId=client_id,
-            machineId=request.machineName
+            machineId=request.machineName,
+            timings=timings
         )
         
     except sqlite3.IntegrityError as e:
-        if conn:
-            conn.rollback()
         return MachineEnrollResponse(
             success=False,
             message=f"Machine name already exists: {request.machineName}"
         )
     except Exception as e:
-        if conn:
-            conn.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Enrollment failed: {str(e)}"
         )
-    finally:
-        if conn:
-            conn.close()
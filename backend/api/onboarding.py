@@ -5,23 +5,24 @@ Handles user registration and initial setup
 
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr, Field, validator
-from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta
 import re
 import sqlite3
 from typing import Optional
+from db.database import get_db
+from services.password_hasher import get_password_hasher, PasswordHasherBusy
 
 router = APIRouter(prefix="/api/onboarding", tags=["onboarding"])
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
-
 # JWT settings (should match config.py)
 JWT_SECRET = None  # Will be loaded from config
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Set once the users table is known to be non-empty
+_users_exist = False
+
 
 class UserRegistration(BaseModel):
     """User registration request model"""
@@ -53,13 +54,6 @@ class UserRegistrationResponse(BaseModel):
     expiresIn: int
 
 
-def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect('/var/lib/linkops/linkops.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
 def create_jwt_token(user_id: int, username: str, is_admin: bool) -> str:
     """Create JWT token for user"""
     expires = datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
@@ -72,26 +66,32 @@ def create_jwt_token(user_id: int, username: str, is_admin: bool) -> str:
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
-def check_if_first_user(conn) -> bool:
-    """Check if this is the first user (should be admin)"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) as count FROM users")
-    result = cursor.fetchone()
-    return result['count'] == 0
+async def check_if_first_user(conn) -> bool:
+    """
+    Check if this is the first user (should be admin)
+    
+    Must run inside the registration write transaction. Once any user
+    exists the answer can never become True again, so it is cached.
+    """
+    global _users_exist
+    if _users_exist:
+        return False
+    async with conn.execute("SELECT 1 FROM users LIMIT 1") as cursor:
+        _users_exist = await cursor.fetchone() is not None
+    return not _users_exist
 
 
-def check_email_exists(conn, email: str) -> bool:
-    """Check if email already exists"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM users WHERE email = ?", (email,))
-    return cursor.fetchone() is not None
+EMAIL_TAKEN = "This email is already registered. Please login."
+USERNAME_TAKEN = "Username not available. Try another."
 
 
-def check_username_exists(conn, username: str) -> bool:
-    """Check if username already exists"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-    return cursor.fetchone() is not None
+async def registration_conflict(email: str, username: str) -> Optional[str]:
+    """Message for an email or username that is already taken, email first (indexed reads)"""
+    if await get_db().fetch_one("SELECT 1 FROM users WHERE email = ?", (email,)):
+        return EMAIL_TAKEN
+    if await get_db().fetch_one("SELECT 1 FROM users WHERE username = ?", (username,)):
+        return USERNAME_TAKEN
+    return None
 
 
 @router.post("/register", response_model=UserRegistrationResponse, status_code=status.HTTP_201_CREATED)
@@ -104,59 +104,64 @@ async def register_user(user: UserRegistration):
     - Password must meet complexity requirements (12+ chars, uppercase, lowercase, number, special char)
     - Returns JWT token for immediate login
     """
-    conn = None
+    global _users_exist
     try:
-        conn = get_db_connection()
+        # Reject duplicates before paying for a bcrypt hash
+        detail = await registration_conflict(user.email, user.username)
+        if detail is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
         
-        # Check if email already exists
-        if check_email_exists(conn, user.email):
+        # Hash password (off the event loop, in the hashing process pool)
+        try:
+            password_hash = await get_password_hasher().hash(user.password)
+        except PasswordHasherBusy:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This email is already registered. Please login."
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy. Please try again shortly.",
+                headers={"Retry-After": "1"}
             )
         
-        # Check if username already exists
-        if check_username_exists(conn, user.username):
+        # Insert user in a single write transaction; the unique indexes on
+        # email and username still reject duplicates that raced the check above
+        try:
+            async with get_db().write() as conn:
+                is_admin = await check_if_first_user(conn)
+                
+                cursor = await conn.execute("""
+                    INSERT INTO users (
+                        username, 
+                        email, 
+                        password_hash, 
+                        first_name, 
+                        last_name, 
+                        is_admin,
+                        onboarding_completed,
+                        onboarding_step,
+                        created_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    user.username,
+                    user.email,
+                    password_hash,
+                    user.firstName,
+                    user.lastName or '',
+                    is_admin,
+                    False,  # onboarding not completed yet
+                    1,      # completed step 1 (registration)
+                    datetime.utcnow().isoformat()
+                ))
+                user_id = cursor.lastrowid
+        except sqlite3.IntegrityError as e:
+            if "users.email" not in str(e) and "users.username" not in str(e):
+                raise
+            # Whichever index fired, report a taken email first, as the pre-check does
+            detail = await registration_conflict(user.email, user.username) or USERNAME_TAKEN
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username not available. Try another."
+                detail=detail
             )
         
-        # Check if this is the first user
-        is_first_user = check_if_first_user(conn)
-        is_admin = is_first_user
-        
-        # Hash password
-        password_hash = pwd_context.hash(user.password)
-        
-        # Insert user into database
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO users (
-                username, 
-                email, 
-                password_hash, 
-                first_name, 
-                last_name, 
-                is_admin,
-                onboarding_completed,
-                onboarding_step,
-                created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user.username,
-            user.email,
-            password_hash,
-            user.firstName,
-            user.lastName or '',
-            is_admin,
-            False,  # onboarding not completed yet
-            1,      # completed step 1 (registration)
-            datetime.utcnow().isoformat()
-        ))
-        
-        conn.commit()
-        user_id = cursor.lastrowid
+        _users_exist = True
         
         # Generate JWT token
         token = create_jwt_token(user_id, user.username, is_admin)
@@ -171,15 +176,10 @@ async def register_user(user: UserRegistration):
     except HTTPException:
         raise
     except Exception as e:
-        if conn:
-            conn.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
         )
-    finally:
-        if conn:
-            conn.close()
 
 
 def init_jwt_secret(secret: str):
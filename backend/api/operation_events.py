@@ -0,0 +1,64 @@
+"""
+LinkOps - Operation Event Stream
+Server-Sent Events for the Operations tab, served from the in-memory event bus
+"""
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from db.database import get_db
+from services.event_bus import get_event_bus, sse_frame, OPERATION_COMPLETE
+
+router = APIRouter(prefix="/api/operations", tags=["operations"])
+
+# Operations in these states will still publish events; anything else is final
+# (success, failed, partial)
+LIVE_STATUSES = ("queued", "running")
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",   # keep nginx from buffering the stream
+}
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+@router.get("/{operation_id}/events")
+async def operation_events(
+    operation_id: str,
+    last_event_id: Optional[str] = Header(None),
+    lastEventId: Optional[str] = Query(None, description="Resume point for clients that cannot set Last-Event-ID")
+):
+    """
+    Stream script_start, output, script_complete and operation_complete events
+
+    - Every viewer of an operation reads the same shared event log
+    - Reconnects resume after Last-Event-ID without touching the database
+    - Clients that fall too far behind get gap/lagged events instead of unbounded buffering
+    - The stream ends after operation_complete
+    """
+    bus = get_event_bus()
+    log = bus.get(operation_id)
+    if log is None:
+        row = await get_db().fetch_one("SELECT status FROM operations WHERE id = ?", (operation_id,))
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Operation not found")
+        if row["status"] in LIVE_STATUSES:
+            # Queued or not started yet: wait on the log the operation will publish to.
+            # If the row is stale the log expires after idle_expiry and the client
+            # reconnects to this check again.
+            log = bus.open(operation_id)
+        else:
+            # Finished before this process started, or past the replay window: final status only
+            final = sse_frame(
+                OPERATION_COMPLETE, {"operationId": operation_id, "status": row["status"], "replay": False}
+            )
+            return StreamingResponse(iter([final]), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    resume_from = _parse_event_id(last_event_id) if last_event_id else _parse_event_id(lastEventId)
+    return StreamingResponse(bus.stream(log, resume_from), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,73 @@
+"""
+LinkOps - Operation Output Endpoints
+Range reads of script output, inline or spilled to chunk files
+"""
+
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel
+from db.database import get_db
+from services.output_capture import get_output_store, OutputCaptureError, MAX_READ_BYTES
+
+router = APIRouter(prefix="/api/operations", tags=["operations"])
+
+STREAMS = ("stdout", "stderr")
+
+
+class OutputRangeResponse(BaseModel):
+    """One slice of a script's output stream"""
+    stream: str
+    offset: int
+    nextOffset: int
+    totalBytes: int
+    spilled: bool
+    eof: bool
+    data: str
+
+
+@router.get("/{operation_id}/logs/{log_id}/output", response_model=OutputRangeResponse)
+async def read_output(
+    operation_id: str,
+    log_id: int,
+    stream: str = Query("stdout", description="stdout or stderr"),
+    offset: int = Query(0, ge=0),
+    length: int = Query(64 * 1024, ge=1, le=MAX_READ_BYTES)
+):
+    """
+    Read a byte range of one execution's output
+
+    - Offsets count bytes; pass nextOffset to page forward
+    - Large output is read from its compressed chunk file, decompressing only the chunks in range
+    - Spilled offsets are bytes of the raw stream. Inline output is stored as text decoded
+      with invalid UTF-8 replaced, so its offsets are bytes of that text re-encoded as UTF-8;
+      they match the raw stream only when the script printed valid UTF-8
+    """
+    if stream not in STREAMS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="stream must be stdout or stderr")
+
+    row = await get_db().fetch_one(
+        f"SELECT {stream} AS text, {stream}_ref AS ref FROM operation_logs WHERE id = ? AND operation_id = ?",
+        (log_id, operation_id)
+    )
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Log entry not found")
+
+    if row["ref"]:
+        try:
+            data, total = await get_output_store().read(row["ref"], offset, length)
+        except OutputCaptureError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    else:
+        content = (row["text"] or "").encode()
+        data, total = content[offset:offset + length], len(content)
+
+    # A slice can split a UTF-8 sequence; the next range starts at the raw byte offset regardless
+    next_offset = min(offset, total) + len(data)
+    return OutputRangeResponse(
+        stream=stream,
+        offset=offset,
+        nextOffset=next_offset,
+        totalBytes=total,
+        spilled=bool(row["ref"]),
+        eof=next_offset >= total,
+        data=data.decode(errors="replace")
+    )
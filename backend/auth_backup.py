@@ -1,7 +1,9 @@
 """Authentication API endpoints."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header
 from pydantic import BaseModel
-import sqlite3
+from db.database import get_db
+from services.password_hasher import PasswordHasherBusy
+from services.token_cache import get_token_cache
 
 router = APIRouter()
 
@@ -22,21 +24,19 @@ async def login(request: LoginRequest):
     """Authenticate user and return JWT token."""
     from main import auth_service
     
-    token = await auth_service.authenticate(request.username, request.password)
+    try:
+        token = await auth_service.authenticate(request.username, request.password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server is busy, try again shortly", headers={"Retry-After": "1"})
     
     if not token:
         raise HTTPException(status_code=401, detail="Invalid credentials or account locked")
     
     # Get user info including onboarding status
-    conn = sqlite3.connect('/var/lib/linkops/linkops.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute(
+    user = await get_db().fetch_one(
         "SELECT id, username, is_admin, onboarding_completed, onboarding_step FROM users WHERE username = ?",
         (request.username,)
     )
-    user = cursor.fetchone()
-    conn.close()
     
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
@@ -49,3 +49,20 @@ async def login(request: LoginRequest):
         onboarding_completed=bool(user['onboarding_completed']),
         onboarding_step=user['onboarding_step'] or 0
     )
+
+@router.post("/logout")
+async def logout(authorization: str = Header(None)):
+    """Revoke the caller's JWT token."""
+    from main import auth_service
+    
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    token = authorization.split(" ")[1]
+    token_cache = get_token_cache()
+    # Only tokens we issued (and have not revoked) may enter the revocation list
+    if not auth_service.verify_token(token) or token_cache.is_revoked(token):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    token_cache.revoke(token)
+    return {"success": True}
@@ -0,0 +1,158 @@
+"""
+LinkOps - Operation Event Bus Benchmark
+100 SSE subscribers on one 500-host operation: shared event log vs a queue per subscriber
+
+Each host publishes script_start, --lines output events and script_complete;
+the operation ends with operation_complete. A share of the subscribers is slow
+(sleeps after every write, like a browser on a bad link).
+  queues: one unbounded asyncio.Queue per subscriber, each event encoded per subscriber
+  bus:    EventBus, each event encoded once into a bounded shared log
+
+Reports publish time, time until every subscriber finished, frames delivered
+and the peak bytes held for subscribers.
+
+Usage (from backend/):
+    python benchmarks/bench_event_bus.py
+    python benchmarks/bench_event_bus.py --hosts 500 --subscribers 100 --slow 10 --lines 40
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from services.event_bus import (  # noqa: E402
+    EventBus, OPERATION_COMPLETE, OUTPUT, SCRIPT_COMPLETE, SCRIPT_START
+)
+
+OPERATION_ID = "bench-op"
+
+
+def operation_events(hosts: int, lines: int):
+    """Events in the order a 500-host run interleaves them"""
+    for line in range(lines + 2):
+        for host in range(hosts):
+            target = f"vm-{host:03d}"
+            if line == 0:
+                yield SCRIPT_START, {"target": target, "script": "install_docker"}
+            elif line <= lines:
+                text = f"[{target}] Setting up docker-ce ({line}/{lines}) ... unpacking layer {line * 7919 % 1000}"
+                yield OUTPUT, {"target": target, "stream": "stdout", "data": text}
+            else:
+                yield SCRIPT_COMPLETE, {"target": target, "exitCode": 0, "duration": 42.0}
+    yield OPERATION_COMPLETE, {"operationId": OPERATION_ID, "status": "completed"}
+
+
+async def produce(publish, events, yield_every: int) -> float:
+    started = time.perf_counter()
+    for count, (event_type, data) in enumerate(events, 1):
+        publish(event_type, data)
+        if count % yield_every == 0:
+            await asyncio.sleep(0)  # let subscribers run, as network I/O would
+    return time.perf_counter() - started
+
+
+async def run_queues(options) -> dict:
+    queues = [asyncio.Queue() for _ in range(options.subscribers)]
+    held = {"bytes": 0, "peak": 0}
+    delivered = [0] * options.subscribers
+
+    def publish(event_type, data):
+        for queue in queues:
+            frame = f"event: {event_type}\ndata: {json.dumps(data)}\n\n".encode()
+            queue.put_nowait(frame)
+            held["bytes"] += len(frame)
+        held["peak"] = max(held["peak"], held["bytes"])
+        publish.seq += 1
+    publish.seq = 0
+
+    async def subscriber(index: int, slow: bool):
+        while True:
+            frame = await queues[index].get()
+            held["bytes"] -= len(frame)
+            delivered[index] += 1
+            if slow:
+                await asyncio.sleep(options.slow_delay)
+            if frame.startswith(f"event: {OPERATION_COMPLETE}".encode()):
+                return
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(subscriber(i, i < options.slow)) for i in range(options.subscribers)]
+    publish_s = await produce(publish, operation_events(options.hosts, options.lines), options.yield_every)
+    await asyncio.gather(*tasks)
+    return {
+        "publish_s": publish_s,
+        "total_s": time.perf_counter() - started,
+        "events": publish.seq,
+        "frames": sum(delivered),
+        "slow_frames": sum(delivered[:options.slow]),
+        "peak_bytes": held["peak"],
+        "gaps": 0,
+        "sampled": 0,
+    }
+
+
+async def run_bus(options) -> dict:
+    bus = EventBus(retention=options.retention, max_lag=options.max_lag)
+    log = bus.open(OPERATION_ID)
+    delivered = [0] * options.subscribers
+    peak = {"bytes": 0}
+
+    def publish(event_type, data):
+        log.publish(event_type, data)
+        peak["bytes"] = max(peak["bytes"], log.bytes)
+
+    async def subscriber(index: int, slow: bool):
+        async for chunk in bus.stream(log):
+            delivered[index] += chunk.count(b"\nevent: ")  # frames with an id; gap/lagged notices have none
+            if slow:
+                await asyncio.sleep(options.slow_delay)
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(subscriber(i, i < options.slow)) for i in range(options.subscribers)]
+    await asyncio.sleep(0)
+    publish_s = await produce(publish, operation_events(options.hosts, options.lines), options.yield_every)
+    await asyncio.gather(*tasks)
+    stats = bus.stats()
+    return {
+        "publish_s": publish_s,
+        "total_s": time.perf_counter() - started,
+        "events": log.next_seq - 1,
+        "frames": sum(delivered),
+        "slow_frames": sum(delivered[:options.slow]),
+        "peak_bytes": peak["bytes"],
+        "gaps": stats["gaps"],
+        "sampled": stats["sampled"],
+    }
+
+
+async def main():
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument("--hosts", type=int, default=500, help="targets in the operation")
+    arguments.add_argument("--subscribers", type=int, default=100, help="browsers watching it")
+    arguments.add_argument("--slow", type=int, default=10, help="subscribers that are slow readers")
+    arguments.add_argument("--slow-delay", type=float, default=0.002, help="seconds a slow reader sleeps per write")
+    arguments.add_argument("--lines", type=int, default=40, help="output events per host")
+    arguments.add_argument("--yield-every", type=int, default=50, help="events published between yields")
+    arguments.add_argument("--retention", type=int, default=10000, help="events kept by the bus")
+    arguments.add_argument("--max-lag", type=int, default=2000, help="lag before slow subscribers are sampled")
+    options = arguments.parse_args()
+
+    total_events = options.hosts * (options.lines + 2) + 1
+    print(f"{options.hosts} hosts, {total_events} events, {options.subscribers} subscribers "
+          f"({options.slow} slow)")
+    print(f"{'mode':<8}{'publish s':>11}{'total s':>10}{'frames':>11}{'slow frames':>13}"
+          f"{'peak held MB':>14}{'gaps':>6}{'sampled':>10}")
+    for name, run in (("queues", run_queues), ("bus", run_bus)):
+        result = await run(options)
+        print(f"{name:<8}{result['publish_s']:>11.2f}{result['total_s']:>10.2f}{result['frames']:>11}"
+              f"{result['slow_frames']:>13}{result['peak_bytes'] / 1024 / 1024:>14.1f}"
+              f"{result['gaps']:>6}{result['sampled']:>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
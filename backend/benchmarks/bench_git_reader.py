@@ -0,0 +1,122 @@
+"""
+LinkOps - Git Object Reader Benchmark
+Fork-per-call git commands vs the persistent cat-file reader on a synthetic config repo
+
+Builds a repository with thousands of commits (git fast-import), then for a
+sample of commits resolves and reads links.yaml, the way a sync does:
+  fork:       git rev-parse <commit>:links.yaml + git cat-file blob <oid>
+  persistent: GitObjectReader.info() + read_blob() on long-lived processes
+
+Usage (from backend/):
+    python benchmarks/bench_git_reader.py
+    python benchmarks/bench_git_reader.py --commits 5000 --reads 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from services.git_object_reader import GitObjectReader  # noqa: E402
+
+
+def links_yaml(revision: int, hosts: int) -> bytes:
+    lines = ["links:"]
+    for i in range(hosts):
+        lines += [
+            f"  host-{i:04d}:",
+            "    type: VM",
+            f"    host: 10.0.{i // 256}.{i % 256}",
+            f"    port: {22 + (revision + i) % 3}",
+            "    user: root",
+        ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def build_repo(path: str, commits: int, hosts: int):
+    """One commit per revision changing links.yaml and a links.d fragment"""
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+    stream = []
+    for revision in range(commits):
+        links = links_yaml(revision, hosts)
+        fragment = f"links:\n  extra-{revision % 50}:\n    type: VPS\n".encode()
+        message = f"revision {revision}".encode()
+        stream.append(b"commit refs/heads/main\n")
+        stream.append(f"committer Bench <bench@example.com> {1700000000 + revision} +0000\n".encode())
+        stream.append(b"data %d\n%s\n" % (len(message), message))
+        stream.append(b"M 100644 inline links.yaml\ndata %d\n%s\n" % (len(links), links))
+        stream.append(b"M 100644 inline links.d/extra.yaml\ndata %d\n%s\n" % (len(fragment), fragment))
+    subprocess.run(["git", "-C", path, "fast-import", "--quiet"], input=b"".join(stream), check=True)
+    subprocess.run(["git", "-C", path, "gc", "--quiet"], check=True)
+
+
+async def run_git(repo: str, *args: str) -> bytes:
+    process = await asyncio.create_subprocess_exec(
+        "git", "-C", repo, *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, _ = await process.communicate()
+    return stdout
+
+
+async def read_forking(repo: str, commits) -> int:
+    total = 0
+    for commit in commits:
+        oid = (await run_git(repo, "rev-parse", f"{commit}:links.yaml")).decode().strip()
+        total += len(await run_git(repo, "cat-file", "blob", oid))
+    return total
+
+
+async def read_persistent(reader: GitObjectReader, commits) -> int:
+    total = 0
+    for commit in commits:
+        info = await reader.info(f"{commit}:links.yaml")
+        total += len(await reader.read_blob(info.oid))
+    return total
+
+
+async def main():
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument("--commits", type=int, default=3000, help="commits in the synthetic repo")
+    arguments.add_argument("--hosts", type=int, default=200, help="hosts in links.yaml")
+    arguments.add_argument("--reads", type=int, default=1000, help="commits to read links.yaml at")
+    options = arguments.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        repo = os.path.join(directory, "config")
+        started = time.perf_counter()
+        build_repo(repo, options.commits, options.hosts)
+        print(f"Built {options.commits} commits in {time.perf_counter() - started:.1f}s")
+
+        history = (await run_git(repo, "rev-list", "main")).decode().split()
+        sample = random.Random(0).choices(history, k=options.reads)
+
+        started = time.perf_counter()
+        forked_bytes = await read_forking(repo, sample)
+        forked = time.perf_counter() - started
+
+        reader = GitObjectReader(repo)
+        started = time.perf_counter()
+        persistent_bytes = await read_persistent(reader, sample)
+        persistent = time.perf_counter() - started
+        stats = reader.stats()
+        reader.close()
+
+        assert forked_bytes == persistent_bytes
+        print(f"{'mode':<12}{'reads':>8}{'total s':>10}{'per read ms':>14}{'processes':>11}")
+        print(f"{'fork':<12}{options.reads:>8}{forked:>10.2f}{forked / options.reads * 1000:>14.3f}"
+              f"{options.reads * 2:>11}")
+        print(f"{'persistent':<12}{options.reads:>8}{persistent:>10.2f}"
+              f"{persistent / options.reads * 1000:>14.3f}{stats['process_starts']:>11}")
+        print(f"Speed-up: {forked / persistent:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+LinkOps - Inventory Parser Benchmark
+Parse+validate time and peak memory for synthetic 1k/10k/50k-host links.yaml files
+
+Usage (from backend/):
+    python benchmarks/bench_inventory_parser.py
+    python benchmarks/bench_inventory_parser.py --sizes 1000 10000 --baseline
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parsers.yaml_parser import LIBYAML, parse_links_yaml  # noqa: E402
+
+TYPES = ["VPS", "Proxmox", "VM"]
+PROVIDERS = ["Linode", "RackNerd", "Proxmox", "Ubuntu", "Alpine", "Docker"]
+TAGS = ["prod", "dev", "vm", "web", "database", "docker", "proxy", "monitoring"]
+
+
+def generate_links_yaml(hosts: int, seed: int = 0) -> str:
+    """links.yaml with the same shape as git-repo-example/links.yaml"""
+    parts = ["links:\n"]
+    for i in range(hosts):
+        parent = f"pve-{i // 100:04d}"
+        tags = "\n".join(f"      - {TAGS[(i + j + seed) % len(TAGS)]}" for j in range(3))
+        parts.append(
+            f"  host-{i:06d}:\n"
+            f"    type: {TYPES[i % len(TYPES)]}\n"
+            f"    provider: {PROVIDERS[i % len(PROVIDERS)]}\n"
+            f"    host: 10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}\n"
+            f"    port: 22\n"
+            f"    user: root\n"
+            f"    tags:\n{tags}\n"
+            f"    enrollment:\n"
+            f"      required: true\n"
+            f"      clientId: LINKOPS-{uuid.UUID(int=i + seed)}\n"
+            f"    ssh:\n"
+            f"      keyRef: sns_prod_ed25519\n"
+            f"      proxyJump: {parent if i % 4 else 'null'}\n"
+            f"    metadata:\n"
+            f"      parent: {parent}\n"
+            f"      os: Ubuntu 24.04\n"
+            f"      icon: assets/logos/ubuntu-linux.svg\n"
+        )
+    return "".join(parts)
+
+
+def baseline_parse(content: str):
+    """Previous path: pure-Python safe_load, then per-host field checks"""
+    data = yaml.safe_load(content)
+    machines = {}
+    for machine_id, entry in data["links"].items():
+        for key in ("type", "host", "port", "user"):
+            if key not in entry:
+                raise ValueError(f"{machine_id}: missing {key}")
+        machines[machine_id] = dict(entry)
+    return machines
+
+
+def measure(parse, content: str, repeat: int):
+    """Best wall time over `repeat` runs, then peak traced memory of one run"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = parse(content)
+        best = min(best, time.perf_counter() - started)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = parse(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", action="store_true", help="also time the pure-Python safe_load path")
+    args = parser.parse_args()
+
+    print(f"libyaml: {'yes' if LIBYAML else 'no (pure-Python fallback)'}")
+    print(f"{'hosts':>8} {'parser':<10} {'yaml MB':>8} {'time ms':>10} {'per host us':>12} {'peak MB':>9}")
+
+    for hosts in args.sizes:
+        content = generate_links_yaml(hosts)
+        size_mb = len(content) / 1e6
+        runs = [("inventory", parse_links_yaml)]
+        if args.baseline:
+            runs.append(("baseline", baseline_parse))
+
+        for label, parse in runs:
+            seconds, peak, count = measure(parse, content, args.repeat)
+            assert count == hosts, f"{label} parsed {count} of {hosts} hosts"
+            print(f"{hosts:>8} {label:<10} {size_mb:>8.1f} {seconds * 1000:>10.1f} "
+                  f"{seconds * 1e6 / hosts:>12.1f} {peak / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
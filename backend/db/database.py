@@ -0,0 +1,175 @@
+"""
+LinkOps - Database Access Layer
+Shared pool of WAL-mode aiosqlite connections used by every router and service
+"""
+
+import asyncio
+import time
+import aiosqlite
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from db.migrations import run_migrations, latest_version
+
+DB_PATH = "/var/lib/linkops/linkops.db"
+
+
+class DatabasePool:
+    """
+    Pool of aiosqlite connections to a single SQLite database.
+
+    SQLite in WAL mode allows any number of concurrent readers alongside
+    exactly one writer, so the pool keeps a fixed set of read-only
+    connections and one writer connection guarded by a lock. Writers are
+    serialized in-process instead of contending on SQLite's file lock.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, readers: int = 4, busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.reader_count = max(1, readers)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_conns: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def _connect(self, read_only: bool) -> aiosqlite.Connection:
+        """Open one connection with the pragmas every pooled connection needs"""
+        # isolation_level=None: transactions are managed explicitly in write()
+        conn = await aiosqlite.connect(self.db_path, isolation_level=None)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        await conn.execute("PRAGMA foreign_keys = ON")
+        if read_only:
+            await conn.execute("PRAGMA query_only = ON")
+        else:
+            await conn.execute("PRAGMA journal_mode = WAL")
+            await conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    async def open(self):
+        """Open the writer and reader connections"""
+        if self.is_open:
+            return
+
+        # Writer first so the database is switched to WAL before readers attach
+        self._writer = await self._connect(read_only=False)
+
+        self._readers = asyncio.Queue()
+        for _ in range(self.reader_count):
+            conn = await self._connect(read_only=True)
+            self._reader_conns.append(conn)
+            self._readers.put_nowait(conn)
+
+    async def close(self):
+        """Close all pooled connections"""
+        for conn in self._reader_conns:
+            await conn.close()
+        self._reader_conns = []
+        self._readers = None
+
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection"""
+        if not self.is_open:
+            raise RuntimeError("Database pool is not open")
+
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Run a write transaction on the single writer connection
+
+        Commits when the block exits normally and rolls back on any exception.
+        """
+        if not self.is_open:
+            raise RuntimeError("Database pool is not open")
+
+        async with self._write_lock:
+            await self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            else:
+                await self._writer.commit()
+
+    async def fetch_one(self, sql: str, params: Iterable[Any] = ()) -> Optional[aiosqlite.Row]:
+        """Run a read query and return the first row"""
+        async with self.read() as conn:
+            async with conn.execute(sql, tuple(params)) as cursor:
+                return await cursor.fetchone()
+
+    async def fetch_all(self, sql: str, params: Iterable[Any] = ()) -> List[aiosqlite.Row]:
+        """Run a read query and return all rows"""
+        async with self.read() as conn:
+            async with conn.execute(sql, tuple(params)) as cursor:
+                return list(await cursor.fetchall())
+
+    async def execute(self, sql: str, params: Iterable[Any] = ()) -> int:
+        """Run a single write statement in its own transaction, return lastrowid"""
+        async with self.write() as conn:
+            cursor = await conn.execute(sql, tuple(params))
+            return cursor.lastrowid
+
+
+_pool: Optional[DatabasePool] = None
+_startup_report: Dict[str, Any] = {}
+
+
+def get_db() -> DatabasePool:
+    """Get the shared database pool"""
+    if _pool is None:
+        raise RuntimeError("Database not initialized, call init_database() first")
+    return _pool
+
+
+async def init_database(db_path: str = DB_PATH, readers: int = 4):
+    """Open the shared database pool and apply pending migrations"""
+    global _pool, _startup_report
+    if _pool is not None and _pool.is_open:
+        return
+
+    started = time.perf_counter()
+    _pool = DatabasePool(db_path=db_path, readers=readers)
+    await _pool.open()
+    opened = time.perf_counter()
+
+    migrations = await run_migrations(_pool)
+    finished = time.perf_counter()
+
+    _startup_report = {
+        "schema_version": latest_version(),
+        "open_ms": round((opened - started) * 1000, 2),
+        "migrations_ms": round((finished - opened) * 1000, 2),
+        "total_ms": round((finished - started) * 1000, 2),
+        "applied": migrations,
+    }
+    print(f"Database ready in {_startup_report['total_ms']:.1f} ms "
+          f"(schema version {_startup_report['schema_version']}, {len(migrations)} migrations applied)")
+
+
+def get_startup_report() -> Dict[str, Any]:
+    """Timings of the last init_database() run"""
+    return dict(_startup_report)
+
+
+async def close_database():
+    """Close the shared database pool"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,323 @@
+"""
+LinkOps - Database Migrations
+Versioned, idempotent schema migrations applied by init_database() at startup
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+# A migration step is either a list of SQL statements or an async callable
+# taking the writer connection. Every step runs in its own transaction.
+MigrationStep = Union[List[str], Callable[[Any], Any]]
+
+
+BASE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        is_admin BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS machines (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        type TEXT NOT NULL,
+        provider TEXT,
+        icon TEXT,
+        host TEXT NOT NULL,
+        port INTEGER NOT NULL,
+        user TEXT NOT NULL,
+        proxy_jump TEXT,
+        ssh_key_ref TEXT NOT NULL,
+        tags TEXT,
+        enrollment_required BOOLEAN NOT NULL,
+        client_id TEXT NOT NULL,
+        enrolled BOOLEAN DEFAULT FALSE,
+        enrollment_verified_at TIMESTAMP,
+        status TEXT DEFAULT 'unknown',
+        reachable BOOLEAN DEFAULT FALSE,
+        latency INTEGER,
+        last_seen TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scripts (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        emoji TEXT,
+        description TEXT,
+        path TEXT NOT NULL,
+        flags TEXT,
+        estimated_duration INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS operations (
+        id TEXT PRIMARY KEY,
+        scripts TEXT NOT NULL,
+        targets TEXT NOT NULL,
+        flags TEXT,
+        concurrency INTEGER DEFAULT 5,
+        require_enrollment BOOLEAN DEFAULT TRUE,
+        status TEXT NOT NULL,
+        started TIMESTAMP,
+        ended TIMESTAMP,
+        duration INTEGER,
+        success_count INTEGER DEFAULT 0,
+        failed_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS operation_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        operation_id TEXT NOT NULL,
+        target TEXT NOT NULL,
+        script TEXT NOT NULL,
+        exit_code INTEGER,
+        stdout TEXT,
+        stderr TEXT,
+        duration REAL,
+        started TIMESTAMP,
+        ended TIMESTAMP,
+        FOREIGN KEY (operation_id) REFERENCES operations(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS terminal_workspaces (
+        id TEXT PRIMARY KEY,
+        layout TEXT NOT NULL,
+        max_panes INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        closed_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS terminal_panes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        workspace_id TEXT NOT NULL,
+        pane_id TEXT NOT NULL,
+        target TEXT,
+        connected BOOLEAN DEFAULT FALSE,
+        connected_at TIMESTAMP,
+        disconnected_at TIMESTAMP,
+        FOREIGN KEY (workspace_id) REFERENCES terminal_workspaces(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS auth_attempts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        success BOOLEAN NOT NULL,
+        ip_address TEXT,
+        attempted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS git_sync_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        commit_hash TEXT,
+        success BOOLEAN NOT NULL,
+        error TEXT,
+        synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+]
+
+
+async def get_columns(conn, table: str) -> List[str]:
+    """Column names of a table"""
+    async with conn.execute(f"PRAGMA table_info({table})") as cursor:
+        return [row["name"] for row in await cursor.fetchall()]
+
+
+async def add_missing_columns(conn, table: str, columns: List[Tuple[str, str]]):
+    """ALTER TABLE ADD COLUMN for each column that is not there yet"""
+    existing = set(await get_columns(conn, table))
+    for name, definition in columns:
+        if name not in existing:
+            await conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+async def add_onboarding_columns(conn):
+    """Onboarding fields on users (formerly db/schema_updates.sql)"""
+    await add_missing_columns(conn, "users", [
+        ("onboarding_completed", "BOOLEAN DEFAULT FALSE"),
+        ("onboarding_step", "INTEGER DEFAULT 0"),
+        ("first_name", "VARCHAR(50)"),
+        ("last_name", "VARCHAR(50)"),
+        # SQLite cannot add a UNIQUE column; uniqueness comes from an index
+        ("email", "VARCHAR(255)"),
+    ])
+
+
+USER_UNIQUE_INDEXES = [
+    "DROP INDEX IF EXISTS idx_users_email",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email_unique ON users(email)",
+    "DROP INDEX IF EXISTS idx_users_username",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username_unique ON users(username)",
+]
+
+
+# Indexes for the queries the services run on every request or poll
+HOT_PATH_INDEXES = [
+    # Operations tab: running/queued operations and history newest first
+    "CREATE INDEX IF NOT EXISTS idx_operations_status_started ON operations(status, started)",
+    "CREATE INDEX IF NOT EXISTS idx_operations_started ON operations(started)",
+    # Operation detail view loads every log row of one operation
+    "CREATE INDEX IF NOT EXISTS idx_operation_logs_operation ON operation_logs(operation_id)",
+    # Overview tab and health monitor: machines by status, most recently seen
+    "CREATE INDEX IF NOT EXISTS idx_machines_status_last_seen ON machines(status, last_seen)",
+    # Lockout check counts recent failures per user; covers the success flag
+    "CREATE INDEX IF NOT EXISTS idx_auth_attempts_user_time ON auth_attempts(username, attempted_at, success)",
+    # Git status reads the latest sync
+    "CREATE INDEX IF NOT EXISTS idx_git_sync_history_synced ON git_sync_history(synced_at)",
+]
+
+
+async def add_inventory_sync_columns(conn):
+    """Row hashes for incremental Git sync and the blob ids each sync applied"""
+    # NULL inventory_hash marks rows the inventory does not manage (self-enrolled machines)
+    await add_missing_columns(conn, "machines", [
+        ("metadata", "TEXT"),
+        ("inventory_hash", "TEXT"),
+    ])
+    await add_missing_columns(conn, "scripts", [
+        ("inventory_hash", "TEXT"),
+    ])
+    await add_missing_columns(conn, "git_sync_history", [
+        ("blob_hashes", "TEXT"),
+        ("changes", "TEXT"),
+        ("duration_ms", "REAL"),
+    ])
+
+
+async def add_inventory_source_columns(conn):
+    """Inventory file each row came from, for links.d/ and scripts.d/ fragments"""
+    await add_missing_columns(conn, "machines", [("source", "TEXT")])
+    await add_missing_columns(conn, "scripts", [("source", "TEXT")])
+    # Everything synced so far came from the single-file layout
+    await conn.execute("UPDATE machines SET source = 'links.yaml' WHERE inventory_hash IS NOT NULL AND source IS NULL")
+    await conn.execute("UPDATE scripts SET source = 'scripts.yaml' WHERE inventory_hash IS NOT NULL AND source IS NULL")
+
+
+async def add_script_content_columns(conn):
+    """Digest of each catalog script's file, for the content-addressed cache on targets"""
+    await add_missing_columns(conn, "scripts", [
+        ("content_sha256", "TEXT"),
+        ("content_blob", "TEXT"),
+        ("content_bytes", "INTEGER"),
+    ])
+
+
+async def add_operation_timing(conn):
+    """Queue wait per log row, next to duration, and an index for duration history by script"""
+    # duration stays execution time; queue_wait is the time spent waiting for a scheduler slot
+    await add_missing_columns(conn, "operation_logs", [("queue_wait", "REAL")])
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_operation_logs_script_target ON operation_logs(script, target, started)"
+    )
+
+
+async def add_output_spill_columns(conn):
+    """Chunk file references for script output too large to keep inline"""
+    # With a ref set, stdout/stderr hold only the tail; *_bytes is the full stream size
+    await add_missing_columns(conn, "operation_logs", [
+        ("stdout_ref", "TEXT"),
+        ("stdout_bytes", "INTEGER"),
+        ("stderr_ref", "TEXT"),
+        ("stderr_bytes", "INTEGER"),
+    ])
+
+
+# Scheduler priors: recent successful runs of a script across the fleet, newest first
+DURATION_HISTORY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_operation_logs_script_history ON operation_logs(script, started, duration) "
+    "WHERE exit_code = 0 AND duration IS NOT NULL",
+]
+
+
+# Append only. Never edit or renumber a migration that has shipped.
+MIGRATIONS: List[Tuple[int, str, MigrationStep]] = [
+    (1, "base schema", BASE_SCHEMA),
+    (2, "onboarding columns on users", add_onboarding_columns),
+    (3, "unique indexes on users email and username", USER_UNIQUE_INDEXES),
+    (4, "hot path indexes", HOT_PATH_INDEXES),
+    (5, "inventory sync hashes", add_inventory_sync_columns),
+    (6, "inventory source files", add_inventory_source_columns),
+    (7, "script content digests", add_script_content_columns),
+    (8, "operation queue wait and duration history", add_operation_timing),
+    (9, "spilled operation output", add_output_spill_columns),
+    (10, "successful run history index", DURATION_HISTORY_INDEXES),
+]
+
+
+async def get_applied_versions(db) -> Dict[int, Dict[str, Any]]:
+    """Applied migrations keyed by version"""
+    async with db.write() as conn:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP NOT NULL,
+                duration_ms REAL
+            )
+        """)
+    rows = await db.fetch_all("SELECT version, name, applied_at, duration_ms FROM schema_migrations")
+    return {row["version"]: dict(row) for row in rows}
+
+
+async def run_migrations(db) -> List[Dict[str, Any]]:
+    """
+    Apply every pending migration in version order
+
+    Each migration and its schema_migrations row commit together, so a
+    failure leaves the database at the last fully applied version and the
+    next startup resumes from there.
+
+    Returns:
+        One entry per migration applied in this run, with its duration
+    """
+    applied = await get_applied_versions(db)
+    report = []
+
+    for version, name, step in MIGRATIONS:
+        if version in applied:
+            continue
+
+        started = time.perf_counter()
+        async with db.write() as conn:
+            if callable(step):
+                await step(conn)
+            else:
+                for statement in step:
+                    await conn.execute(statement)
+            duration_ms = (time.perf_counter() - started) * 1000
+            await conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at, duration_ms) VALUES (?, ?, ?, ?)",
+                (version, name, datetime.utcnow().isoformat(), round(duration_ms, 2))
+            )
+
+        print(f"Applied migration {version} ({name}) in {duration_ms:.1f} ms")
+        report.append({"version": version, "name": name, "duration_ms": round(duration_ms, 2)})
+
+    if report:
+        # Refresh planner statistics for the new indexes
+        async with db.write() as conn:
+            await conn.execute("PRAGMA optimize")
+
+    return report
+
+
+def latest_version() -> int:
+    """Highest migration version shipped with this build"""
+    return max(version for version, _, _ in MIGRATIONS)
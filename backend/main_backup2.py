@@ -1,12 +1,28 @@
 """LinkOps Backend API - Main application."""
 from fastapi import FastAPI, Depends, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import asyncio
 from config import config
-from db.database import init_database
+from db.database import init_database, close_database, get_startup_report
 from services.auth_service import AuthService
+from services.password_hasher import init_password_hasher, shutdown_password_hasher, get_password_hasher
+from services.token_cache import get_token_cache
+from services.git_providers import init_http_pool, close_http_pool, get_http_pool
+from services.rate_limiter import scheduler_stats
 from services.git_sync_engine import GitSyncEngine
+from services.git_mirror import init_git_mirror, get_git_mirror
+from services.inventory_sync import init_inventory_sync, get_inventory_sync, close_inventory_sync
+from services.inventory_index import rebuild_inventory_index, get_inventory_index
+from services.sync_debouncer import init_sync_debouncer, get_sync_debouncer, close_sync_debouncer
+from services.startup import get_startup_tracker
 from services.ssh_manager import SSHManager
+from services.ssh_pool import init_ssh_pool, get_ssh_pool, close_ssh_pool
+from services.enrollment_batch import init_enrollment_batch, get_enrollment_batch
+from services.script_cache import init_script_cache, get_script_cache
+from services.operation_scheduler import init_operation_scheduler, get_operation_scheduler
+from services.output_capture import init_output_store, get_output_store
+from services.event_bus import init_event_bus, get_event_bus
 from services.enrollment_verifier import EnrollmentVerifier
 from services.ssh_orchestrator import SSHOrchestrator
 from services.terminal_manager import TerminalManager
@@ -22,6 +38,7 @@ terminal_manager = None
 health_monitor = None
 sync_task = None
 health_task = None
+output_sweep_task = None
 
 app = FastAPI(title="LinkOps Backend API", version="1.0.0")
 
@@ -38,91 +55,223 @@ app.add_middleware(
 async def startup_event():
     """Initialize services on startup."""
     global auth_service, git_sync_engine, ssh_manager, enrollment_verifier
-    global ssh_orchestrator, terminal_manager, health_monitor, sync_task, health_task
+    global ssh_orchestrator, terminal_manager, health_monitor, sync_task, health_task, output_sweep_task
+    
+    # Only the database blocks the port from opening; everything that can
+    # warm up later runs in the background and is reported by /ready
+    tracker = get_startup_tracker()
     
     # Initialize database
-    await init_database()
-    
-    # Initialize services
-    auth_service = AuthService(
-        db_path="/var/lib/linkops/linkops.db",
-        jwt_secret=config.jwt_secret,
-        jwt_algorithm=config.jwt_algorithm,
-        jwt_expiration_hours=config.jwt_expiration_hours,
-        max_failed_attempts=config.max_failed_attempts,
-        lockout_duration_minutes=config.lockout_duration_minutes
-    )
+    with tracker.phase("database"):
+        await init_database()
+    tracker.mark_ready("database")
+    
+    # Serve inventory lookups from memory, starting from the last synced state
+    tracker.background("inventory_index", rebuild_inventory_index(), required=True)
+    
+    # Start bcrypt worker processes before the first login arrives
+    tracker.background("password_hasher", init_password_hasher())
+    
+    with tracker.phase("services"):
+        # Shared keep-alive connections for Git provider APIs
+        init_http_pool()
+    
+        # Initialize services
+        auth_service = AuthService(
+            db_path="/var/lib/linkops/linkops.db",
+            jwt_secret=config.jwt_secret,
+            jwt_algorithm=config.jwt_algorithm,
+            jwt_expiration_hours=config.jwt_expiration_hours,
+            max_failed_attempts=config.max_failed_attempts,
+            lockout_duration_minutes=config.lockout_duration_minutes
+        )
 
-    # Initialize onboarding JWT secret
-    from api.onboarding import init_jwt_secret
-    init_jwt_secret(config.jwt_secret)
-    
-    git_sync_engine = GitSyncEngine(
-        repo_url=config.git_repository_url,
-        branch=config.git_branch,
-        repo_path=config.git_repo_path,
-        db_path="/var/lib/linkops/linkops.db"
-    )
+        # Initialize onboarding JWT secret
+        from api.onboarding import init_jwt_secret
+        init_jwt_secret(config.jwt_secret)
     
-    ssh_manager = SSHManager(
-        keys_directory=config.ssh_keys_directory,
-        known_hosts=config.ssh_known_hosts,
-        connection_timeout=config.ssh_connection_timeout
-    )
+        # Push webhooks from the Git provider (disabled until a secret is configured)
+        from api.git_webhooks import init_webhook_secret, webhooks_enabled
+        init_webhook_secret(getattr(config, "git_webhook_secret", None), config.git_branch)
     
-    enrollment_verifier = EnrollmentVerifier(
-        ssh_manager=ssh_manager,
-        db_path="/var/lib/linkops/linkops.db"
-    )
+        git_sync_engine = GitSyncEngine(
+            repo_url=config.git_repository_url,
+            branch=config.git_branch,
+            repo_path=config.git_repo_path,
+            db_path="/var/lib/linkops/linkops.db"
+        )
     
-    ssh_orchestrator = SSHOrchestrator(
-        ssh_manager=ssh_manager,
-        db_path="/var/lib/linkops/linkops.db",
-        git_repo_path=config.git_repo_path
-    )
+        # Default sync mode keeps a shallow, sparse mirror instead of a full clone
+        if getattr(config, "git_sync_mode", "mirror") == "mirror":
+            init_git_mirror(
+                config.git_repository_url,
+                config.git_branch,
+                config.git_repo_path,
+                ssh_key_path=getattr(config, "git_ssh_key_path", None),
+                gc_interval_hours=getattr(config, "git_gc_interval_hours", 24)
+            )
     
-    terminal_manager = TerminalManager(
-        ssh_manager=ssh_manager,
-        db_path="/var/lib/linkops/linkops.db"
-    )
+        # Applies only the inventory files whose blob changed since the last sync
+        init_inventory_sync(config.git_repo_path)
     
-    health_monitor = HealthMonitor(
-        ssh_manager=ssh_manager,
-        db_path="/var/lib/linkops/linkops.db",
-        check_interval=300
-    )
+        # Webhook pushes and polling both go through one debounced sync worker
+        init_sync_debouncer(run_git_sync)
+    
+        # One set of SSH connections for operations, enrollment, health checks and terminals
+        init_ssh_pool(
+            config.ssh_keys_directory,
+            known_hosts=config.ssh_known_hosts,
+            connect_timeout=config.ssh_connection_timeout,
+            max_per_host=getattr(config, "ssh_pool_max_per_host", 4),
+            max_channels=getattr(config, "ssh_pool_max_channels", 8),
+            max_jump_channels=getattr(config, "ssh_pool_max_jump_channels", 64),
+            idle_timeout=getattr(config, "ssh_pool_idle_seconds", 300)
+        )
+    
+        # Catalog scripts are shipped to each target once per content version
+        init_script_cache(
+            get_ssh_pool(),
+            get_inventory_sync().reader,
+            cache_dir=getattr(config, "ssh_script_cache_dir", "/var/lib/linkops/cache")
+        )
+    
+        # Fleet-wide client ID checks for /verify and require_enrollment pre-checks
+        init_enrollment_batch(
+            get_ssh_pool(),
+            concurrency=getattr(config, "enrollment_verify_concurrency", 64),
+            per_jump_limit=getattr(config, "enrollment_verify_per_jump", 16),
+            host_timeout=getattr(config, "enrollment_verify_timeout", 5),
+            ttl=getattr(config, "enrollment_cache_ttl", 300)
+        )
+    
+        # Admission control for operations: global, per-target and per-hypervisor limits
+        init_operation_scheduler(
+            global_limit=getattr(config, "operations_global_concurrency", 32),
+            per_target=getattr(config, "operations_per_target_concurrency", 1),
+            per_parent=getattr(config, "operations_per_parent_concurrency", 8)
+        )
+    
+        # Script output: bounded tail in memory, the rest spilled to compressed chunk files
+        init_output_store(
+            output_dir=getattr(config, "operations_output_dir", "/var/lib/linkops/output"),
+            tail_bytes=getattr(config, "operations_output_tail_bytes", 65536),
+            chunk_bytes=getattr(config, "operations_output_chunk_bytes", 262144),
+            retention_days=getattr(config, "operations_output_retention_days", 30)
+        )
     
-    # Start periodic Git sync
-    async def periodic_sync():
-        while True:
-            await asyncio.sleep(config.git_sync_interval_minutes * 60)
-            try:
-                await git_sync_engine.sync()
-            except Exception as e:
-                print(f"Git sync error: {e}")
+        # Shared, replayable event logs behind /api/operations/{id}/events
+        init_event_bus(
+            retention=getattr(config, "operations_event_retention", 10000),
+            linger=getattr(config, "operations_event_linger_seconds", 300),
+            max_lag=getattr(config, "operations_event_max_lag", 2000),
+            lag_policy=getattr(config, "operations_event_lag_policy", "sample"),
+            idle_expiry=getattr(config, "operations_event_idle_expiry_seconds", 1800)
+        )
     
-    sync_task = asyncio.create_task(periodic_sync())
+        ssh_manager = SSHManager(
+            keys_directory=config.ssh_keys_directory,
+            known_hosts=config.ssh_known_hosts,
+            connection_timeout=config.ssh_connection_timeout
+        )
     
-    # Start health monitoring
-    health_task = asyncio.create_task(health_monitor.start())
+        enrollment_verifier = EnrollmentVerifier(
+            ssh_manager=ssh_manager,
+            db_path="/var/lib/linkops/linkops.db"
+        )
     
-    # Initial sync (skip if Git not configured yet)
-    try:
+        ssh_orchestrator = SSHOrchestrator(
+            ssh_manager=ssh_manager,
+            db_path="/var/lib/linkops/linkops.db",
+            git_repo_path=config.git_repo_path
+        )
+    
+        terminal_manager = TerminalManager(
+            ssh_manager=ssh_manager,
+            db_path="/var/lib/linkops/linkops.db"
+        )
+    
+        health_monitor = HealthMonitor(
+            ssh_manager=ssh_manager,
+            db_path="/var/lib/linkops/linkops.db",
+            check_interval=300
+        )
+    
+        # Start periodic Git sync; with webhooks it is only a slow fallback
+        poll_minutes = config.git_sync_interval_minutes
+        if webhooks_enabled():
+            poll_minutes = max(poll_minutes, getattr(config, "git_webhook_fallback_minutes", 60))
+    
+        async def periodic_sync():
+            poll_seconds = poll_minutes * 60
+            debouncer = get_sync_debouncer()
+            while True:
+                await asyncio.sleep(poll_seconds)
+                since = debouncer.seconds_since_last_run()
+                if since is not None and since < poll_seconds:
+                    # A push already triggered a sync; poll one interval after it
+                    await asyncio.sleep(poll_seconds - since)
+                debouncer.request("poll")
+    
+        sync_task = asyncio.create_task(periodic_sync())
+    
+        # Start health monitoring
+        health_task = asyncio.create_task(health_monitor.start())
+    
+        # Drop spilled output of old operations once a day
+        async def periodic_output_sweep():
+            while True:
+                try:
+                    await get_output_store().sweep()
+                except Exception as e:
+                    print(f"Output sweep error: {e}")
+                await asyncio.sleep(24 * 3600)
+    
+        output_sweep_task = asyncio.create_task(periodic_output_sweep())
+    
+    # Initial sync (fails harmlessly if Git is not configured yet)
+    async def initial_sync():
+        result = await get_sync_debouncer().run_now("startup")
+        if result is not None and not result.success:
+            raise RuntimeError(result.error)
+    
+    tracker.background("git_sync", initial_sync())
+    tracker.serving()
+
+async def run_git_sync():
+    """Pull the config repository, then apply inventory changes incrementally."""
+    mirror = get_git_mirror()
+    if mirror is not None:
+        await mirror.sync()
+    else:
         await git_sync_engine.sync()
-    except Exception as e:
-        print(f"Initial Git sync skipped: {e}")
+    result = await get_inventory_sync().sync()
+    if result.success and result.machines:
+        await rebuild_inventory_index()
+    if mirror is not None:
+        await mirror.maybe_gc()
+    return result
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
-    global sync_task, health_task, health_monitor
+    global sync_task, health_task, health_monitor, output_sweep_task
     
+    await get_startup_tracker().cancel()
     if sync_task:
         sync_task.cancel()
     if health_task:
         health_task.cancel()
+    if output_sweep_task:
+        output_sweep_task.cancel()
     if health_monitor:
         await health_monitor.stop()
+    
+    await close_sync_debouncer()
+    close_inventory_sync()
+    await close_ssh_pool()
+    await close_http_pool()
+    shutdown_password_hasher()
+    await close_database()
 
 # Auth dependency
 async def get_current_user(authorization: str = Header(None)):
@@ -131,11 +280,19 @@ async def get_current_user(authorization: str = Header(None)):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     token = authorization.split(" ")[1]
+    token_cache = get_token_cache()
+    
+    # Revocation drops cache entries, so a hit is always a live token
+    username = token_cache.get(token)
+    if username:
+        return username
+    
     username = auth_service.verify_token(token)
     
-    if not username:
+    if not username or token_cache.is_revoked(token, username):
         raise HTTPException(status_code=401, detail="Invalid token")
     
+    token_cache.put(token, username)
     return username
 
 # Health check
@@ -143,18 +300,58 @@ async def get_current_user(authorization: str = Header(None)):
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+# Readiness (load balancers and rolling restarts); /health only says the process is up
+@app.get("/ready")
+async def readiness_check():
+    tracker = get_startup_tracker()
+    ready = tracker.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "subsystems": tracker.readiness()}
+    )
+
+# Internal metrics
+@app.get("/api/metrics")
+async def metrics(username: str = Depends(get_current_user)):
+    return {
+        "password_hasher": get_password_hasher().stats(),
+        "token_cache": get_token_cache().stats(),
+        "startup": get_startup_tracker().report(),
+        "database": get_startup_report(),
+        "git_providers": get_http_pool().stats(),
+        "git_rate_limits": scheduler_stats(),
+        "inventory_sync": get_inventory_sync().stats(),
+        "git_sync": get_sync_debouncer().stats(),
+        "git_mirror": get_git_mirror().stats() if get_git_mirror() else None,
+        "inventory_index": get_inventory_index().stats(),
+        "ssh_pool": get_ssh_pool().stats(),
+        "enrollment": get_enrollment_batch().stats(),
+        "script_cache": get_script_cache().stats(),
+        "operation_scheduler": get_operation_scheduler().stats(),
+        "operation_output": get_output_store().stats(),
+        "operation_events": get_event_bus().stats()
+    }
+
 # Import and include routers
 from api import auth, links, operations, git_api, tables, terminal
 from api import onboarding
 from api import git_onboarding
 from api import machine_onboarding
+from api import git_webhooks
+from api import inventory
+from api import operation_output
+from api import operation_events
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(onboarding.router, tags=["onboarding"])
 app.include_router(git_onboarding.router, tags=["onboarding-git"])
 app.include_router(machine_onboarding.router, tags=["onboarding-machine"])
+app.include_router(inventory.router, tags=["inventory"], dependencies=[Depends(get_current_user)])
+app.include_router(operation_output.router, tags=["operations"], dependencies=[Depends(get_current_user)])
+app.include_router(operation_events.router, tags=["operations"], dependencies=[Depends(get_current_user)])
 app.include_router(links.router, prefix="/api/links", tags=["links"])
 app.include_router(operations.router, prefix="/api/operations", tags=["operations"])
+app.include_router(git_webhooks.router, tags=["git-webhooks"])
 app.include_router(git_api.router, prefix="/api/git", tags=["git"])
 app.include_router(tables.router, prefix="/api/tables", tags=["tables"])
 app.include_router(terminal.router, prefix="/api/terminal", tags=["terminal"])
@@ -0,0 +1,458 @@
+"""
+LinkOps - Inventory YAML Parser
+Fast loader and single-pass validator for links.yaml and scripts.yaml
+"""
+
+import re
+import sys
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+import yaml
+from yaml import events, nodes
+from yaml.resolver import Resolver
+
+# libyaml is 5-10x faster than the pure-Python scanner; fall back when it is not compiled in
+try:
+    from yaml import CSafeLoader as InventoryLoader
+    LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader as InventoryLoader
+    LIBYAML = False
+
+CLIENT_ID_PATTERN = re.compile(r"^LINKOPS-[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+# Stop collecting after this many problems; the message stays readable
+MAX_ERRORS = 200
+
+
+class InventoryParseError(ValueError):
+    """A YAML syntax error or every validation error found in one file"""
+
+    def __init__(self, filename: str, errors: List[str]):
+        self.filename = filename
+        self.errors = errors
+        shown = "; ".join(errors[:10])
+        more = f" (and {len(errors) - 10} more)" if len(errors) > 10 else ""
+        super().__init__(f"{filename}: {shown}{more}")
+
+
+class MachineRecord(NamedTuple):
+    """One validated links.yaml entry"""
+    id: str
+    name: str
+    type: str
+    provider: Optional[str]
+    host: str
+    port: int
+    user: str
+    tags: Tuple[str, ...]
+    enrollment_required: bool
+    client_id: str
+    ssh_key_ref: str
+    proxy_jump: Optional[str]
+    icon: Optional[str]
+    metadata: Optional[Dict[str, Any]]
+
+
+class ScriptRecord(NamedTuple):
+    """One validated scripts.yaml entry"""
+    id: str
+    name: str
+    emoji: Optional[str]
+    description: Optional[str]
+    path: str
+    flags: Tuple[str, ...]
+    estimated_duration: Optional[int]
+    tags: Tuple[str, ...]
+
+
+_MISSING = object()
+
+# A check returns (value, error); error is None when the value is valid
+Check = Callable[[Any], Tuple[Any, Optional[str]]]
+
+
+def _string(value):
+    if isinstance(value, str) and value:
+        return value, None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # An unquoted numeric hostname loads as a number
+        return str(value), None
+    return None, "must be a non-empty string"
+
+
+def _label(value):
+    """Strings repeated across many hosts (type, user, keyRef, ...) are interned"""
+    value, error = _string(value)
+    return (sys.intern(value) if error is None else None), error
+
+
+def _text(value):
+    if isinstance(value, str):
+        return value, None
+    return None, "must be a string"
+
+
+def _port(value):
+    if isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= 65535:
+        return value, None
+    return None, "must be an integer between 1 and 65535"
+
+
+def _duration(value):
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value, None
+    return None, "must be a non-negative integer (seconds)"
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value, None
+    return None, "must be true or false"
+
+
+def _string_list(value):
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return tuple(sys.intern(item) for item in value), None
+    return None, "must be a list of strings"
+
+
+def _client_id(value):
+    if isinstance(value, str) and CLIENT_ID_PATTERN.match(value):
+        return value, None
+    return None, "must be LINKOPS-<uuid>"
+
+
+def _mapping(value):
+    if isinstance(value, dict):
+        return value, None
+    return None, "must be a mapping"
+
+
+def _relative_path(value):
+    if not isinstance(value, str) or not value:
+        return None, "must be a non-empty string"
+    if value.startswith("/") or ".." in value.split("/"):
+        return None, "must be a relative path inside the repository"
+    return value, None
+
+
+class Field(NamedTuple):
+    path: Tuple[str, ...]
+    required: bool
+    check: Check
+    default: Any = None
+
+
+def compile_schema(fields: List[Field]) -> Callable[[str, Dict[str, Any], List[str]], Optional[tuple]]:
+    """
+    Turn a field list into a validator for one entry
+
+    The validator returns the field values in order, appending every
+    problem to the shared error list instead of stopping at the first.
+    """
+    compiled = [(field.path, ".".join(field.path), field.required, field.check, field.default)
+                for field in fields]
+
+    def validate(item_id: str, entry: Dict[str, Any], errors: List[str]) -> Optional[tuple]:
+        values = []
+        ok = True
+        for path, dotted, required, check, default in compiled:
+            value = entry
+            for key in path:
+                value = value.get(key, _MISSING) if isinstance(value, dict) else _MISSING
+                if value is _MISSING:
+                    break
+
+            if value is _MISSING or value is None:
+                if required:
+                    errors.append(f"'{item_id}': missing required field '{dotted}'")
+                    ok = False
+                values.append(default)
+                continue
+
+            value, error = check(value)
+            if error is not None:
+                errors.append(f"'{item_id}': '{dotted}' {error}")
+                ok = False
+            values.append(value)
+        return tuple(values) if ok else None
+
+    return validate
+
+
+_validate_link = compile_schema([
+    Field(("name",), False, _string),
+    Field(("type",), True, _label),
+    Field(("provider",), False, _label),
+    Field(("host",), True, _string),
+    Field(("port",), True, _port),
+    Field(("user",), True, _label),
+    Field(("tags",), False, _string_list, ()),
+    Field(("enrollment", "required"), True, _boolean),
+    Field(("enrollment", "clientId"), True, _client_id),
+    Field(("ssh", "keyRef"), True, _label),
+    Field(("ssh", "proxyJump"), False, _label),
+    Field(("metadata", "icon"), False, _label),
+    Field(("metadata",), False, _mapping),
+])
+
+_validate_script = compile_schema([
+    Field(("name",), True, _text),
+    Field(("emoji",), False, _text),
+    Field(("description",), False, _text),
+    Field(("path",), True, _relative_path),
+    Field(("flags",), False, _string_list, ()),
+    Field(("estimatedDuration",), False, _duration),
+    Field(("tags",), False, _string_list, ()),
+])
+
+
+def _yaml_error(filename: str, e: yaml.YAMLError) -> InventoryParseError:
+    """Syntax errors carry the line number"""
+    if isinstance(e, yaml.MarkedYAMLError):
+        mark = e.problem_mark or e.context_mark
+        where = f"line {mark.line + 1}, column {mark.column + 1}: " if mark else ""
+        return InventoryParseError(filename, [f"{where}{e.problem or e}"])
+    return InventoryParseError(filename, [str(e)])
+
+
+def load_yaml(content: Union[str, bytes], filename: str) -> Any:
+    """Load a whole YAML document with the C loader when available"""
+    try:
+        return yaml.load(content, Loader=InventoryLoader)
+    except yaml.YAMLError as e:
+        raise _yaml_error(filename, e)
+
+
+class _Fallback(Exception):
+    """The document uses anchors, aliases, tags or merge keys; load it with load_yaml()"""
+
+
+STR_TAG = "tag:yaml.org,2002:str"
+SPECIAL_KEY_TAGS = {"tag:yaml.org,2002:merge", "tag:yaml.org,2002:value"}
+
+# A plain scalar starting with any other character always resolves to a string
+_RESOLVABLE_FIRST_CHARS = frozenset(key for key in Resolver.yaml_implicit_resolvers if key)
+_ANY_FIRST_CHAR = None in Resolver.yaml_implicit_resolvers
+
+SCALAR_CACHE_SIZE = 4096
+
+
+class _EventReader:
+    """
+    Builds Python values straight from parser events
+
+    yaml.load() composes a node for every value of the document and then
+    runs the Python resolver and constructor over all of them. Inventory
+    files are plain maps, lists and scalars, so this reader skips the node
+    graph, resolves only plain scalars that could be something other than a
+    string, and caches those (ports, booleans and nulls repeat on every
+    host). Anything beyond plain data raises _Fallback.
+    """
+
+    def __init__(self, content: Union[str, bytes]):
+        self.loader = InventoryLoader(content)
+        self.scalars: Dict[str, Any] = {}
+
+    def close(self):
+        self.loader.dispose()
+
+    def next(self) -> events.Event:
+        return self.loader.get_event()
+
+    def scalar(self, event: events.ScalarEvent) -> Any:
+        if event.anchor is not None or event.tag is not None:
+            raise _Fallback()
+        value = event.value
+        # Quoted and block scalars are always strings
+        if not event.implicit[0]:
+            return value
+        if value and not _ANY_FIRST_CHAR and value[0] not in _RESOLVABLE_FIRST_CHARS:
+            return value
+
+        result = self.scalars.get(value, _MISSING)
+        if result is _MISSING:
+            tag = self.loader.resolve(nodes.ScalarNode, value, (True, False))
+            if tag in SPECIAL_KEY_TAGS:
+                raise _Fallback()
+            if tag == STR_TAG:
+                result = value
+            else:
+                node = nodes.ScalarNode(tag, value, event.start_mark, event.end_mark)
+                result = self.loader.construct_object(node)
+            if len(self.scalars) < SCALAR_CACHE_SIZE:
+                self.scalars[value] = result
+        return result
+
+    def build(self, event: events.Event) -> Any:
+        """Value that starts at `event`"""
+        kind = type(event)
+        if kind is events.ScalarEvent:
+            return self.scalar(event)
+        if kind is events.AliasEvent or event.anchor is not None or event.tag is not None:
+            raise _Fallback()
+
+        if kind is events.MappingStartEvent:
+            mapping = {}
+            while True:
+                key_event = self.next()
+                if type(key_event) is events.MappingEndEvent:
+                    return mapping
+                key = self.build(key_event)
+                try:
+                    mapping[key] = self.build(self.next())
+                except TypeError:
+                    raise _Fallback()  # unhashable key, let the constructor report it
+
+        if kind is events.SequenceStartEvent:
+            sequence = []
+            while True:
+                item_event = self.next()
+                if type(item_event) is events.SequenceEndEvent:
+                    return sequence
+                sequence.append(self.build(item_event))
+
+        raise _Fallback()
+
+
+def _stream_entries(content: Union[str, bytes], section: str, filename: str) -> Iterator[Tuple[Any, Any]]:
+    """
+    Yield (id, entry) for one top-level section without building the document
+
+    Only one entry is materialized at a time, so peak memory is bounded by
+    the records kept by the caller rather than by the size of the file.
+    """
+    reader = _EventReader(content)
+    try:
+        reader.next()  # StreamStart
+        if type(reader.next()) is events.StreamEndEvent:
+            return  # empty file
+
+        root = reader.next()
+        if type(root) is events.ScalarEvent and reader.scalar(root) is None:
+            reader.next()  # DocumentEnd
+        elif type(root) is not events.MappingStartEvent or root.anchor is not None or root.tag is not None:
+            if type(root) is events.ScalarEvent or type(root) is events.SequenceStartEvent:
+                raise InventoryParseError(filename, ["top level must be a mapping"])
+            raise _Fallback()
+        else:
+            while True:
+                key_event = reader.next()
+                if type(key_event) is events.MappingEndEvent:
+                    break
+                key = reader.build(key_event)
+                value_event = reader.next()
+                if key != section:
+                    reader.build(value_event)
+                    continue
+
+                # "links:" / "links: []" is an empty inventory, not an error
+                if type(value_event) is events.ScalarEvent and reader.scalar(value_event) is None:
+                    continue
+                if type(value_event) is events.SequenceStartEvent:
+                    if value_event.anchor is not None or value_event.tag is not None:
+                        raise _Fallback()
+                    if type(reader.next()) is events.SequenceEndEvent:
+                        continue
+                    raise InventoryParseError(filename, [f"'{section}' must be a mapping of id to entry"])
+                if type(value_event) is not events.MappingStartEvent:
+                    raise InventoryParseError(filename, [f"'{section}' must be a mapping of id to entry"])
+                if value_event.anchor is not None or value_event.tag is not None:
+                    raise _Fallback()
+
+                while True:
+                    id_event = reader.next()
+                    if type(id_event) is events.MappingEndEvent:
+                        break
+                    item_id = reader.build(id_event)
+                    yield item_id, reader.build(reader.next())
+            reader.next()  # DocumentEnd
+
+        if type(reader.next()) is not events.StreamEndEvent:
+            raise _Fallback()  # more than one document; yaml.load reports it
+    finally:
+        reader.close()
+
+
+def _loaded_entries(content: Union[str, bytes], section: str, filename: str) -> Iterator[Tuple[Any, Any]]:
+    """Yield (id, entry) for one top-level section of a fully loaded document"""
+    data = load_yaml(content, filename)
+    if data is None:
+        return
+    if not isinstance(data, dict):
+        raise InventoryParseError(filename, ["top level must be a mapping"])
+    entries = data.get(section)
+    if entries is None or entries == []:
+        return
+    if not isinstance(entries, dict):
+        raise InventoryParseError(filename, [f"'{section}' must be a mapping of id to entry"])
+    yield from entries.items()
+
+
+def _collect(content: Union[str, bytes], filename: str, section: str,
+             to_record: Callable[[str, Dict[str, Any], List[str]], Any]) -> Dict[str, Any]:
+    """Validate every entry of a section, collecting all errors before raising"""
+    for entries in (_stream_entries, _loaded_entries):
+        records: Dict[str, Any] = {}
+        errors: List[str] = []
+        seen = set()
+        try:
+            for item_id, entry in entries(content, section, filename):
+                item_id = sys.intern(str(item_id))
+                if item_id in seen:
+                    errors.append(f"'{item_id}': duplicate id")
+                    continue
+                seen.add(item_id)
+                if not isinstance(entry, dict):
+                    errors.append(f"'{item_id}': must be a mapping")
+                else:
+                    record = to_record(item_id, entry, errors)
+                    if record is not None:
+                        records[item_id] = record
+                if len(errors) >= MAX_ERRORS:
+                    break
+        except _Fallback:
+            continue
+        except yaml.YAMLError as e:
+            raise _yaml_error(filename, e)
+
+        if errors:
+            raise InventoryParseError(filename, errors)
+        return records
+    return {}
+
+
+def _machine_record(machine_id: str, entry: Dict[str, Any], errors: List[str]) -> Optional[MachineRecord]:
+    values = _validate_link(machine_id, entry, errors)
+    if values is None:
+        return None
+    name, machine_type, provider, host, port, user, tags, required, client_id, key_ref, proxy_jump, icon, metadata = values
+    return MachineRecord(
+        machine_id, name or machine_id, machine_type, provider, host, port, user, tags,
+        required, client_id, key_ref, proxy_jump, icon, metadata or None
+    )
+
+
+def _script_record(script_id: str, entry: Dict[str, Any], errors: List[str]) -> Optional[ScriptRecord]:
+    values = _validate_script(script_id, entry, errors)
+    return ScriptRecord(script_id, *values) if values is not None else None
+
+
+def parse_links_yaml(content: Union[str, bytes], filename: str = "links.yaml") -> Dict[str, MachineRecord]:
+    """
+    Parse and validate links.yaml
+
+    Raises:
+        InventoryParseError: With every problem found in the file
+    """
+    return _collect(content, filename, "links", _machine_record)
+
+
+def parse_scripts_yaml(content: Union[str, bytes], filename: str = "scripts.yaml") -> Dict[str, ScriptRecord]:
+    """
+    Parse and validate scripts.yaml
+
+    Raises:
+        InventoryParseError: With every problem found in the file
+    """
+    return _collect(content, filename, "scripts", _script_record)
@@ -0,0 +1,275 @@
+"""
+LinkOps - Batched Enrollment Verification
+Fans client ID checks out over the SSH pool with bounded concurrency, caches results and writes them in one batch
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from db.database import get_db
+from services.inventory_index import get_inventory_index
+from services.ssh_pool import PoolKey, SSHConnectionPool, machine_key
+
+CLIENT_ID_PATH = "/etc/linkops/client_id"
+
+DEFAULT_CONCURRENCY = 64        # checks in flight across the whole fleet
+DEFAULT_PER_JUMP_LIMIT = 16     # checks in flight behind one jump host
+DEFAULT_HOST_TIMEOUT = 5.0      # connect + read deadline per host
+DEFAULT_TTL = 300.0             # seconds a confirmed result is reused
+DEFAULT_NEGATIVE_TTL = 30.0     # mismatches and unreachable hosts are re-checked sooner
+
+
+@dataclass
+class EnrollmentResult:
+    """Outcome of reading the client ID file on one machine"""
+    machine_id: str
+    enrolled: bool
+    client_id_found: bool
+    client_id_matches: bool
+    verified_at: datetime
+    error: Optional[str] = None
+    duration_ms: float = 0.0
+    cached: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "machine_id": self.machine_id,
+            "enrolled": self.enrolled,
+            "client_id_found": self.client_id_found,
+            "client_id_matches": self.client_id_matches,
+            "verified_at": self.verified_at.isoformat(),
+            "error": self.error,
+            "cached": self.cached,
+        }
+
+
+class EnrollmentBatchVerifier:
+    """
+    Verifies /etc/linkops/client_id on many machines at once
+
+    Checks run concurrently up to a global limit, and up to a per-jump-host
+    limit behind each hypervisor so a fleet-wide check cannot saturate one
+    jump host's tunnel slots. Every host gets a short deadline; a slow or
+    unreachable host fails on its own without holding up the batch.
+
+    Results are cached by (machine id, expected clientId), so changing the
+    clientId in links.yaml invalidates the entry by construction, and
+    concurrent requests for the same machine share one in-flight check.
+    The checks of a batch belong to a task of their own, so a caller that
+    is cancelled (client disconnected) does not cancel checks that other
+    callers are waiting on; the batch still finishes, caches and stores.
+    Definitive answers are written back to the machines table in a single
+    executemany per batch; transport errors leave the stored state alone.
+    """
+
+    def __init__(self, pool: SSHConnectionPool,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 per_jump_limit: int = DEFAULT_PER_JUMP_LIMIT,
+                 host_timeout: float = DEFAULT_HOST_TIMEOUT,
+                 ttl: float = DEFAULT_TTL,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL):
+        self.pool = pool
+        self.host_timeout = host_timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.per_jump_limit = per_jump_limit
+        self._global = asyncio.Semaphore(concurrency)
+        self._per_jump: Dict[PoolKey, asyncio.Semaphore] = {}
+        self._cache: Dict[Tuple[str, str], Tuple[EnrollmentResult, float]] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._running_batches: Set[asyncio.Task] = set()
+        self._hits = 0
+        self._misses = 0
+        self._checks = 0
+        self._timeouts = 0
+        self._errors = 0
+        self._batches = 0
+        self._rows_written = 0
+
+    def _cached(self, cache_key: Tuple[str, str]) -> Optional[EnrollmentResult]:
+        entry = self._cache.get(cache_key)
+        if entry is None:
+            return None
+        result, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._cache[cache_key]
+            return None
+        return result
+
+    def invalidate(self, machine_id: Optional[str] = None):
+        """Forget cached results for one machine, or for all of them"""
+        if machine_id is None:
+            self._cache.clear()
+        else:
+            for cache_key in [cache_key for cache_key in self._cache if cache_key[0] == machine_id]:
+                del self._cache[cache_key]
+
+    async def verify(self, machine_id: str, force: bool = False) -> EnrollmentResult:
+        """Verify one machine (POST /api/links/{id}/verify)"""
+        return (await self.verify_batch([machine_id], force=force))[machine_id]
+
+    async def verify_batch(self, machine_ids: Iterable[str], force: bool = False) -> Dict[str, EnrollmentResult]:
+        """
+        Verify many machines concurrently
+
+        Args:
+            machine_ids: Inventory machine ids; unknown ids get an error result
+            force: Skip the cache (results are still cached afterwards)
+        """
+        index = get_inventory_index()
+        results: Dict[str, EnrollmentResult] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        launched: Dict[Tuple[str, str], asyncio.Future] = {}
+
+        for machine_id in dict.fromkeys(machine_ids):
+            machine = index.get(machine_id)
+            if machine is None:
+                results[machine_id] = _failure(machine_id, "Machine not in inventory")
+                continue
+            if not machine.client_id:
+                results[machine_id] = _failure(machine_id, "No clientId in inventory")
+                continue
+
+            cache_key = (machine_id, machine.client_id)
+            if not force:
+                cached = self._cached(cache_key)
+                if cached is not None:
+                    self._hits += 1
+                    results[machine_id] = _as_cached(cached)
+                    continue
+            if cache_key in self._inflight:
+                self._hits += 1
+                waiting[machine_id] = self._inflight[cache_key]
+                continue
+
+            self._misses += 1
+            future = asyncio.ensure_future(self._check(machine_id, machine.client_id))
+            self._inflight[cache_key] = future
+            future.add_done_callback(lambda _, cache_key=cache_key: self._inflight.pop(cache_key, None))
+            launched[cache_key] = future
+
+        if launched:
+            self._batches += 1
+            batch = asyncio.ensure_future(self._finish_batch(launched))
+            self._running_batches.add(batch)
+            batch.add_done_callback(self._running_batches.discard)
+            for result in await asyncio.shield(batch):
+                results[result.machine_id] = result
+
+        for machine_id, future in waiting.items():
+            results[machine_id] = _as_cached(await asyncio.shield(future))
+        return results
+
+    async def _finish_batch(self, launched: Dict[Tuple[str, str], asyncio.Future]) -> List[EnrollmentResult]:
+        """Wait for a batch's checks, cache them and write them back; runs detached from the caller"""
+        done = await asyncio.gather(*launched.values())
+        now = time.monotonic()
+        for cache_key, result in zip(launched, done):
+            self._cache[cache_key] = (result, now + (self.ttl if result.enrolled else self.negative_ttl))
+        await self._store(done)
+        return done
+
+    async def _check(self, machine_id: str, expected: str) -> EnrollmentResult:
+        started = time.perf_counter()
+        try:
+            key = machine_key(machine_id)
+        except (KeyError, ValueError) as e:
+            return _failure(machine_id, f"Invalid SSH target: {e}")
+
+        jump_limit = None
+        if key.via is not None:
+            jump_limit = self._per_jump.setdefault(key.via, asyncio.Semaphore(self.per_jump_limit))
+
+        # Jump limit first, so hosts queued behind a busy hypervisor do not hold global slots
+        if jump_limit is not None:
+            await jump_limit.acquire()
+        try:
+            async with self._global:
+                self._checks += 1
+                completed = await asyncio.wait_for(
+                    self.pool.run(key, f"cat {CLIENT_ID_PATH}", check=False),
+                    self.host_timeout
+                )
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            return _failure(machine_id, f"Timed out after {self.host_timeout:.0f}s", started)
+        except Exception as e:
+            self._errors += 1
+            return _failure(machine_id, f"SSH error: {e}", started)
+        finally:
+            if jump_limit is not None:
+                jump_limit.release()
+
+        found = completed.exit_status == 0
+        matches = found and (completed.stdout or "").strip() == expected
+        return EnrollmentResult(
+            machine_id=machine_id,
+            enrolled=matches,
+            client_id_found=found,
+            client_id_matches=matches,
+            verified_at=datetime.utcnow(),
+            duration_ms=round((time.perf_counter() - started) * 1000, 1)
+        )
+
+    async def _store(self, results: List[EnrollmentResult]):
+        """One UPDATE per batch for every host that gave a definitive answer"""
+        rows = [
+            (result.enrolled, result.verified_at.isoformat(), result.machine_id)
+            for result in results if result.error is None
+        ]
+        if not rows:
+            return
+        async with get_db().write() as conn:
+            await conn.executemany(
+                "UPDATE machines SET enrolled = ?, enrollment_verified_at = ? WHERE id = ?",
+                rows
+            )
+        self._rows_written += len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "cache_entries": len(self._cache),
+            "cache_hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            "checks": self._checks,
+            "timeouts": self._timeouts,
+            "errors": self._errors,
+            "in_flight": len(self._inflight),
+            "batches": self._batches,
+            "rows_written": self._rows_written,
+        }
+
+
+def _failure(machine_id: str, error: str, started: Optional[float] = None) -> EnrollmentResult:
+    return EnrollmentResult(
+        machine_id=machine_id,
+        enrolled=False,
+        client_id_found=False,
+        client_id_matches=False,
+        verified_at=datetime.utcnow(),
+        error=error,
+        duration_ms=round((time.perf_counter() - started) * 1000, 1) if started is not None else 0.0
+    )
+
+
+def _as_cached(result: EnrollmentResult) -> EnrollmentResult:
+    return EnrollmentResult(**{**result.__dict__, "cached": True})
+
+
+_verifier: Optional[EnrollmentBatchVerifier] = None
+
+
+def init_enrollment_batch(pool: SSHConnectionPool, **kwargs) -> EnrollmentBatchVerifier:
+    """Create the shared batch verifier"""
+    global _verifier
+    _verifier = EnrollmentBatchVerifier(pool, **kwargs)
+    return _verifier
+
+
+def get_enrollment_batch() -> EnrollmentBatchVerifier:
+    """Get the shared batch verifier"""
+    if _verifier is None:
+        raise RuntimeError("Enrollment batch verifier not initialized, call init_enrollment_batch() first")
+    return _verifier
@@ -0,0 +1,339 @@
+"""
+LinkOps - Operation Event Bus
+Per-operation in-memory event logs with sequence numbers, shared by every SSE subscriber
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_RETENTION = 10000               # events kept per operation
+DEFAULT_RETENTION_BYTES = 8 * 1024 * 1024
+DEFAULT_LINGER = 300.0                  # seconds a finished operation stays replayable
+DEFAULT_IDLE_EXPIRY = 1800.0            # seconds a live log may go without events before it is dropped
+DEFAULT_MAX_LAG = 2000                  # events a subscriber may fall behind before the lag policy applies
+HEARTBEAT_INTERVAL = 15.0
+MAX_BATCH_BYTES = 64 * 1024             # frames written to a client per wakeup
+RETRY_MS = 3000
+REAP_INTERVAL = 10.0
+
+# Event types (the stream closes after OPERATION_COMPLETE)
+SCRIPT_START = "script_start"
+OUTPUT = "output"
+SCRIPT_COMPLETE = "script_complete"
+OPERATION_COMPLETE = "operation_complete"
+
+# What happens to a subscriber that falls more than max_lag events behind
+LAG_SAMPLE = "sample"   # skip output events until caught up, keep lifecycle events
+LAG_DROP = "drop"       # end the stream; the browser reconnects with Last-Event-ID
+LAG_POLICIES = (LAG_SAMPLE, LAG_DROP)
+
+# Only output events are skipped when sampling
+SAMPLED_TYPES = frozenset({OUTPUT})
+
+
+class Event(NamedTuple):
+    """One published event with its SSE frame encoded once for all subscribers"""
+    seq: int
+    type: str
+    frame: bytes
+
+
+def sse_frame(event_type: str, data: Dict[str, Any], seq: Optional[int] = None) -> bytes:
+    """Encode one Server-Sent Events frame (json.dumps keeps data on one line)"""
+    lines = [] if seq is None else [f"id: {seq}"]
+    lines += [f"event: {event_type}", f"data: {json.dumps(data, separators=(',', ':'), default=str)}"]
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class OperationEventLog:
+    """
+    Bounded, append-only event log of one operation
+
+    Events get consecutive sequence numbers starting at 1. The oldest are
+    evicted once the log holds more than retention events or
+    retention_bytes of encoded frames, so memory per operation is fixed
+    no matter how many subscribers there are or how slow they read.
+    Subscribers keep only a cursor (the next seq they want).
+
+    A log that is dropped before it completes is marked expired, which
+    wakes its subscribers so their streams end.
+    """
+
+    def __init__(self, operation_id: str, retention: int = DEFAULT_RETENTION,
+                 retention_bytes: int = DEFAULT_RETENTION_BYTES):
+        self.operation_id = operation_id
+        self.retention = max(retention, 1)
+        self.retention_bytes = retention_bytes
+        self._events: List[Event] = []
+        self._head = 0                  # index of the oldest retained event
+        self._bytes = 0
+        self.next_seq = 1
+        self.evicted = 0
+        self.completed_at: Optional[float] = None
+        self.last_activity = time.monotonic()
+        self.expired = False
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def first_seq(self) -> int:
+        """Oldest replayable seq (next_seq when the log is empty)"""
+        return self._events[self._head].seq if self._head < len(self._events) else self.next_seq
+
+    @property
+    def completed(self) -> bool:
+        return self.completed_at is not None
+
+    def __len__(self) -> int:
+        return len(self._events) - self._head
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        """Append an event and wake subscribers; never blocks"""
+        if self.completed:
+            raise RuntimeError(f"Operation {self.operation_id} already completed")
+        seq = self.next_seq
+        self.next_seq += 1
+        event = Event(seq, event_type, sse_frame(event_type, data, seq))
+        self._events.append(event)
+        self._bytes += len(event.frame)
+
+        while len(self) > 1 and (len(self) > self.retention or self._bytes > self.retention_bytes):
+            self._bytes -= len(self._events[self._head].frame)
+            self._events[self._head] = None
+            self._head += 1
+            self.evicted += 1
+        if self._head > 1024 and self._head * 2 > len(self._events):
+            del self._events[:self._head]
+            self._head = 0
+
+        self.last_activity = time.monotonic()
+        if event_type == OPERATION_COMPLETE:
+            self.completed_at = self.last_activity
+        self._wake()
+        return seq
+
+    def expire(self):
+        """Mark the log abandoned and wake subscribers so their streams end"""
+        self.expired = True
+        self._wake()
+
+    def _wake(self):
+        # Swap the event so waiters from this round wake once and later waiters block again
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def read(self, cursor: int, max_bytes: int = MAX_BATCH_BYTES,
+             skip: frozenset = frozenset()) -> Tuple[List[Event], int, int]:
+        """
+        Events from cursor on, up to max_bytes (always at least one)
+
+        Returns:
+            (events, next cursor, number of events skipped by type)
+        """
+        start = self._head + max(cursor - self.first_seq, 0)
+        batch, size, skipped = [], 0, 0
+        cursor = max(cursor, self.first_seq)
+        for index in range(start, len(self._events)):
+            event = self._events[index]
+            if event.type in skip:
+                skipped += 1
+                cursor = event.seq + 1
+                continue
+            if batch and size + len(event.frame) > max_bytes:
+                break
+            batch.append(event)
+            size += len(event.frame)
+            cursor = event.seq + 1
+        return batch, cursor, skipped
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for the next publish; False on timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+
+class EventBus:
+    """
+    Event logs of running and recently finished operations
+
+    The orchestrator publishes each event once; every browser watching the
+    operation reads the same encoded frames from the shared log at its own
+    cursor. Reconnecting clients resume from Last-Event-ID straight from
+    memory. A client that falls behind the retained window gets a gap event
+    and continues from the oldest retained event; one that lags more than
+    max_lag events is sampled (output skipped, lifecycle events kept) or
+    dropped, depending on lag_policy. Finished operations stay replayable
+    for linger seconds.
+
+    A live log that gets no event for idle_expiry seconds is dropped too,
+    subscribers or not: its operation row was probably left queued or
+    running by a crash, and nothing will ever complete it. Its streams end,
+    so browsers reconnect and the endpoint decides again from the
+    operation's status in the database.
+    """
+
+    def __init__(self, retention: int = DEFAULT_RETENTION, retention_bytes: int = DEFAULT_RETENTION_BYTES,
+                 linger: float = DEFAULT_LINGER, max_lag: int = DEFAULT_MAX_LAG, lag_policy: str = LAG_SAMPLE,
+                 idle_expiry: float = DEFAULT_IDLE_EXPIRY):
+        if lag_policy not in LAG_POLICIES:
+            raise ValueError(f"lag_policy must be one of {', '.join(LAG_POLICIES)}")
+        self.retention = retention
+        self.retention_bytes = retention_bytes
+        self.linger = linger
+        self.max_lag = max_lag
+        self.lag_policy = lag_policy
+        self.idle_expiry = idle_expiry
+        self._logs: Dict[str, OperationEventLog] = {}
+        self._last_reap = 0.0
+        self._published = 0
+        self._delivered = 0
+        self._streams = 0
+        self._resumed = 0
+        self._gaps = 0
+        self._sampled = 0
+        self._dropped = 0
+        self._expired = 0
+
+    def _reap(self):
+        now = time.monotonic()
+        if now - self._last_reap < REAP_INTERVAL:
+            return
+        self._last_reap = now
+        finished = [
+            operation_id for operation_id, log in self._logs.items()
+            if log.completed and now - log.completed_at > self.linger and not log.subscribers
+        ]
+        for operation_id in finished:
+            del self._logs[operation_id]
+        idle = [
+            operation_id for operation_id, log in self._logs.items()
+            if not log.completed and now - log.last_activity > self.idle_expiry
+        ]
+        for operation_id in idle:
+            self._logs.pop(operation_id).expire()
+            self._expired += 1
+
+    def open(self, operation_id: str) -> OperationEventLog:
+        """
+        Event log of an operation, created on first use
+
+        Call this when the operation is created, so viewers that connect
+        before its first event find the log and wait on it.
+        """
+        self._reap()
+        log = self._logs.get(operation_id)
+        if log is None:
+            log = OperationEventLog(operation_id, self.retention, self.retention_bytes)
+            self._logs[operation_id] = log
+        return log
+
+    def get(self, operation_id: str) -> Optional[OperationEventLog]:
+        self._reap()
+        return self._logs.get(operation_id)
+
+    def publish(self, operation_id: str, event_type: str, data: Dict[str, Any]) -> int:
+        """Publish one event; returns its sequence number"""
+        self._published += 1
+        return self.open(operation_id).publish(event_type, data)
+
+    def complete(self, operation_id: str, data: Dict[str, Any]) -> int:
+        """Publish the final event; subscribers' streams end after it"""
+        return self.publish(operation_id, OPERATION_COMPLETE, data)
+
+    async def stream(self, log: OperationEventLog, last_event_id: Optional[int] = None,
+                     heartbeat: float = HEARTBEAT_INTERVAL) -> AsyncIterator[bytes]:
+        """
+        SSE byte stream for one subscriber
+
+        Args:
+            log: Event log of the operation
+            last_event_id: Last seq the client saw (Last-Event-ID); None replays what is retained
+        """
+        if last_event_id is not None and 0 <= last_event_id < log.next_seq:
+            cursor = last_event_id + 1
+            self._resumed += 1
+        else:
+            # New subscriber, or an id from before a restart: replay from the start of the log
+            cursor = 1
+
+        log.subscribers += 1
+        self._streams += 1
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            while True:
+                if cursor < log.first_seq:
+                    missed = log.first_seq - cursor
+                    self._gaps += 1
+                    yield sse_frame("gap", {"missed": missed, "resumeFrom": log.first_seq})
+                    cursor = log.first_seq
+
+                # Lag only matters while the operation is live; a finished log is replayed in full
+                skip = frozenset()
+                if not log.completed and log.next_seq - cursor > self.max_lag:
+                    if self.lag_policy == LAG_DROP:
+                        self._dropped += 1
+                        yield sse_frame("lagged", {"behind": log.next_seq - cursor, "resumeFrom": cursor})
+                        return
+                    skip = SAMPLED_TYPES
+
+                batch, cursor, skipped = log.read(cursor, skip=skip)
+                self._sampled += skipped
+                if batch:
+                    self._delivered += len(batch)
+                    yield b"".join(event.frame for event in batch)
+                    if batch[-1].type == OPERATION_COMPLETE:
+                        return
+                    continue
+                if skipped:
+                    continue
+                if log.completed or log.expired:
+                    return
+                if not await log.wait(heartbeat):
+                    self._reap()
+                    if log.expired:
+                        return
+                    yield b": ping\n\n"
+        finally:
+            log.subscribers -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "operations": len(self._logs),
+            "subscribers": sum(log.subscribers for log in self._logs.values()),
+            "retained_events": sum(len(log) for log in self._logs.values()),
+            "retained_bytes": sum(log.bytes for log in self._logs.values()),
+            "published": self._published,
+            "delivered": self._delivered,
+            "streams": self._streams,
+            "resumed": self._resumed,
+            "gaps": self._gaps,
+            "sampled": self._sampled,
+            "dropped": self._dropped,
+            "expired": self._expired,
+        }
+
+
+_bus: Optional[EventBus] = None
+
+
+def init_event_bus(**kwargs) -> EventBus:
+    """Create the shared event bus"""
+    global _bus
+    _bus = EventBus(**kwargs)
+    return _bus
+
+
+def get_event_bus() -> EventBus:
+    """Get the shared event bus"""
+    if _bus is None:
+        raise RuntimeError("Event bus not initialized, call init_event_bus() first")
+    return _bus
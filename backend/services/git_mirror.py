@@ -0,0 +1,270 @@
+"""
+LinkOps - Git Mirror
+Shallow, blob-filtered, sparse checkout of the config repository with scheduled gc
+"""
+
+import asyncio
+import os
+import shlex
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+# Everything the sync reads; top-level files (links.yaml, scripts.yaml) are always
+# part of a cone-mode sparse checkout, so only directories are listed
+SPARSE_DIRECTORIES = ("links.d", "scripts", "scripts.d")
+
+# Mirror-local settings: no reflogs or automatic gc keeping superseded commits alive
+MIRROR_CONFIG = {
+    "core.logAllRefUpdates": "false",
+    "gc.auto": "0",
+    "maintenance.auto": "false",
+    "fetch.writeCommitGraph": "false",
+}
+
+DEFAULT_GC_INTERVAL_HOURS = 24
+GC_FETCH_THRESHOLD = 200     # repack earlier if this many fetches brought new commits
+LOCAL_TIMEOUT = 30.0
+NETWORK_TIMEOUT = 120.0      # clone / fetch
+FETCH_HISTORY = 20
+
+
+class GitMirrorError(Exception):
+    """A git command on the mirror failed"""
+
+
+@dataclass
+class MirrorSyncResult:
+    """Outcome of one fetch"""
+    success: bool
+    commit_hash: Optional[str]
+    previous_hash: Optional[str]
+    timestamp: datetime
+    fetch_ms: float = 0.0
+    cloned: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return self.commit_hash != self.previous_hash
+
+
+class GitMirror:
+    """
+    Keeps only the current commit of the tracked branch on disk
+
+    Clones and fetches use --depth 1 and --filter=blob:none, and the
+    working tree is a cone-mode sparse checkout of the inventory and script
+    paths, so fetch time and disk use depend on the size of the current
+    inventory rather than on how much history the repository has. Superseded
+    commits are dropped by a scheduled gc instead of git's automatic one.
+    """
+
+    def __init__(self, repo_url: str, branch: str, repo_path: str,
+                 ssh_key_path: Optional[str] = None,
+                 gc_interval_hours: float = DEFAULT_GC_INTERVAL_HOURS):
+        self.repo_url = repo_url
+        self.branch = branch
+        self.repo_path = repo_path
+        self.gc_interval = gc_interval_hours * 3600
+        self._env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        if ssh_key_path and os.path.exists(ssh_key_path):
+            self._env["GIT_SSH_COMMAND"] = (
+                f"ssh -i {shlex.quote(ssh_key_path)} -o IdentitiesOnly=yes -o BatchMode=yes"
+            )
+        self._lock = asyncio.Lock()
+        self._fetches: Deque[float] = deque(maxlen=FETCH_HISTORY)
+        self._fetch_count = 0
+        self._fetches_since_gc = 0
+        self._failures = 0
+        self._last_gc: Optional[float] = None
+        self._last_gc_ms: Optional[float] = None
+        self._gc_runs = 0
+        self._head: Optional[str] = None
+        self._disk: Dict[str, int] = {}
+
+    async def _git(self, *args: str, cwd: bool = True, timeout: float = LOCAL_TIMEOUT) -> str:
+        command = ["git", "-C", self.repo_path, *args] if cwd else ["git", *args]
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self._env
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise GitMirrorError(f"git {args[0]} timed out after {timeout:.0f}s")
+        if process.returncode != 0:
+            raise GitMirrorError(f"git {args[0]} failed: {stderr.decode().strip()}")
+        return stdout.decode().strip()
+
+    def _is_repository(self) -> bool:
+        return os.path.isdir(os.path.join(self.repo_path, ".git"))
+
+    async def _clone(self):
+        parent = os.path.dirname(os.path.abspath(self.repo_path))
+        os.makedirs(parent, exist_ok=True)
+        await self._git(
+            "clone", "--depth", "1", "--filter=blob:none", "--no-checkout",
+            "--single-branch", "--branch", self.branch, self.repo_url, self.repo_path,
+            cwd=False, timeout=NETWORK_TIMEOUT
+        )
+        await self._configure()
+        await self._git("checkout", "-B", self.branch, f"origin/{self.branch}")
+
+    async def _configure(self):
+        """Apply mirror settings; also converts an existing full clone in place"""
+        for key, value in MIRROR_CONFIG.items():
+            await self._git("config", key, value)
+        await self._git("config", "remote.origin.url", self.repo_url)
+        await self._git("config", "remote.origin.promisor", "true")
+        await self._git("config", "remote.origin.partialclonefilter", "blob:none")
+        await self._git(
+            "config", "remote.origin.fetch",
+            f"+refs/heads/{self.branch}:refs/remotes/origin/{self.branch}"
+        )
+        await self._git("sparse-checkout", "set", "--cone", *SPARSE_DIRECTORIES)
+
+    async def _needs_configure(self) -> bool:
+        try:
+            return await self._git("config", "remote.origin.partialclonefilter") != "blob:none"
+        except GitMirrorError:
+            return True  # key not set
+
+    async def sync(self) -> MirrorSyncResult:
+        """
+        Clone on first use, otherwise fetch the branch tip and check it out
+
+        Raises:
+            GitMirrorError: If a git command fails
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                cloned = not self._is_repository()
+                previous = None
+                if cloned:
+                    await self._clone()
+                else:
+                    if await self._needs_configure():
+                        await self._configure()
+                    previous = await self._git("rev-parse", "--verify", "-q", "HEAD")
+                    await self._git(
+                        "fetch", "--depth", "1", "--filter=blob:none", "--no-tags", "--prune",
+                        "origin", timeout=NETWORK_TIMEOUT
+                    )
+                    await self._git("reset", "--hard", "-q", f"origin/{self.branch}")
+                head = await self._git("rev-parse", "HEAD")
+            except GitMirrorError:
+                self._failures += 1
+                raise
+
+            fetch_ms = round((time.perf_counter() - started) * 1000, 1)
+            await self._measure()
+            self._fetches.append(fetch_ms)
+            self._fetch_count += 1
+            if head != previous:
+                self._fetches_since_gc += 1
+            self._head = head
+            if self._last_gc is None and cloned:
+                self._last_gc = time.monotonic()  # a fresh clone is already packed
+            return MirrorSyncResult(
+                success=True, commit_hash=head, previous_hash=previous,
+                timestamp=datetime.utcnow(), fetch_ms=fetch_ms, cloned=cloned
+            )
+
+    def gc_due(self) -> bool:
+        if self._fetches_since_gc >= GC_FETCH_THRESHOLD:
+            return True
+        return self._last_gc is None or time.monotonic() - self._last_gc >= self.gc_interval
+
+    async def maybe_gc(self) -> bool:
+        """Run gc if the interval elapsed or enough new commits were fetched"""
+        if not self._is_repository() or not self.gc_due():
+            return False
+        await self.gc()
+        return True
+
+    async def gc(self):
+        """Drop everything but the current shallow tip and repack it"""
+        async with self._lock:
+            started = time.perf_counter()
+            await self._git("reflog", "expire", "--expire=now", "--all")
+            await self._git("gc", "--prune=now", "--quiet", timeout=NETWORK_TIMEOUT)
+            self._last_gc = time.monotonic()
+            self._last_gc_ms = round((time.perf_counter() - started) * 1000, 1)
+            self._fetches_since_gc = 0
+            self._gc_runs += 1
+            await self._measure()
+
+    async def _measure(self):
+        """Object store size from git, working tree size from the (sparse) checkout"""
+        counts: Dict[str, int] = {}
+        for line in (await self._git("count-objects", "-v")).splitlines():
+            key, _, value = line.partition(":")
+            if value.strip().isdigit():
+                counts[key.strip()] = int(value)
+        worktree = await asyncio.to_thread(_tree_size, self.repo_path)
+        objects = (counts.get("size", 0) + counts.get("size-pack", 0)) * 1024
+        self._disk = {
+            "objects_bytes": objects,
+            "worktree_bytes": worktree,
+            "total_bytes": objects + worktree,
+            "loose_objects": counts.get("count", 0),
+            "packs": counts.get("packs", 0),
+        }
+
+    async def disk_usage(self) -> Dict[str, int]:
+        """Refresh and return on-disk size"""
+        if self._is_repository():
+            async with self._lock:
+                await self._measure()
+        return dict(self._disk)
+
+    def stats(self) -> Dict[str, Any]:
+        """Fetch timings, gc schedule and the last measured disk size"""
+        fetches: List[float] = list(self._fetches)
+        return {
+            "head": self._head,
+            "fetches": self._fetch_count,
+            "failures": self._failures,
+            "last_fetch_ms": fetches[-1] if fetches else None,
+            "avg_fetch_ms": round(sum(fetches) / len(fetches), 1) if fetches else None,
+            "gc_runs": self._gc_runs,
+            "last_gc_ms": self._last_gc_ms,
+            "fetches_since_gc": self._fetches_since_gc,
+            "disk": dict(self._disk),
+        }
+
+
+def _tree_size(root: str) -> int:
+    """Bytes under root, excluding .git"""
+    total = 0
+    for directory, subdirectories, files in os.walk(root):
+        if directory == root and ".git" in subdirectories:
+            subdirectories.remove(".git")
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+_mirror: Optional[GitMirror] = None
+
+
+def init_git_mirror(repo_url: str, branch: str, repo_path: str, **kwargs) -> GitMirror:
+    """Create the shared mirror"""
+    global _mirror
+    _mirror = GitMirror(repo_url, branch, repo_path, **kwargs)
+    return _mirror
+
+
+def get_git_mirror() -> Optional[GitMirror]:
+    """Shared mirror, or None when the full-clone sync mode is configured"""
+    return _mirror
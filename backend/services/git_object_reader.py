@@ -0,0 +1,209 @@
+"""
+LinkOps - Git Object Reader
+Long-lived git cat-file --batch / --batch-check channels for reading trees and blobs by object id
+"""
+
+import asyncio
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+READ_TIMEOUT = 30.0
+
+# Tree entry modes
+MODE_TREE = b"40000"
+MODE_SUBMODULE = b"160000"
+
+
+_reaping: Set[asyncio.Task] = set()
+
+
+class GitObjectError(Exception):
+    """An object could not be read from the repository"""
+
+
+class ObjectInfo(NamedTuple):
+    oid: str
+    type: str
+    size: int
+
+
+class TreeEntry(NamedTuple):
+    mode: str
+    type: str
+    oid: str
+    name: str
+
+
+def parse_tree(data: bytes, oid_bytes: int = 20) -> List[TreeEntry]:
+    """Raw tree object -> entries ("<mode> <name>\\0<binary oid>" repeated)"""
+    entries = []
+    position = 0
+    while position < len(data):
+        space = data.index(b" ", position)
+        nul = data.index(b"\0", space)
+        mode = data[position:space]
+        oid = data[nul + 1:nul + 1 + oid_bytes].hex()
+        if mode == MODE_TREE:
+            object_type = "tree"
+        elif mode == MODE_SUBMODULE:
+            object_type = "commit"
+        else:
+            object_type = "blob"
+        entries.append(TreeEntry(mode.decode(), object_type, oid, data[space + 1:nul].decode("utf-8", "surrogateescape")))
+        position = nul + 1 + oid_bytes
+    return entries
+
+
+class _Channel:
+    """One cat-file process; requests are answered strictly in order"""
+
+    def __init__(self, repo_path: str, mode: str):
+        self.repo_path = repo_path
+        self.mode = mode
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.lock = asyncio.Lock()
+        self.starts = 0
+
+    async def ensure(self) -> asyncio.subprocess.Process:
+        if self.process is None or self.process.returncode is not None:
+            self.process = await asyncio.create_subprocess_exec(
+                "git", "-C", self.repo_path, "cat-file", self.mode,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            self.starts += 1
+        return self.process
+
+    def kill(self):
+        process, self.process = self.process, None
+        if process is None:
+            return
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        try:
+            task = asyncio.get_running_loop().create_task(_reap(process))
+        except RuntimeError:
+            return  # no loop left to reap on (interpreter shutdown)
+        _reaping.add(task)  # the loop only keeps weak references to tasks
+        task.add_done_callback(_reaping.discard)
+
+
+async def _reap(process: asyncio.subprocess.Process):
+    """Drain what a killed process left on stdout so its pipes close, then wait for it"""
+    try:
+        while await process.stdout.read(65536):
+            pass
+        await process.wait()
+    except Exception:
+        pass
+
+
+class GitObjectReader:
+    """
+    Reads objects through two persistent cat-file processes
+
+    --batch-check answers "what is this name" (id, type, size) and --batch
+    returns contents. Names can be object ids or anything rev-parse accepts
+    ("HEAD", "<commit>:links.yaml"). If a process dies or a read times out,
+    it is killed, restarted on the next request, and the request is retried
+    once, so a repository rewritten under the reader (fetch, gc, re-clone)
+    never leaves the sync stuck. A request that is cancelled or fails any
+    other way mid-exchange also kills its process, so a half-read response
+    is never taken as the answer to the next request.
+    """
+
+    def __init__(self, repo_path: str, timeout: float = READ_TIMEOUT):
+        self.repo_path = repo_path
+        self.timeout = timeout
+        self._check = _Channel(repo_path, "--batch-check")
+        self._batch = _Channel(repo_path, "--batch")
+        self._requests = 0
+        self._bytes_read = 0
+
+    async def _request(self, channel: _Channel, name: str) -> Tuple[Optional[ObjectInfo], bytes]:
+        if not name or "\n" in name:
+            raise GitObjectError(f"Invalid object name: {name!r}")
+
+        async with channel.lock:
+            for attempt in (1, 2):
+                process = await channel.ensure()
+                try:
+                    return await asyncio.wait_for(self._exchange(channel, process, name), self.timeout)
+                except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError,
+                        asyncio.IncompleteReadError) as e:
+                    # Stream position is unknown now; only a fresh process is safe
+                    channel.kill()
+                    if attempt == 2:
+                        raise GitObjectError(f"git cat-file {channel.mode} failed for {name}: {e!r}")
+                except BaseException:
+                    # Cancelled or failed mid-response: the rest of it is still on the pipe
+                    channel.kill()
+                    raise
+
+    async def _exchange(self, channel: _Channel, process, name: str) -> Tuple[Optional[ObjectInfo], bytes]:
+        process.stdin.write(name.encode() + b"\n")
+        await process.stdin.drain()
+        header = await process.stdout.readline()
+        if not header:
+            raise ConnectionResetError("cat-file exited")
+        self._requests += 1
+
+        fields = header.split()
+        if len(fields) != 3:
+            # "<name> missing" / "<name> ambiguous"
+            return None, b""
+        info = ObjectInfo(fields[0].decode(), fields[1].decode(), int(fields[2]))
+        if channel is self._check:
+            return info, b""
+
+        data = await process.stdout.readexactly(info.size + 1)
+        self._bytes_read += info.size
+        return info, data[:-1]
+
+    async def info(self, name: str) -> Optional[ObjectInfo]:
+        """Object id, type and size, or None if the name does not resolve"""
+        info, _ = await self._request(self._check, name)
+        return info
+
+    async def read(self, name: str) -> Tuple[ObjectInfo, bytes]:
+        """
+        Object info and contents
+
+        Raises:
+            GitObjectError: If the name does not resolve
+        """
+        info, data = await self._request(self._batch, name)
+        if info is None:
+            raise GitObjectError(f"Object not found: {name}")
+        return info, data
+
+    async def read_blob(self, name: str) -> bytes:
+        info, data = await self.read(name)
+        if info.type != "blob":
+            raise GitObjectError(f"{name} is a {info.type}, not a blob")
+        return data
+
+    async def read_tree(self, name: str) -> List[TreeEntry]:
+        """Entries of a tree; a commit name reads the commit's root tree"""
+        info, data = await self.read(name)
+        if info.type == "commit":
+            # First header line of a commit is "tree <oid>"
+            info, data = await self.read(data.split(b"\n", 1)[0].split()[1].decode())
+        if info.type != "tree":
+            raise GitObjectError(f"{name} is a {info.type}, not a tree")
+        return parse_tree(data, len(info.oid) // 2)
+
+    def close(self):
+        """Stop both cat-file processes"""
+        self._check.kill()
+        self._batch.kill()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self._requests,
+            "bytes_read": self._bytes_read,
+            "process_starts": self._check.starts + self._batch.starts,
+        }
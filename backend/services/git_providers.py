@@ -3,9 +3,16 @@ LinkOps - Git Provider Services
 Handles integration with GitHub, GitLab, Gitea, and Forgejo
 """
 
+import asyncio
+import base64
+import importlib.util
+import time
 import httpx
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from urllib.parse import quote
+from typing import Dict, Any, Optional, Tuple
 from enum import Enum
+from services.rate_limiter import get_host_scheduler
 
 
 class GitProvider(str, Enum):
@@ -15,13 +22,164 @@ class GitProvider(str, Enum):
     FORGEJO = "forgejo"
 
 
+# Connection pool limits for each (provider, base_url) client
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+PROJECT_ID_CACHE_SIZE = 256  # GitLab project IDs remembered per endpoint
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (httpx[http2])"""
+    return importlib.util.find_spec("h2") is not None
+
+
+class ProviderHTTPPool:
+    """
+    Shared keep-alive HTTP clients, one per (provider, base_url)
+    
+    Provider API clients are created per request because they carry the
+    caller's token, but they all borrow the same underlying connection
+    pool so consecutive calls reuse TCP+TLS connections. Lookups worth
+    keeping across requests (GitLab project IDs) live here too, in a
+    bounded LRU per endpoint.
+    """
+    
+    def __init__(self, limits: httpx.Limits = HTTP_LIMITS, timeout: httpx.Timeout = HTTP_TIMEOUT,
+                 project_id_cache_size: int = PROJECT_ID_CACHE_SIZE):
+        self.limits = limits
+        self.timeout = timeout
+        self.http2 = http2_available()
+        self.project_id_cache_size = project_id_cache_size
+        self._clients: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+        # (provider, base_url) -> project path_with_namespace -> project ID
+        self._project_ids: Dict[Tuple[str, str], "OrderedDict[str, int]"] = {}
+    
+    def get_client(self, provider: str, base_url: str) -> httpx.AsyncClient:
+        """Get (or create) the pooled client for a provider endpoint"""
+        key = (provider, base_url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2
+            )
+            self._clients[key] = client
+        return client
+    
+    def get_project_id(self, provider: str, base_url: str, path: str) -> Optional[int]:
+        """Cached project ID for a namespace/path, or None"""
+        cache = self._project_ids.get((provider, base_url))
+        if cache is None or path not in cache:
+            return None
+        cache.move_to_end(path)
+        return cache[path]
+    
+    def set_project_id(self, provider: str, base_url: str, path: str, project_id: int):
+        """Remember a project ID, evicting the least recently used past the size bound"""
+        cache = self._project_ids.setdefault((provider, base_url), OrderedDict())
+        cache[path] = project_id
+        cache.move_to_end(path)
+        while len(cache) > self.project_id_cache_size:
+            cache.popitem(last=False)
+    
+    def forget_project_id(self, provider: str, base_url: str, path: str):
+        cache = self._project_ids.get((provider, base_url))
+        if cache is not None:
+            cache.pop(path, None)
+    
+    def record(self, provider: str, base_url: str, elapsed_ms: float, error: bool = False):
+        """Record the latency of one request"""
+        stats = self._stats.setdefault((provider, base_url), {
+            "requests": 0,
+            "errors": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0
+        })
+        stats["requests"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if error:
+            stats["errors"] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-endpoint request timing metrics"""
+        endpoints = {}
+        for (provider, base_url), stats in self._stats.items():
+            requests = stats["requests"]
+            endpoints[f"{provider} {base_url}"] = {
+                "requests": requests,
+                "errors": stats["errors"],
+                "avg_ms": round(stats["total_ms"] / requests, 1) if requests else 0.0,
+                "max_ms": round(stats["max_ms"], 1),
+                "open": (provider, base_url) in self._clients,
+                "project_ids": len(self._project_ids.get((provider, base_url), ()))
+            }
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "endpoints": endpoints
+        }
+    
+    async def close(self):
+        """Close every pooled client"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+_http_pool: Optional[ProviderHTTPPool] = None
+
+
+def get_http_pool() -> ProviderHTTPPool:
+    """Get the shared provider HTTP pool"""
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = ProviderHTTPPool()
+    return _http_pool
+
+
+def init_http_pool(limits: httpx.Limits = HTTP_LIMITS, timeout: httpx.Timeout = HTTP_TIMEOUT):
+    """Create the shared provider HTTP pool (app startup)"""
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = ProviderHTTPPool(limits=limits, timeout=timeout)
+
+
+async def close_http_pool():
+    """Close the shared provider HTTP pool (app shutdown)"""
+    global _http_pool
+    if _http_pool is not None:
+        await _http_pool.close()
+        _http_pool = None
+
+
 class GitProviderClient:
     """Base class for Git provider API clients"""
     
-    def __init__(self, base_url: str, token: str):
+    provider: str = ""
+    
+    def __init__(self, base_url: str, token: str, http: Optional[httpx.AsyncClient] = None):
         self.base_url = base_url.rstrip('/')
         self.token = token
         self.headers = self._get_headers()
+        self.http = http or get_http_pool().get_client(self.provider, self.base_url)
+    
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request over the shared connection pool, paced by the host's rate limits"""
+        started = time.perf_counter()
+        try:
+            response = await get_host_scheduler(url).send(
+                self.http, method, url, headers=self.headers, **kwargs
+            )
+        except httpx.HTTPError:
+            get_http_pool().record(self.provider, self.base_url, (time.perf_counter() - started) * 1000, error=True)
+            raise
+        get_http_pool().record(self.provider, self.base_url, (time.perf_counter() - started) * 1000)
+        return response
     
     def _get_headers(self) -> Dict[str, str]:
         """Get authentication headers"""
@@ -38,11 +196,18 @@ class GitProviderClient:
     async def create_file(self, owner: str, repo_name: str, file_path: str, content: str, message: str) -> bool:
         """Create a file in the repository"""
         raise NotImplementedError
+    
+    async def commit_files(self, owner: str, repo_name: str, files: Dict[str, str], message: str,
+                           branch: str = "main") -> bool:
+        """Create several files (path -> content) in a single commit"""
+        raise NotImplementedError
 
 
 class GitHubClient(GitProviderClient):
     """GitHub API client"""
     
+    provider = "github"
+    
     def _get_headers(self) -> Dict[str, str]:
         return {
             "Authorization": f"token {self.token}",
@@ -51,91 +216,152 @@ class GitHubClient(GitProviderClient):
     
     async def test_connection(self) -> Dict[str, Any]:
         """Test GitHub connection"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/user",
-                headers=self.headers,
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "username": data.get("login"),
-                    "email": data.get("email"),
-                    "name": data.get("name")
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Authentication failed: {response.status_code}"
-                }
+        response = await self._request(
+            "GET",
+            f"{self.base_url}/user"
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "success": True,
+                "username": data.get("login"),
+                "email": data.get("email"),
+                "name": data.get("name")
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"Authentication failed: {response.status_code}"
+            }
     
     async def create_repository(self, owner: str, repo_name: str, private: bool = True) -> Dict[str, Any]:
         """Create GitHub repository"""
-        async with httpx.AsyncClient() as client:
-            # Check if repo exists
-            check_response = await client.get(
-                f"{self.base_url}/repos/{owner}/{repo_name}",
-                headers=self.headers,
-                timeout=10.0
-            )
-            
-            if check_response.status_code == 200:
-                return {
-                    "success": False,
-                    "error": f"Repository {owner}/{repo_name} already exists"
-                }
-            
-            # Create repository
-            response = await client.post(
-                f"{self.base_url}/user/repos",
-                headers=self.headers,
-                json={
-                    "name": repo_name,
-                    "description": "LinkOps configuration repository",
-                    "private": private,
-                    "auto_init": True
-                },
-                timeout=10.0
-            )
-            
-            if response.status_code == 201:
-                data = response.json()
-                return {
-                    "success": True,
-                    "repo_url": data.get("html_url"),
-                    "clone_url": data.get("clone_url"),
-                    "ssh_url": data.get("ssh_url")
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Failed to create repository: {response.text}"
-                }
+        # Check if repo exists
+        check_response = await self._request(
+            "GET",
+            f"{self.base_url}/repos/{owner}/{repo_name}"
+        )
+        
+        if check_response.status_code == 200:
+            return {
+                "success": False,
+                "error": f"Repository {owner}/{repo_name} already exists"
+            }
+        
+        # Create repository
+        response = await self._request(
+            "POST",
+            f"{self.base_url}/user/repos",
+            json={
+                "name": repo_name,
+                "description": "LinkOps configuration repository",
+                "private": private,
+                "auto_init": True
+            }
+        )
+        
+        if response.status_code == 201:
+            data = response.json()
+            return {
+                "success": True,
+                "repo_url": data.get("html_url"),
+                "clone_url": data.get("clone_url"),
+                "ssh_url": data.get("ssh_url"),
+                "default_branch": data.get("default_branch") or "main"
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"Failed to create repository: {response.text}"
+            }
     
     async def create_file(self, owner: str, repo_name: str, file_path: str, content: str, message: str) -> bool:
         """Create file in GitHub repository"""
-        import base64
+        response = await self._request(
+            "PUT",
+            f"{self.base_url}/repos/{owner}/{repo_name}/contents/{file_path}",
+            json={
+                "message": message,
+                "content": base64.b64encode(content.encode()).decode()
+            }
+        )
+        
+        return response.status_code == 201
+    
+    async def commit_files(self, owner: str, repo_name: str, files: Dict[str, str], message: str,
+                           branch: str = "main") -> bool:
+        """Create files in GitHub repository as one commit (Git data API)"""
+        repo_api = f"{self.base_url}/repos/{owner}/{repo_name}/git"
         
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                f"{self.base_url}/repos/{owner}/{repo_name}/contents/{file_path}",
-                headers=self.headers,
-                json={
-                    "message": message,
-                    "content": base64.b64encode(content.encode()).decode()
-                },
-                timeout=10.0
+        # Current branch head and its tree
+        ref_response = await self._request("GET", f"{repo_api}/ref/heads/{branch}")
+        if ref_response.status_code != 200:
+            return False
+        parent_sha = ref_response.json()["object"]["sha"]
+        
+        commit_response = await self._request("GET", f"{repo_api}/commits/{parent_sha}")
+        if commit_response.status_code != 200:
+            return False
+        base_tree = commit_response.json()["tree"]["sha"]
+        
+        # One blob per file (base64, so any content survives), created concurrently
+        blob_responses = await asyncio.gather(*(
+            self._request(
+                "POST",
+                f"{repo_api}/blobs",
+                json={"content": base64.b64encode(content.encode()).decode(), "encoding": "base64"}
             )
-            
-            return response.status_code == 201
+            for content in files.values()
+        ))
+        if any(response.status_code != 201 for response in blob_responses):
+            return False
+        
+        tree_response = await self._request(
+            "POST",
+            f"{repo_api}/trees",
+            json={
+                "base_tree": base_tree,
+                "tree": [
+                    {"path": path, "mode": "100644", "type": "blob", "sha": response.json()["sha"]}
+                    for path, response in zip(files, blob_responses)
+                ]
+            }
+        )
+        if tree_response.status_code != 201:
+            return False
+        
+        new_commit_response = await self._request(
+            "POST",
+            f"{repo_api}/commits",
+            json={
+                "message": message,
+                "tree": tree_response.json()["sha"],
+                "parents": [parent_sha]
+            }
+        )
+        if new_commit_response.status_code != 201:
+            return False
+        
+        update_response = await self._request(
+            "PATCH",
+            f"{repo_api}/refs/heads/{branch}",
+            json={"sha": new_commit_response.json()["sha"]}
+        )
+        return update_response.status_code == 200
 
 
 class GitLabClient(GitProviderClient):
     """GitLab API client"""
     
+    provider = "gitlab"
+    
+    def __init__(self, base_url: str, token: str, http: Optional[httpx.AsyncClient] = None):
+        super().__init__(base_url, token, http)
+        # "owner/repo" as requested -> path_with_namespace of projects this client created.
+        # GitLab creates projects in the token user's namespace, which need not be owner.
+        self._created_paths: Dict[str, str] = {}
+    
     def _get_headers(self) -> Dict[str, str]:
         return {
             "Authorization": f"Bearer {self.token}",
@@ -144,99 +370,156 @@ class GitLabClient(GitProviderClient):
     
     async def test_connection(self) -> Dict[str, Any]:
         """Test GitLab connection"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/v4/user",
-                headers=self.headers,
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "username": data.get("username"),
-                    "email": data.get("email"),
-                    "name": data.get("name")
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Authentication failed: {response.status_code}"
-                }
+        response = await self._request(
+            "GET",
+            f"{self.base_url}/api/v4/user"
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "success": True,
+                "username": data.get("username"),
+                "email": data.get("email"),
+                "name": data.get("name")
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"Authentication failed: {response.status_code}"
+            }
     
     async def create_repository(self, owner: str, repo_name: str, private: bool = True) -> Dict[str, Any]:
         """Create GitLab repository"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/v4/projects",
-                headers=self.headers,
-                json={
-                    "name": repo_name,
-                    "description": "LinkOps configuration repository",
-                    "visibility": "private" if private else "public",
-                    "initialize_with_readme": True
-                },
-                timeout=10.0
-            )
-            
-            if response.status_code == 201:
-                data = response.json()
-                return {
-                    "success": True,
-                    "repo_url": data.get("web_url"),
-                    "clone_url": data.get("http_url_to_repo"),
-                    "ssh_url": data.get("ssh_url_to_repo")
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Failed to create repository: {response.text}"
-                }
+        response = await self._request(
+            "POST",
+            f"{self.base_url}/api/v4/projects",
+            json={
+                "name": repo_name,
+                "path": repo_name,
+                "description": "LinkOps configuration repository",
+                "visibility": "private" if private else "public",
+                "initialize_with_readme": True
+            }
+        )
+        
+        if response.status_code == 201:
+            data = response.json()
+            # Remember the project ID so file writes skip the lookup
+            if data.get("id") and data.get("path_with_namespace"):
+                self._created_paths[f"{owner}/{repo_name}"] = data["path_with_namespace"]
+                get_http_pool().set_project_id(
+                    self.provider, self.base_url, data["path_with_namespace"], data["id"]
+                )
+            return {
+                "success": True,
+                "repo_url": data.get("web_url"),
+                "clone_url": data.get("http_url_to_repo"),
+                "ssh_url": data.get("ssh_url_to_repo"),
+                "default_branch": data.get("default_branch") or "main"
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"Failed to create repository: {response.text}"
+            }
     
-    async def create_file(self, owner: str, repo_name: str, file_path: str, content: str, message: str) -> bool:
-        """Create file in GitLab repository"""
-        # Get project ID first
-        async with httpx.AsyncClient() as client:
-            # Search for project
-            search_response = await client.get(
-                f"{self.base_url}/api/v4/projects",
-                headers=self.headers,
-                params={"search": repo_name},
-                timeout=10.0
-            )
-            
-            if search_response.status_code != 200:
-                return False
-            
-            projects = search_response.json()
-            project_id = None
-            for project in projects:
-                if project.get("path") == repo_name:
-                    project_id = project.get("id")
-                    break
-            
+    def _project_path(self, owner: str, repo_name: str) -> str:
+        path = f"{owner}/{repo_name}"
+        return self._created_paths.get(path, path)
+    
+    async def _get_project_id(self, owner: str, repo_name: str) -> Optional[int]:
+        """Resolve `owner/repo_name` to the numeric project ID (cached by path_with_namespace)"""
+        path = self._project_path(owner, repo_name)
+        pool = get_http_pool()
+        project_id = pool.get_project_id(self.provider, self.base_url, path)
+        if project_id:
+            return project_id
+        
+        # Direct lookup by URL-encoded namespace/path
+        response = await self._request(
+            "GET",
+            f"{self.base_url}/api/v4/projects/{quote(path, safe='')}"
+        )
+        
+        if response.status_code != 200:
+            return None
+        
+        data = response.json()
+        project_id = data.get("id")
+        if project_id:
+            # GitLab resolves redirects after a rename; cache under the canonical path
+            pool.set_project_id(self.provider, self.base_url, data.get("path_with_namespace") or path, project_id)
+        return project_id
+    
+    def invalidate_project_id(self, owner: str, repo_name: str):
+        """Forget a cached project ID (project renamed, moved or deleted)"""
+        get_http_pool().forget_project_id(self.provider, self.base_url, self._project_path(owner, repo_name))
+    
+    async def _project_request(self, owner: str, repo_name: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """
+        Send a request to /projects/{id}{path}
+        
+        A 404 may mean the cached ID is stale, so the ID is resolved again
+        and the request retried once.
+        """
+        for attempt in range(2):
+            project_id = await self._get_project_id(owner, repo_name)
             if not project_id:
-                return False
+                return None
             
-            # Create file
-            response = await client.post(
-                f"{self.base_url}/api/v4/projects/{project_id}/repository/files/{file_path}",
-                headers=self.headers,
-                json={
-                    "branch": "main",
-                    "content": content,
-                    "commit_message": message
-                },
-                timeout=10.0
+            response = await self._request(
+                method,
+                f"{self.base_url}/api/v4/projects/{project_id}{path}",
+                **kwargs
             )
-            
-            return response.status_code == 201
+            if response.status_code != 404 or attempt:
+                return response
+            self.invalidate_project_id(owner, repo_name)
+        return None
+    
+    async def create_file(self, owner: str, repo_name: str, file_path: str, content: str, message: str) -> bool:
+        """Create file in GitLab repository"""
+        response = await self._project_request(
+            owner,
+            repo_name,
+            "POST",
+            f"/repository/files/{quote(file_path, safe='')}",
+            json={
+                "branch": "main",
+                "content": content,
+                "commit_message": message
+            }
+        )
+        
+        return response is not None and response.status_code == 201
+    
+    async def commit_files(self, owner: str, repo_name: str, files: Dict[str, str], message: str,
+                           branch: str = "main") -> bool:
+        """Create files in GitLab repository as one commit (commit actions API)"""
+        response = await self._project_request(
+            owner,
+            repo_name,
+            "POST",
+            "/repository/commits",
+            json={
+                "branch": branch,
+                "commit_message": message,
+                "actions": [
+                    {"action": "create", "file_path": path, "content": content}
+                    for path, content in files.items()
+                ]
+            }
+        )
+        
+        return response is not None and response.status_code == 201
 
 
 class GiteaClient(GitProviderClient):
     """Gitea API client (also works for Forgejo)"""
     
+    provider = "gitea"
+    
     def _get_headers(self) -> Dict[str, str]:
         return {
             "Authorization": f"token {self.token}",
@@ -245,73 +528,88 @@ class GiteaClient(GitProviderClient):
     
     async def test_connection(self) -> Dict[str, Any]:
         """Test Gitea/Forgejo connection"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/v1/user",
-                headers=self.headers,
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "success": True,
-                    "username": data.get("login"),
-                    "email": data.get("email"),
-                    "name": data.get("full_name")
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Authentication failed: {response.status_code}"
-                }
+        response = await self._request(
+            "GET",
+            f"{self.base_url}/api/v1/user"
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "success": True,
+                "username": data.get("login"),
+                "email": data.get("email"),
+                "name": data.get("full_name")
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"Authentication failed: {response.status_code}"
+            }
     
     async def create_repository(self, owner: str, repo_name: str, private: bool = True) -> Dict[str, Any]:
         """Create Gitea/Forgejo repository"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/v1/user/repos",
-                headers=self.headers,
-                json={
-                    "name": repo_name,
-                    "description": "LinkOps configuration repository",
-                    "private": private,
-                    "auto_init": True,
-                    "default_branch": "main"
-                },
-                timeout=10.0
-            )
-            
-            if response.status_code == 201:
-                data = response.json()
-                return {
-                    "success": True,
-                    "repo_url": data.get("html_url"),
-                    "clone_url": data.get("clone_url"),
-                    "ssh_url": data.get("ssh_url")
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Failed to create repository: {response.text}"
-                }
+        response = await self._request(
+            "POST",
+            f"{self.base_url}/api/v1/user/repos",
+            json={
+                "name": repo_name,
+                "description": "LinkOps configuration repository",
+                "private": private,
+                "auto_init": True,
+                "default_branch": "main"
+            }
+        )
+        
+        if response.status_code == 201:
+            data = response.json()
+            return {
+                "success": True,
+                "repo_url": data.get("html_url"),
+                "clone_url": data.get("clone_url"),
+                "ssh_url": data.get("ssh_url"),
+                "default_branch": data.get("default_branch") or "main"
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"Failed to create repository: {response.text}"
+            }
     
     async def create_file(self, owner: str, repo_name: str, file_path: str, content: str, message: str) -> bool:
         """Create file in Gitea/Forgejo repository"""
-        import base64
+        response = await self._request(
+            "POST",
+            f"{self.base_url}/api/v1/repos/{owner}/{repo_name}/contents/{file_path}",
+            json={
+                "message": message,
+                "content": base64.b64encode(content.encode()).decode()
+            }
+        )
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/v1/repos/{owner}/{repo_name}/contents/{file_path}",
-                headers=self.headers,
-                json={
-                    "message": message,
-                    "content": base64.b64encode(content.encode()).decode()
-                },
-                timeout=10.0
-            )
-            
-            return response.status_code == 201
+        return response.status_code == 201
+    
+    async def commit_files(self, owner: str, repo_name: str, files: Dict[str, str], message: str,
+                           branch: str = "main") -> bool:
+        """Create files in Gitea/Forgejo repository as one commit (change files API)"""
+        response = await self._request(
+            "POST",
+            f"{self.base_url}/api/v1/repos/{owner}/{repo_name}/contents",
+            json={
+                "branch": branch,
+                "message": message,
+                "files": [
+                    {
+                        "operation": "create",
+                        "path": path,
+                        "content": base64.b64encode(content.encode()).decode()
+                    }
+                    for path, content in files.items()
+                ]
+            }
+        )
+        
+        return response.status_code == 201
 
 
 def get_git_client(provider: str, base_url: str, token: str) -> GitProviderClient:
@@ -0,0 +1,372 @@
+"""
+LinkOps - Inventory Index
+Immutable in-memory index of machines by id, tag, type, provider and jump/parent tree
+"""
+
+import asyncio
+import json
+import re
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from db.database import get_db
+from parsers.yaml_parser import MachineRecord
+
+EMPTY: FrozenSet[str] = frozenset()
+
+# Selections are cached per index; a rebuild starts with an empty cache
+SELECTION_CACHE_SIZE = 512
+
+
+class TagExpressionError(ValueError):
+    """A target expression could not be parsed"""
+
+
+class InventoryIndex:
+    """
+    Read-only view of the inventory built once per sync
+
+    Every lookup returns frozensets, so callers can combine them with set
+    algebra without copying, and the whole index can be shared between
+    requests and swapped with a single reference assignment.
+    """
+
+    def __init__(self, machines: Iterable[MachineRecord], version: int = 0):
+        started = time.perf_counter()
+        self.version = version
+        self.machines: Dict[str, MachineRecord] = {m.id: m for m in machines}
+        self.all_ids: FrozenSet[str] = frozenset(self.machines)
+
+        by_tag: Dict[str, set] = {}
+        by_type: Dict[str, set] = {}
+        by_provider: Dict[str, set] = {}
+        parents: Dict[str, str] = {}
+        children: Dict[str, set] = {}
+
+        for machine in self.machines.values():
+            for tag in machine.tags:
+                by_tag.setdefault(tag.lower(), set()).add(machine.id)
+            by_type.setdefault(machine.type.lower(), set()).add(machine.id)
+            if machine.provider:
+                by_provider.setdefault(machine.provider.lower(), set()).add(machine.id)
+
+            parent = machine_parent(machine)
+            if parent and parent != machine.id:
+                parents[machine.id] = parent
+                children.setdefault(parent, set()).add(machine.id)
+
+        self.by_tag = {key: frozenset(ids) for key, ids in by_tag.items()}
+        self.by_type = {key: frozenset(ids) for key, ids in by_type.items()}
+        self.by_provider = {key: frozenset(ids) for key, ids in by_provider.items()}
+        self.parents = parents
+        self.children = {key: frozenset(ids) for key, ids in children.items()}
+        self.roots = frozenset(mid for mid in self.all_ids if parents.get(mid) not in self.machines)
+
+        self._descendants: Dict[str, FrozenSet[str]] = {}
+        self._selections: Dict[str, FrozenSet[str]] = {}
+        self._selection_hits = 0
+        self._selection_misses = 0
+        self.built_at = datetime.utcnow()
+        self.build_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def __len__(self) -> int:
+        return len(self.machines)
+
+    def get(self, machine_id: str) -> Optional[MachineRecord]:
+        return self.machines.get(machine_id)
+
+    def with_tag(self, tag: str) -> FrozenSet[str]:
+        return self.by_tag.get(tag.lower(), EMPTY)
+
+    def with_type(self, machine_type: str) -> FrozenSet[str]:
+        return self.by_type.get(machine_type.lower(), EMPTY)
+
+    def with_provider(self, provider: str) -> FrozenSet[str]:
+        return self.by_provider.get(provider.lower(), EMPTY)
+
+    def children_of(self, machine_id: str) -> FrozenSet[str]:
+        return self.children.get(machine_id, EMPTY)
+
+    def descendants_of(self, machine_id: str) -> FrozenSet[str]:
+        """Everything reached through this machine, at any depth"""
+        cached = self._descendants.get(machine_id)
+        if cached is not None:
+            return cached
+
+        found = set()
+        queue = deque(self.children.get(machine_id, ()))
+        while queue:
+            child = queue.popleft()
+            if child in found or child == machine_id:
+                continue  # cycles in a hand-edited links.yaml
+            found.add(child)
+            queue.extend(self.children.get(child, ()))
+
+        result = frozenset(found)
+        self._descendants[machine_id] = result
+        return result
+
+    def ancestors_of(self, machine_id: str) -> List[str]:
+        """Jump chain from the machine's parent up to the root"""
+        chain = []
+        seen = {machine_id}
+        parent = self.parents.get(machine_id)
+        while parent is not None and parent not in seen:
+            chain.append(parent)
+            seen.add(parent)
+            parent = self.parents.get(parent)
+        return chain
+
+    def select(self, expression: str) -> FrozenSet[str]:
+        """
+        Machine ids matching a target expression, e.g. "prod AND web NOT backup"
+
+        Raises:
+            TagExpressionError: If the expression is malformed
+        """
+        key = expression.strip()
+        cached = self._selections.get(key)
+        if cached is not None:
+            self._selection_hits += 1
+            return cached
+
+        self._selection_misses += 1
+        result = compile_expression(key)(self)
+        if len(self._selections) >= SELECTION_CACHE_SIZE:
+            self._selections.clear()
+        self._selections[key] = result
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and build counters"""
+        lookups = self._selection_hits + self._selection_misses
+        return {
+            "version": self.version,
+            "machines": len(self.machines),
+            "tags": len(self.by_tag),
+            "types": len(self.by_type),
+            "providers": len(self.by_provider),
+            "roots": len(self.roots),
+            "built_at": self.built_at.isoformat(),
+            "build_ms": self.build_ms,
+            "selection_cache_hit_rate": round(self._selection_hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def machine_parent(machine: MachineRecord) -> Optional[str]:
+    """Explicit metadata.parent wins over the first ssh.proxyJump hop"""
+    parent = (machine.metadata or {}).get("parent")
+    if isinstance(parent, str) and parent:
+        return parent
+    if machine.proxy_jump:
+        return machine.proxy_jump.split(",")[0].strip() or None
+    return None
+
+
+# Target expressions
+#
+#   expr   := term (OR term)*
+#   term   := factor ((AND)? factor)*        juxtaposition means AND
+#   factor := (NOT | !) factor | "(" expr ")" | atom
+#   atom   := tag | type:X | provider:X | id:X | parent:X | under:X | tag:X | *
+#
+# parent:X matches direct children of X, under:X everything below X.
+
+Evaluator = Callable[[InventoryIndex], FrozenSet[str]]
+
+_TOKEN = re.compile(r"\s*(?:(\()|(\))|(!)|([^\s()!]+))")
+_OPERATORS = {"and", "or", "not"}
+
+_QUALIFIERS: Dict[str, Callable[[InventoryIndex, str], FrozenSet[str]]] = {
+    "tag": InventoryIndex.with_tag,
+    "type": InventoryIndex.with_type,
+    "provider": InventoryIndex.with_provider,
+    "id": lambda index, value: frozenset((value,)) if value in index.machines else EMPTY,
+    "parent": InventoryIndex.children_of,
+    "under": InventoryIndex.descendants_of,
+}
+
+
+def _tokenize(expression: str) -> List[str]:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None:
+            raise TagExpressionError(f"Unexpected character at position {position}")
+        tokens.append(match.group(match.lastindex))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expression(self) -> Tuple:
+        terms = [self.term()]
+        while (self.peek() or "").lower() == "or":
+            self.take()
+            terms.append(self.term())
+        return terms[0] if len(terms) == 1 else ("or", terms)
+
+    def term(self) -> Tuple:
+        factors = [self.factor()]
+        while True:
+            token = self.peek()
+            if token is None or token == ")" or token.lower() == "or":
+                break
+            if token.lower() == "and":
+                self.take()
+            factors.append(self.factor())
+        return factors[0] if len(factors) == 1 else ("and", factors)
+
+    def factor(self) -> Tuple:
+        token = self.peek()
+        if token is None:
+            raise TagExpressionError("Expression ended early")
+        if token == "!" or token.lower() == "not":
+            self.take()
+            return ("not", self.factor())
+        if token == "(":
+            self.take()
+            node = self.expression()
+            if self.peek() != ")":
+                raise TagExpressionError("Missing closing parenthesis")
+            self.take()
+            return node
+        if token == ")" or token.lower() in _OPERATORS:
+            raise TagExpressionError(f"Unexpected '{token}'")
+
+        self.take()
+        if token == "*":
+            return ("all",)
+        qualifier, sep, value = token.partition(":")
+        if sep:
+            if qualifier.lower() not in _QUALIFIERS or not value:
+                raise TagExpressionError(f"Unknown selector '{token}'")
+            return ("atom", qualifier.lower(), value)
+        return ("atom", "tag", token)
+
+
+def _compile(node: Tuple) -> Evaluator:
+    kind = node[0]
+    if kind == "all":
+        return lambda index: index.all_ids
+    if kind == "atom":
+        lookup = _QUALIFIERS[node[1]]
+        value = node[2]
+        return lambda index: lookup(index, value)
+    if kind == "not":
+        inner = _compile(node[1])
+        return lambda index: index.all_ids - inner(index)
+    if kind == "or":
+        parts = [_compile(child) for child in node[1]]
+        return lambda index: frozenset().union(*(part(index) for part in parts))
+
+    # AND: intersect the positive terms smallest first, then subtract the negated ones
+    positives = [_compile(child) for child in node[1] if child[0] != "not"]
+    negatives = [_compile(child[1]) for child in node[1] if child[0] == "not"]
+
+    def evaluate_and(index: InventoryIndex) -> FrozenSet[str]:
+        if positives:
+            sets = sorted((part(index) for part in positives), key=len)
+            result = sets[0]
+            for other in sets[1:]:
+                if not result:
+                    break
+                result = result & other
+        else:
+            result = index.all_ids
+        for part in negatives:
+            if not result:
+                break
+            result = result - part(index)
+        return frozenset(result)
+
+    return evaluate_and
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str) -> Evaluator:
+    """Parse a target expression once; the evaluator runs against any index"""
+    tokens = _tokenize(expression)
+    if not tokens:
+        raise TagExpressionError("Empty expression")
+    parser = _Parser(tokens)
+    node = parser.expression()
+    if parser.peek() is not None:
+        raise TagExpressionError(f"Unexpected '{parser.peek()}'")
+    return _compile(node)
+
+
+def _parse_tags(value: Optional[str]) -> List[str]:
+    """
+    Tags column -> list of tags
+
+    Current rows hold a JSON list. Rows written before that hold a comma
+    list, and a single legacy tag such as "2024", "true" or "null" is
+    valid JSON too, so anything but a list of strings is read as a comma list.
+    """
+    if not value:
+        return []
+    try:
+        tags = json.loads(value)
+    except ValueError:
+        tags = None
+    if isinstance(tags, list) and all(isinstance(tag, str) for tag in tags):
+        return tags
+    return [tag.strip() for tag in value.split(",") if tag.strip()]
+
+
+def record_from_row(row) -> MachineRecord:
+    """machines table row -> MachineRecord"""
+    tags = _parse_tags(row["tags"])
+    try:
+        metadata = json.loads(row["metadata"]) if row["metadata"] else None
+    except ValueError:
+        metadata = None
+    return MachineRecord(
+        row["id"], row["name"], row["type"], row["provider"], row["host"], row["port"], row["user"],
+        tuple(tags), bool(row["enrollment_required"]), row["client_id"], row["ssh_key_ref"],
+        row["proxy_jump"], row["icon"], metadata
+    )
+
+
+_index = InventoryIndex(())
+_rebuild_lock: Optional[asyncio.Lock] = None
+
+
+def get_inventory_index() -> InventoryIndex:
+    """Current index; hold on to the returned object for a consistent view"""
+    return _index
+
+
+async def rebuild_inventory_index() -> InventoryIndex:
+    """Load machines from the database, build a new index and swap it in"""
+    global _index, _rebuild_lock
+    if _rebuild_lock is None:
+        _rebuild_lock = asyncio.Lock()
+
+    async with _rebuild_lock:
+        rows = await get_db().fetch_all("""
+            SELECT id, name, type, provider, icon, host, port, user, proxy_jump,
+                   ssh_key_ref, tags, enrollment_required, client_id, metadata
+            FROM machines
+        """)
+        version = _index.version + 1
+        index = await asyncio.to_thread(lambda: InventoryIndex((record_from_row(row) for row in rows), version))
+        _index = index
+        return index
@@ -0,0 +1,524 @@
+"""
+LinkOps - Incremental Inventory Sync
+Applies links.yaml and scripts.yaml to the database, re-parsing only files whose Git blob changed
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from db.database import get_db
+from services.git_object_reader import GitObjectReader
+from parsers.yaml_parser import InventoryParseError, MachineRecord, ScriptRecord, parse_links_yaml, parse_scripts_yaml
+
+# Columns owned by links.yaml; runtime columns (enrolled, status, last_seen, ...) are never touched
+MACHINE_COLUMNS = (
+    "name", "type", "provider", "icon", "host", "port", "user", "proxy_jump",
+    "ssh_key_ref", "tags", "enrollment_required", "client_id", "metadata",
+)
+
+SCRIPT_COLUMNS = ("name", "emoji", "description", "path", "flags", "estimated_duration")
+
+
+class InventoryKind(NamedTuple):
+    """One table fed by a main file and/or a directory of fragments"""
+    table: str
+    columns: Tuple[str, ...]
+    main_file: str
+    fragment_dir: str
+
+
+MACHINES = InventoryKind("machines", MACHINE_COLUMNS, "links.yaml", "links.d")
+SCRIPTS = InventoryKind("scripts", SCRIPT_COLUMNS, "scripts.yaml", "scripts.d")
+KINDS = (MACHINES, SCRIPTS)
+
+FRAGMENT_SUFFIXES = (".yaml", ".yml")
+
+# Below this much changed YAML, process start-up and pickling cost more than they save
+PARALLEL_PARSE_MIN_BYTES = 256 * 1024
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class InventoryError(Exception):
+    """Inventory files could not be read from the config repository"""
+
+
+@dataclass
+class InventorySyncResult:
+    """Outcome of one sync run"""
+    success: bool
+    commit_hash: Optional[str]
+    timestamp: datetime
+    error: Optional[str] = None
+    changed_files: List[str] = field(default_factory=list)
+    removed_files: List[str] = field(default_factory=list)
+    machines: Dict[str, int] = field(default_factory=dict)
+    scripts: Dict[str, int] = field(default_factory=dict)
+    duration_ms: float = 0.0
+
+
+def row_hash(row: Tuple[Any, ...]) -> str:
+    """Stable digest of the inventory-owned columns of a row"""
+    return hashlib.sha1(json.dumps(row, separators=(",", ":")).encode()).hexdigest()
+
+
+def machine_row(machine: MachineRecord) -> Tuple[Any, ...]:
+    """Parsed links.yaml entry -> values for MACHINE_COLUMNS"""
+    return (
+        machine.name,
+        machine.type,
+        machine.provider,
+        machine.icon,
+        machine.host,
+        machine.port,
+        machine.user,
+        machine.proxy_jump,
+        machine.ssh_key_ref,
+        json.dumps(list(machine.tags)),
+        machine.enrollment_required,
+        machine.client_id,
+        json.dumps(machine.metadata or {}, sort_keys=True, default=str),
+    )
+
+
+def script_row(script: ScriptRecord) -> Tuple[Any, ...]:
+    """Parsed scripts.yaml entry -> values for SCRIPT_COLUMNS"""
+    return (
+        script.name,
+        script.emoji,
+        script.description,
+        script.path,
+        json.dumps(list(script.flags)),
+        script.estimated_duration,
+    )
+
+
+def kind_for_path(path: str) -> Optional[InventoryKind]:
+    """Inventory kind of a repository path, or None if it is not an inventory file"""
+    for kind in KINDS:
+        if path == kind.main_file:
+            return kind
+        prefix = kind.fragment_dir + "/"
+        if path.startswith(prefix) and path.endswith(FRAGMENT_SUFFIXES) and "/" not in path[len(prefix):]:
+            return kind
+    return None
+
+
+def parse_inventory_file(path: str, content: bytes) -> Dict[str, Tuple[Any, ...]]:
+    """Parse a links or scripts file/fragment into {id: row}; runs in a worker process"""
+    if kind_for_path(path) is MACHINES:
+        return {machine_id: machine_row(m) for machine_id, m in parse_links_yaml(content, path).items()}
+    return {script_id: script_row(s) for script_id, s in parse_scripts_yaml(content, path).items()}
+
+
+def merge_fragments(kind: InventoryKind, parsed: Dict[str, Dict[str, Tuple[Any, ...]]],
+                    current: Dict[str, Tuple[Optional[str], Optional[str]]],
+                    replaced: Set[str]) -> Dict[str, Tuple[Tuple[Any, ...], str]]:
+    """
+    Combine re-parsed fragments into {id: (row, source)}
+
+    An id may only be defined once across all files of a kind. Rows of
+    unchanged files are known from the database (source column), so the
+    check covers every fragment without re-reading the unchanged ones.
+
+    Raises:
+        InventoryError: Listing every id defined in more than one file
+    """
+    desired: Dict[str, Tuple[Tuple[Any, ...], str]] = {}
+    errors = []
+    for path in sorted(parsed):
+        for item_id, row in parsed[path].items():
+            if item_id in desired:
+                errors.append(f"'{item_id}' is defined in both {desired[item_id][1]} and {path}")
+                continue
+            existing = current.get(item_id)
+            if existing is not None and existing[0] is not None:
+                owner = existing[1] or kind.main_file
+                if owner not in replaced:
+                    errors.append(f"'{item_id}' is defined in both {owner} and {path}")
+                    continue
+            desired[item_id] = (row, path)
+
+    if errors:
+        shown = "; ".join(errors[:10])
+        more = f" (and {len(errors) - 10} more)" if len(errors) > 10 else ""
+        raise InventoryError(f"Duplicate {kind.table} ids: {shown}{more}")
+    return desired
+
+
+def diff_rows(kind: InventoryKind, desired: Dict[str, Tuple[Tuple[Any, ...], str]],
+              current: Dict[str, Tuple[Optional[str], Optional[str]]],
+              replaced: Set[str]) -> Tuple[List[tuple], List[tuple], List[tuple]]:
+    """
+    Compare merged rows with (id -> (inventory_hash, source)) from the database
+
+    Only rows owned by a changed or removed file can be deleted. Rows with a
+    NULL hash exist but were not created by the inventory; they are updated
+    when the inventory claims their id and otherwise left alone.
+
+    Returns:
+        (inserts, updates, deletes) ready for executemany
+    """
+    now = datetime.utcnow().isoformat()
+    inserts, updates = [], []
+    for item_id, (row, source) in desired.items():
+        digest = row_hash(row)
+        existing = current.get(item_id)
+        if existing is None:
+            inserts.append((item_id, *row, source, digest, now, now))
+        elif existing[0] != digest or existing[1] != source:
+            updates.append((*row, source, digest, now, item_id))
+
+    deletes = [
+        (item_id,) for item_id, (digest, source) in current.items()
+        if digest is not None and (source or kind.main_file) in replaced and item_id not in desired
+    ]
+    return inserts, updates, deletes
+
+
+def upsert_statements(kind: InventoryKind) -> Tuple[str, str, str]:
+    """INSERT, UPDATE and DELETE statements matching diff_rows() tuples"""
+    columns = kind.columns
+    insert = (
+        f"INSERT INTO {kind.table} (id, {', '.join(columns)}, source, inventory_hash, created_at, updated_at) "
+        f"VALUES ({', '.join('?' * (len(columns) + 5))})"
+    )
+    update = (
+        f"UPDATE {kind.table} SET {', '.join(f'{c} = ?' for c in columns)}, "
+        f"source = ?, inventory_hash = ?, updated_at = ? WHERE id = ?"
+    )
+    delete = f"DELETE FROM {kind.table} WHERE id = ?"
+    return insert, update, delete
+
+
+class InventorySync:
+    """
+    Incremental sync of the checked-out config repository into SQLite
+
+    Machines come from links.yaml and/or links.d/*.yaml, scripts from
+    scripts.yaml and/or scripts.d/*.yaml. The blob id of every inventory
+    file is stored with each successful sync, and every row records the
+    file it came from. A file whose blob id is unchanged is neither read
+    nor parsed, so a sync with no inventory changes costs a few reads on
+    the persistent cat-file channels (no process spawned) and one small
+    query. Changed files are parsed (in parallel when there
+    is enough YAML to be worth it), diffed row by row against per-row
+    hashes, and only the differences are written, all in one transaction.
+    """
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self.reader = GitObjectReader(repo_path)
+        self._lock = asyncio.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._last: Optional[InventorySyncResult] = None
+        self._runs = 0
+        self._skipped_files = 0
+        self._parsed_files = 0
+        self._parallel_parses = 0
+        self._scripts_hashed = 0
+
+    async def _head(self) -> Tuple[str, Dict[str, str], Dict[str, str]]:
+        """
+        HEAD commit, the blob id of each inventory file and the object id of each top-level entry
+
+        Top-level entries are keyed "name/" for directories and "name" for
+        files, read from the same tree objects.
+        """
+        head = await self.reader.info("HEAD")
+        if head is None or head.type != "commit":
+            raise InventoryError(f"No commit checked out in {self.repo_path}")
+
+        blobs, roots = {}, {}
+        fragment_dirs = {kind.fragment_dir for kind in KINDS}
+        for entry in await self.reader.read_tree(head.oid):
+            roots[entry.name + "/" if entry.type == "tree" else entry.name] = entry.oid
+            if entry.type == "blob" and kind_for_path(entry.name) is not None:
+                blobs[entry.name] = entry.oid
+            elif entry.type == "tree" and entry.name in fragment_dirs:
+                for fragment in await self.reader.read_tree(entry.oid):
+                    path = f"{entry.name}/{fragment.name}"
+                    if fragment.type == "blob" and kind_for_path(path) is not None:
+                        blobs[path] = fragment.oid
+        return head.oid, blobs, roots
+
+    async def _applied_blobs(self) -> Dict[str, str]:
+        """Blob ids applied by the last successful sync"""
+        row = await get_db().fetch_one("""
+            SELECT blob_hashes FROM git_sync_history
+            WHERE success = 1 AND blob_hashes IS NOT NULL
+            ORDER BY id DESC LIMIT 1
+        """)
+        if row is None:
+            return {}
+        try:
+            return json.loads(row["blob_hashes"])
+        except (TypeError, ValueError):
+            return {}
+
+    async def _read_blob(self, oid: str) -> bytes:
+        return await self.reader.read_blob(oid)
+
+    async def _script_files(self, changes) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Script id -> (repo path, stored content blob) as they will be once changes are applied"""
+        rows = await get_db().fetch_all("SELECT id, path, content_blob FROM scripts")
+        scripts = {row["id"]: (row["path"], row["content_blob"]) for row in rows}
+        path_index = SCRIPT_COLUMNS.index("path")
+        for kind, (inserts, updates, deletes) in changes:
+            if kind is not SCRIPTS:
+                continue
+            for insert in inserts:
+                scripts[insert[0]] = (insert[1 + path_index], None)
+            for update in updates:
+                scripts[update[-1]] = (update[path_index], scripts.get(update[-1], (None, None))[1])
+            for (script_id,) in deletes:
+                scripts.pop(script_id, None)
+        return {
+            script_id: (path[2:] if path.startswith("./") else path, content_blob)
+            for script_id, (path, content_blob) in scripts.items() if path
+        }
+
+    @staticmethod
+    def _script_roots(scripts: Dict[str, Tuple[str, Optional[str]]], roots: Dict[str, str]) -> Dict[str, str]:
+        """Object ids of the top-level entries holding the script files (scripts/ in the usual layout)"""
+        keys = {path.split("/", 1)[0] + "/" if "/" in path else path for path, _ in scripts.values()}
+        return {key: roots[key] for key in keys if key in roots}
+
+    async def _hash_script_files(self, commit: str, scripts: Dict[str, Tuple[str, Optional[str]]]) -> List[tuple]:
+        """
+        sha256 of each catalog script's file at this commit, as UPDATE parameters
+
+        The file's blob id is kept next to the digest, so only scripts whose
+        file changed are read and hashed. Targets cache scripts by digest.
+        Runs before the write transaction; only the UPDATEs take the lock.
+        """
+        updates = []
+        for script_id, (path, content_blob) in scripts.items():
+            info = await self.reader.info(f"{commit}:{path}")
+            if info is None or info.type != "blob":
+                if content_blob is not None:
+                    updates.append((None, None, None, script_id))
+                continue
+            if info.oid == content_blob:
+                continue
+            content = await self.reader.read_blob(info.oid)
+            updates.append((hashlib.sha256(content).hexdigest(), info.oid, len(content), script_id))
+        return updates
+
+    async def _current_rows(self, table: str) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        rows = await get_db().fetch_all(f"SELECT id, inventory_hash, source FROM {table}")
+        return {row["id"]: (row["inventory_hash"], row["source"]) for row in rows}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Never fork the API process: it already runs threads (aiosqlite, uvicorn)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=context)
+        return self._executor
+
+    async def _parse_files(self, contents: Dict[str, bytes]) -> Dict[str, Dict[str, Tuple[Any, ...]]]:
+        """
+        Parse changed files, across the process pool when there are several large ones
+
+        Raises:
+            InventoryError: With the errors of every file that failed
+        """
+        total_bytes = sum(len(content) for content in contents.values())
+        if len(contents) > 1 and total_bytes >= PARALLEL_PARSE_MIN_BYTES:
+            self._parallel_parses += 1
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            results = await asyncio.gather(
+                *(loop.run_in_executor(executor, parse_inventory_file, path, content)
+                  for path, content in contents.items()),
+                return_exceptions=True
+            )
+        else:
+            results = []
+            for path, content in contents.items():
+                try:
+                    results.append(await asyncio.to_thread(parse_inventory_file, path, content))
+                except Exception as e:
+                    results.append(e)
+
+        parsed, errors = {}, []
+        for path, outcome in zip(contents, results):
+            if isinstance(outcome, BaseException):
+                errors.append(str(outcome) if isinstance(outcome, InventoryParseError) else f"{path}: {outcome}")
+            else:
+                parsed[path] = outcome
+        if errors:
+            raise InventoryError("; ".join(errors))
+        return parsed
+
+    async def sync(self, force: bool = False) -> InventorySyncResult:
+        """
+        Apply the inventory at HEAD
+
+        Args:
+            force: Re-parse and diff every file even if its blob is unchanged
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            result = InventorySyncResult(success=False, commit_hash=None, timestamp=datetime.utcnow())
+            try:
+                result.commit_hash, blobs, roots = await self._head()
+                applied = {} if force else await self._applied_blobs()
+
+                plans = []
+                for kind in KINDS:
+                    files = {path: oid for path, oid in blobs.items() if kind_for_path(path) is kind}
+                    if not files:
+                        raise InventoryError(
+                            f"No {kind.table} inventory at {result.commit_hash[:12]} "
+                            f"({kind.main_file} or {kind.fragment_dir}/*.yaml)"
+                        )
+                    previous = {path for path in applied if kind_for_path(path) is kind}
+                    changed = sorted(path for path, oid in files.items() if applied.get(path) != oid)
+                    removed = sorted(previous - set(files))
+                    if changed or removed:
+                        plans.append((kind, changed, removed))
+                    result.changed_files.extend(changed)
+                    result.removed_files.extend(removed)
+
+                self._skipped_files += len(blobs) - len(result.changed_files)
+                self._parsed_files += len(result.changed_files)
+
+                # Parse everything before writing so a bad file changes nothing
+                contents = await asyncio.gather(*(self._read_blob(blobs[path]) for path in result.changed_files))
+                parsed = await self._parse_files(dict(zip(result.changed_files, contents)))
+
+                changes = []
+                for kind, changed, removed in plans:
+                    replaced = set(changed) | set(removed)
+                    current = await self._current_rows(kind.table)
+                    desired = merge_fragments(kind, {path: parsed[path] for path in changed}, current, replaced)
+                    changes.append((kind, diff_rows(kind, desired, current, replaced)))
+
+                # Script files can change without scripts.yaml changing. They are re-hashed only
+                # when the script inventory or a top-level entry holding scripts changed.
+                scripts = await self._script_files(changes)
+                script_roots = self._script_roots(scripts, roots)
+                script_updates = []
+                if any(kind is SCRIPTS for kind, _, _ in plans) or any(
+                    applied.get(key) != oid for key, oid in script_roots.items()
+                ):
+                    script_updates = await self._hash_script_files(result.commit_hash, scripts)
+
+                async with get_db().write() as conn:
+                    for kind, (inserts, updates, deletes) in changes:
+                        insert_sql, update_sql, delete_sql = upsert_statements(kind)
+                        if inserts:
+                            await conn.executemany(insert_sql, inserts)
+                        if updates:
+                            await conn.executemany(update_sql, updates)
+                        if deletes:
+                            await conn.executemany(delete_sql, deletes)
+                        counts = {"added": len(inserts), "updated": len(updates), "removed": len(deletes)}
+                        if kind is MACHINES:
+                            result.machines = counts
+                        else:
+                            result.scripts = counts
+
+                    if script_updates:
+                        await conn.executemany(
+                            "UPDATE scripts SET content_sha256 = ?, content_blob = ?, content_bytes = ? WHERE id = ?",
+                            script_updates
+                        )
+                        self._scripts_hashed += len(script_updates)
+
+                    result.success = True
+                    result.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+                    # Top-level ids of the script locations are kept with the blob ids for the next skip check
+                    await self._record(conn, result, {**blobs, **script_roots})
+
+            except Exception as e:
+                result.error = str(e)
+                result.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+                print(f"Inventory sync failed: {e}")
+                try:
+                    async with get_db().write() as conn:
+                        await self._record(conn, result, None)
+                except Exception as record_error:
+                    print(f"Could not record failed sync: {record_error}")
+
+            self._runs += 1
+            self._last = result
+            return result
+
+    def close(self):
+        """Stop the parser worker processes and the cat-file reader"""
+        self.reader.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _record(self, conn, result: InventorySyncResult, blobs: Optional[Dict[str, str]]):
+        """Insert the git_sync_history row for a run"""
+        await conn.execute("""
+            INSERT INTO git_sync_history (commit_hash, success, error, synced_at, blob_hashes, changes, duration_ms)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            result.commit_hash,
+            result.success,
+            result.error,
+            result.timestamp.isoformat(),
+            json.dumps(blobs) if blobs is not None else None,
+            json.dumps({"machines": result.machines, "scripts": result.scripts}),
+            result.duration_ms
+        ))
+
+    def stats(self) -> Dict[str, Any]:
+        """Run counters and the last result"""
+        last = self._last
+        return {
+            "runs": self._runs,
+            "files_skipped": self._skipped_files,
+            "files_parsed": self._parsed_files,
+            "parallel_parses": self._parallel_parses,
+            "scripts_hashed": self._scripts_hashed,
+            "git_reader": self.reader.stats(),
+            "last": None if last is None else {
+                "success": last.success,
+                "commit_hash": last.commit_hash,
+                "error": last.error,
+                "changed_files": last.changed_files,
+                "removed_files": last.removed_files,
+                "machines": last.machines,
+                "scripts": last.scripts,
+                "duration_ms": last.duration_ms,
+                "synced_at": last.timestamp.isoformat(),
+            },
+        }
+
+
+_inventory_sync: Optional[InventorySync] = None
+
+
+def init_inventory_sync(repo_path: str) -> InventorySync:
+    """Create the shared inventory sync for the config repository"""
+    global _inventory_sync
+    _inventory_sync = InventorySync(repo_path)
+    return _inventory_sync
+
+
+def get_inventory_sync() -> InventorySync:
+    """Get the shared inventory sync"""
+    if _inventory_sync is None:
+        raise RuntimeError("Inventory sync not initialized, call init_inventory_sync() first")
+    return _inventory_sync
+
+
+def close_inventory_sync():
+    """Stop the shared inventory sync's worker processes"""
+    global _inventory_sync
+    if _inventory_sync is not None:
+        _inventory_sync.close()
+        _inventory_sync = None
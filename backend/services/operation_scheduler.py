@@ -0,0 +1,302 @@
+"""
+LinkOps - Operation Scheduler
+Runs operation work under global, per-operation, per-target and per-hypervisor limits, longest first
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from db.database import get_db
+from services.inventory_index import get_inventory_index
+
+DEFAULT_GLOBAL_LIMIT = 32       # work items running across all operations
+DEFAULT_PER_TARGET = 1          # scripts never overlap on one machine
+DEFAULT_PER_PARENT = 8          # machines busy behind one hypervisor / jump host
+DEFAULT_ESTIMATE = 60.0         # seconds, for scripts without estimatedDuration or history
+HISTORY_RUNS = 10               # recent successful runs per (target, script) used for estimates
+PRIOR_RUNS = 50                 # recent successful runs per script, fleet-wide, for its prior
+PRIOR_WEIGHT = 2.0              # how many runs the catalog estimate counts as
+
+# Why a work item could not start yet
+BLOCKED_GLOBAL = "global"
+BLOCKED_OPERATION = "operation"
+BLOCKED_TARGET = "target"
+BLOCKED_PARENT = "parent"
+
+
+@dataclass
+class WorkItem:
+    """Everything one operation runs on one target"""
+    target: str
+    run: Callable[[], Awaitable[Any]]
+    estimate: float = DEFAULT_ESTIMATE
+
+
+@dataclass
+class WorkResult:
+    """Outcome and timing of one work item"""
+    target: str
+    estimate: float
+    queue_wait_ms: float = 0.0
+    exec_ms: float = 0.0
+    blocked_by: Optional[str] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class ScheduleReport:
+    """Where an operation's makespan went"""
+    results: List[WorkResult]
+    makespan_ms: float
+    wait_by_reason_ms: Dict[str, float] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        waits = [result.queue_wait_ms for result in self.results]
+        execs = [result.exec_ms for result in self.results]
+        return {
+            "items": len(self.results),
+            "failed": sum(1 for result in self.results if result.error is not None),
+            "makespan_ms": self.makespan_ms,
+            "queue_wait_ms_total": round(sum(waits), 1),
+            "queue_wait_ms_max": round(max(waits), 1) if waits else 0.0,
+            "exec_ms_total": round(sum(execs), 1),
+            "exec_ms_max": round(max(execs), 1) if execs else 0.0,
+            "wait_by_reason_ms": {reason: round(ms, 1) for reason, ms in self.wait_by_reason_ms.items()},
+        }
+
+
+class _OperationState:
+    __slots__ = ("running", "limit")
+
+    def __init__(self, limit: Optional[int]):
+        self.running = 0
+        self.limit = limit
+
+
+class OperationScheduler:
+    """
+    Shared admission control for every running operation
+
+    An operation hands over one work item per target. Items start longest
+    estimate first, but an item that is blocked (its hypervisor is at its
+    limit, say) is skipped so shorter items behind it can backfill free
+    capacity. Limits: a global cap across operations, the operation's own
+    concurrency, a per-target cap and a per-parent cap, where the parent is
+    metadata.parent or the first proxyJump hop from the inventory index. A
+    parent machine counts against its own group, so work on a hypervisor
+    and on its VMs shares one budget.
+    """
+
+    def __init__(self, global_limit: int = DEFAULT_GLOBAL_LIMIT,
+                 per_target: int = DEFAULT_PER_TARGET,
+                 per_parent: int = DEFAULT_PER_PARENT):
+        self.global_limit = max(1, global_limit)
+        self.per_target = max(1, per_target)
+        self.per_parent = max(1, per_parent)
+        self._condition = asyncio.Condition()
+        self._running = 0
+        self._by_target: Dict[str, int] = defaultdict(int)
+        self._by_parent: Dict[str, int] = defaultdict(int)
+        self._operations = 0
+        self._items = 0
+        self._queue_wait_ms = 0.0
+        self._exec_ms = 0.0
+        self._wait_by_reason_ms: Dict[str, float] = defaultdict(float)
+
+    @staticmethod
+    def group_of(target: str) -> str:
+        """Parent group of a target: its hypervisor / jump host, or itself"""
+        return get_inventory_index().parents.get(target, target)
+
+    def _blocked(self, item: WorkItem, group: str, operation: _OperationState) -> Optional[str]:
+        if self._running >= self.global_limit:
+            return BLOCKED_GLOBAL
+        if operation.limit is not None and operation.running >= operation.limit:
+            return BLOCKED_OPERATION
+        if self._by_target[item.target] >= self.per_target:
+            return BLOCKED_TARGET
+        if self._by_parent[group] >= self.per_parent:
+            return BLOCKED_PARENT
+        return None
+
+    async def run(self, items: Iterable[WorkItem], concurrency: Optional[int] = None) -> ScheduleReport:
+        """
+        Run every item and wait for all of them
+
+        Args:
+            items: One work item per target
+            concurrency: The operation's own limit (operations.concurrency)
+
+        Failures are captured per item in WorkResult.error; they do not stop
+        the remaining items.
+        """
+        started = time.monotonic()
+        operation = _OperationState(max(1, concurrency) if concurrency else None)
+        # Longest first; ties keep submission order
+        pending = sorted(
+            ((item, self.group_of(item.target), WorkResult(item.target, item.estimate)) for item in items),
+            key=lambda entry: -entry[0].estimate
+        )
+        results = [result for _, _, result in pending]
+        waited: Dict[str, float] = defaultdict(float)
+        tasks: List[asyncio.Task] = []
+        self._operations += 1
+
+        async with self._condition:
+            while pending:
+                still_pending = []
+                for item, group, result in pending:
+                    reason = self._blocked(item, group, operation)
+                    if reason is not None:
+                        result.blocked_by = reason
+                        still_pending.append((item, group, result))
+                        continue
+                    self._acquire(item, group, operation)
+                    result.queue_wait_ms = round((time.monotonic() - started) * 1000, 1)
+                    if result.blocked_by is not None:
+                        waited[result.blocked_by] += result.queue_wait_ms
+                    tasks.append(asyncio.create_task(self._execute(item, group, result, operation)))
+                pending = still_pending
+                if pending:
+                    await self._condition.wait()
+
+        await asyncio.gather(*tasks)
+        report = ScheduleReport(results, round((time.monotonic() - started) * 1000, 1), dict(waited))
+        self._items += len(results)
+        self._queue_wait_ms += sum(result.queue_wait_ms for result in results)
+        self._exec_ms += sum(result.exec_ms for result in results)
+        for reason, ms in waited.items():
+            self._wait_by_reason_ms[reason] += ms
+        return report
+
+    def _acquire(self, item: WorkItem, group: str, operation: _OperationState):
+        self._running += 1
+        operation.running += 1
+        self._by_target[item.target] += 1
+        self._by_parent[group] += 1
+
+    async def _execute(self, item: WorkItem, group: str, result: WorkResult, operation: _OperationState):
+        started = time.monotonic()
+        try:
+            result.result = await item.run()
+        except Exception as e:
+            result.error = e
+        finally:
+            result.exec_ms = round((time.monotonic() - started) * 1000, 1)
+            async with self._condition:
+                self._running -= 1
+                operation.running -= 1
+                self._by_target[item.target] -= 1
+                if not self._by_target[item.target]:
+                    del self._by_target[item.target]
+                self._by_parent[group] -= 1
+                if not self._by_parent[group]:
+                    del self._by_parent[group]
+                self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "global_limit": self.global_limit,
+            "per_target": self.per_target,
+            "per_parent": self.per_parent,
+            "running": self._running,
+            "busy_parents": len(self._by_parent),
+            "operations": self._operations,
+            "items": self._items,
+            "queue_wait_ms_total": round(self._queue_wait_ms, 1),
+            "exec_ms_total": round(self._exec_ms, 1),
+            "wait_by_reason_ms": {reason: round(ms, 1) for reason, ms in self._wait_by_reason_ms.items()},
+        }
+
+
+async def estimate_durations(targets: Iterable[str], scripts: Iterable[str]) -> Dict[Tuple[str, str], float]:
+    """
+    Expected seconds per (target, script)
+
+    Starts from estimatedDuration in scripts.yaml, replaced by the mean of
+    the script's last PRIOR_RUNS successful runs across the fleet where
+    there are some, and shrunk towards the target's own recent runs: with
+    n runs on the target, its mean counts n times against the prior's
+    PRIOR_WEIGHT.
+
+    Both history reads walk an index on (script, ..., started) backwards
+    and stop after a fixed number of rows, so the cost does not grow with
+    the size of operation_logs.
+    """
+    targets = list(dict.fromkeys(targets))
+    scripts = list(dict.fromkeys(scripts))
+    if not targets or not scripts:
+        return {}
+
+    placeholders = ",".join("?" for _ in scripts)
+    script_values = ",".join("(?)" for _ in scripts)
+    target_values = ",".join("(?)" for _ in targets)
+    catalog = {
+        row["id"]: float(row["estimated_duration"])
+        for row in await get_db().fetch_all(
+            f"SELECT id, estimated_duration FROM scripts WHERE id IN ({placeholders})", scripts
+        )
+        if row["estimated_duration"]
+    }
+    # idx_operation_logs_script_history (partial, successful runs only)
+    priors = {
+        row["script"]: row["mean"]
+        for row in await get_db().fetch_all(f"""
+            WITH s(script) AS (VALUES {script_values})
+            SELECT s.script, (
+                SELECT AVG(duration) FROM (
+                    SELECT duration FROM operation_logs
+                    WHERE script = s.script AND exit_code = 0 AND duration IS NOT NULL
+                    ORDER BY started DESC LIMIT ?
+                )
+            ) AS mean
+            FROM s
+        """, (*scripts, PRIOR_RUNS))
+        if row["mean"] is not None
+    }
+    # idx_operation_logs_script_target, one bounded walk per (script, target)
+    rows = await get_db().fetch_all(f"""
+        WITH s(script) AS (VALUES {script_values}), t(target) AS (VALUES {target_values})
+        SELECT t.target, s.script, l.duration
+        FROM s CROSS JOIN t
+        JOIN operation_logs l ON l.id IN (
+            SELECT id FROM operation_logs
+            WHERE script = s.script AND target = t.target AND exit_code = 0 AND duration IS NOT NULL
+            ORDER BY started DESC LIMIT ?
+        )
+    """, (*scripts, *targets, HISTORY_RUNS))
+
+    per_target: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+    for row in rows:
+        per_target[(row["target"], row["script"])].append(row["duration"])
+
+    estimates = {}
+    for script in scripts:
+        prior = priors.get(script, catalog.get(script, DEFAULT_ESTIMATE))
+        for target in targets:
+            runs = per_target.get((target, script))
+            if runs:
+                estimates[(target, script)] = (sum(runs) + prior * PRIOR_WEIGHT) / (len(runs) + PRIOR_WEIGHT)
+            else:
+                estimates[(target, script)] = prior
+    return estimates
+
+
+_scheduler: Optional[OperationScheduler] = None
+
+
+def init_operation_scheduler(**kwargs) -> OperationScheduler:
+    """Create the shared scheduler"""
+    global _scheduler
+    _scheduler = OperationScheduler(**kwargs)
+    return _scheduler
+
+
+def get_operation_scheduler() -> OperationScheduler:
+    """Get the shared scheduler"""
+    if _scheduler is None:
+        raise RuntimeError("Operation scheduler not initialized, call init_operation_scheduler() first")
+    return _scheduler
@@ -0,0 +1,306 @@
+"""
+LinkOps - Output Capture
+Bounded streaming capture of script output, spilling to compressed append-only chunk files
+"""
+
+import asyncio
+import bisect
+import os
+import re
+import shutil
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+OUTPUT_DIR = "/var/lib/linkops/output"
+DEFAULT_TAIL_BYTES = 64 * 1024      # most recent output kept in memory per stream
+DEFAULT_CHUNK_BYTES = 256 * 1024    # raw bytes per compressed chunk; smaller output stays inline
+COMPRESSION_LEVEL = 6
+MAX_READ_BYTES = 1024 * 1024        # largest range a single read returns
+DEFAULT_RETENTION_DAYS = 30         # spilled output of older operations is swept
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9._-]")
+
+
+class OutputCaptureError(Exception):
+    """Captured output could not be written or read"""
+
+
+@dataclass
+class CapturedOutput:
+    """What a finished capture leaves for the operation_logs row"""
+    text: str                       # full output if inline, else the tail
+    ref: Optional[str]              # chunk file reference when output was spilled
+    total_bytes: int
+    spilled_bytes: int = 0          # compressed size on disk
+
+    @property
+    def truncated(self) -> bool:
+        return self.ref is not None
+
+
+def _chunk_path(output_dir: str, ref: str) -> str:
+    return os.path.join(output_dir, ref + ".gz")
+
+
+def _index_path(output_dir: str, ref: str) -> str:
+    return os.path.join(output_dir, ref + ".idx")
+
+
+class OutputCapture:
+    """
+    Output of one stream (stdout or stderr) of one script execution
+
+    Bytes are fed as they arrive. The last tail_bytes are kept in a ring for
+    the live view and the log row; everything else is cut into chunks of
+    chunk_bytes, each compressed as its own gzip member and appended to
+    <ref>.gz, with one "raw_offset raw_len file_offset file_len" line per
+    chunk appended to <ref>.idx. The chunk file is a valid multi-member gzip
+    (zcat works), and the index lets a range read decompress only the
+    chunks it touches. Output that never fills a chunk never touches disk.
+
+    Memory is bounded by tail_bytes + chunk_bytes however much a script
+    prints; while a chunk is being written, write() waits, so a fast
+    producer is slowed to disk speed instead of buffering.
+
+    A chunk leaves the buffer only once it is on disk. If a spill fails,
+    write() raises and the capture stops accepting output; finish() still
+    returns what was captured (inline when nothing reached disk).
+    """
+
+    def __init__(self, store: "OutputStore", ref: str):
+        self.store = store
+        self.ref = ref
+        self._tail = bytearray()
+        self._pending = bytearray()
+        self._total = 0
+        self._spilled_raw = 0
+        self._spilled_bytes = 0
+        self._file_offset = 0
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self._failed = False
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    @property
+    def buffered_bytes(self) -> int:
+        return len(self._tail) + len(self._pending)
+
+    def tail(self) -> bytes:
+        """Most recent output, for the live view"""
+        return bytes(self._tail)
+
+    async def write(self, data: bytes):
+        if self._closed:
+            raise OutputCaptureError(f"Capture {self.ref} is closed")
+        if not data:
+            return
+        if isinstance(data, str):
+            data = data.encode()
+        self._total += len(data)
+        self.store._captured_bytes += len(data)
+
+        self._tail += data
+        if len(self._tail) > self.store.tail_bytes:
+            del self._tail[:len(self._tail) - self.store.tail_bytes]
+
+        self._pending += data
+        if len(self._pending) >= self.store.chunk_bytes:
+            async with self._lock:
+                while len(self._pending) >= self.store.chunk_bytes:
+                    await self._spill(bytes(self._pending[:self.store.chunk_bytes]))
+                    del self._pending[:self.store.chunk_bytes]
+
+    async def _spill(self, chunk: bytes):
+        compressor = zlib.compressobj(self.store.level, zlib.DEFLATED, 31)  # gzip member
+        member = await asyncio.to_thread(lambda: compressor.compress(chunk) + compressor.flush())
+        entry = f"{self._spilled_raw} {len(chunk)} {self._file_offset} {len(member)}\n"
+        try:
+            await asyncio.to_thread(self.store._append, self.ref, member, entry)
+        except OSError as e:
+            # The chunk file may now end in a partial member; stop spilling to it
+            self._closed = True
+            self._failed = True
+            self.store._failures += 1
+            self.store._active.pop(self.ref, None)
+            raise OutputCaptureError(f"Could not spill output for {self.ref}: {e}")
+        self._spilled_raw += len(chunk)
+        self._file_offset += len(member)
+        self._spilled_bytes += len(member)
+        self.store._spilled_bytes += len(member)
+        self.store._chunks += 1
+
+    async def finish(self) -> CapturedOutput:
+        """Flush the last chunk (if anything was spilled) and release the buffers"""
+        async with self._lock:
+            self._closed = True
+            try:
+                if not self._spilled_raw:
+                    return CapturedOutput(self._pending.decode(errors="replace"), None, self._total)
+                if self._pending and not self._failed:
+                    try:
+                        await self._spill(bytes(self._pending))
+                    except OutputCaptureError as e:
+                        print(f"Warning: {e}")
+                self.store._spilled_captures += 1
+                return CapturedOutput(
+                    bytes(self._tail).decode(errors="replace"), self.ref, self._total, self._spilled_bytes
+                )
+            finally:
+                self._tail = bytearray()
+                self._pending = bytearray()
+                self.store._active.pop(self.ref, None)
+
+
+class OutputStore:
+    """Creates captures and serves range reads of spilled output"""
+
+    def __init__(self, output_dir: str = OUTPUT_DIR, tail_bytes: int = DEFAULT_TAIL_BYTES,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES, level: int = COMPRESSION_LEVEL,
+                 retention_days: float = DEFAULT_RETENTION_DAYS):
+        self.output_dir = output_dir
+        self.tail_bytes = tail_bytes
+        self.chunk_bytes = max(chunk_bytes, 4096)
+        self.level = level
+        self.retention_days = retention_days
+        self._active: Dict[str, OutputCapture] = {}
+        self._captured_bytes = 0
+        self._spilled_bytes = 0
+        self._spilled_captures = 0
+        self._chunks = 0
+        self._reads = 0
+        self._failures = 0
+        self._swept = 0
+
+    def capture(self, operation_id: str, target: str, script: str, stream: str) -> OutputCapture:
+        """Start capturing one stream of one execution"""
+        name = _SAFE_NAME.sub("_", f"{target}.{script}.{stream}.{uuid.uuid4().hex[:8]}")
+        ref = f"{_SAFE_NAME.sub('_', operation_id)}/{name}"
+        capture = OutputCapture(self, ref)
+        self._active[ref] = capture
+        return capture
+
+    def _append(self, ref: str, member: bytes, entry: str):
+        path = _chunk_path(self.output_dir, ref)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        with open(path, "ab") as chunks:
+            chunks.write(member)
+        with open(_index_path(self.output_dir, ref), "a") as index:
+            index.write(entry)
+
+    def _load_index(self, ref: str) -> List[Tuple[int, int, int, int]]:
+        try:
+            with open(_index_path(self.output_dir, ref)) as index:
+                return [tuple(int(field) for field in line.split()) for line in index if line.strip()]
+        except FileNotFoundError:
+            raise OutputCaptureError(f"No spilled output for {ref}")
+
+    def _read_range(self, ref: str, offset: int, length: int) -> Tuple[bytes, int]:
+        chunks = self._load_index(ref)
+        total = chunks[-1][0] + chunks[-1][1] if chunks else 0
+        if offset >= total or length <= 0:
+            return b"", total
+
+        end = min(offset + length, total)
+        first = bisect.bisect_right([chunk[0] for chunk in chunks], offset) - 1
+        data = bytearray()
+        with open(_chunk_path(self.output_dir, ref), "rb") as source:
+            for raw_offset, raw_len, file_offset, file_len in chunks[first:]:
+                if raw_offset >= end:
+                    break
+                source.seek(file_offset)
+                raw = zlib.decompress(source.read(file_len), 31)
+                data += raw[max(offset - raw_offset, 0):end - raw_offset]
+        return bytes(data), total
+
+    async def read(self, ref: str, offset: int = 0, length: int = MAX_READ_BYTES) -> Tuple[bytes, int]:
+        """
+        Bytes [offset, offset + length) of a spilled stream
+
+        Returns:
+            (data, total bytes in the stream)
+
+        Raises:
+            OutputCaptureError: If the reference is unknown or still being written
+        """
+        if ref in self._active:
+            raise OutputCaptureError(f"Output {ref} is still being captured")
+        self._reads += 1
+        return await asyncio.to_thread(self._read_range, ref, max(offset, 0), min(length, MAX_READ_BYTES))
+
+    async def remove_operation(self, operation_id: str):
+        """Delete every spilled stream of an operation"""
+        directory = os.path.join(self.output_dir, _SAFE_NAME.sub("_", operation_id))
+        await asyncio.to_thread(shutil.rmtree, directory, True)
+
+    def _expired_operations(self, cutoff: float) -> List[str]:
+        active = {ref.split("/", 1)[0] for ref in self._active}
+        expired = []
+        try:
+            entries = list(os.scandir(self.output_dir))
+        except FileNotFoundError:
+            return []
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False) or entry.name in active:
+                continue
+            # Chunk files are appended to, so the newest file mtime is the last write
+            try:
+                newest = entry.stat().st_mtime
+                for child in os.scandir(entry.path):
+                    newest = max(newest, child.stat().st_mtime)
+            except OSError:
+                continue
+            if newest < cutoff:
+                expired.append(entry.path)
+        return expired
+
+    async def sweep(self) -> int:
+        """
+        Delete spilled output of operations last written more than retention_days ago
+
+        Returns:
+            Number of operation directories removed (0 when retention is disabled)
+        """
+        if self.retention_days <= 0:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        expired = await asyncio.to_thread(self._expired_operations, cutoff)
+        for directory in expired:
+            await asyncio.to_thread(shutil.rmtree, directory, True)
+        self._swept += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active_captures": len(self._active),
+            "buffered_bytes": sum(capture.buffered_bytes for capture in self._active.values()),
+            "captured_bytes": self._captured_bytes,
+            "spilled_captures": self._spilled_captures,
+            "spilled_chunks": self._chunks,
+            "spilled_bytes": self._spilled_bytes,
+            "range_reads": self._reads,
+            "spill_failures": self._failures,
+            "swept_operations": self._swept,
+        }
+
+
+_store: Optional[OutputStore] = None
+
+
+def init_output_store(**kwargs) -> OutputStore:
+    """Create the shared output store"""
+    global _store
+    _store = OutputStore(**kwargs)
+    return _store
+
+
+def get_output_store() -> OutputStore:
+    """Get the shared output store"""
+    if _store is None:
+        raise RuntimeError("Output store not initialized, call init_output_store() first")
+    return _store
@@ -0,0 +1,163 @@
+"""
+LinkOps - Password Hashing Service
+Runs bcrypt hashing and verification in a bounded process pool
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = 12
+
+# Created lazily inside each worker process
+_pwd_context: Optional[CryptContext] = None
+
+
+def _get_pwd_context() -> CryptContext:
+    global _pwd_context
+    if _pwd_context is None:
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+    return _pwd_context
+
+
+def _hash_password(password: str) -> str:
+    return _get_pwd_context().hash(password)
+
+
+def _verify_password(password: str, password_hash: str) -> bool:
+    try:
+        return _get_pwd_context().verify(password, password_hash)
+    except (ValueError, TypeError):
+        # Malformed or unknown hash format
+        return False
+
+
+def _warm_up() -> int:
+    _get_pwd_context()
+    return os.getpid()
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full and the request should be retried later"""
+
+
+class PasswordHasher:
+    """
+    Process pool for bcrypt work
+
+    bcrypt is CPU-bound and holds the GIL, so it has to leave the event loop
+    process entirely. Submissions beyond max_pending are rejected right away
+    with PasswordHasherBusy instead of queueing behind a login storm.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 8
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+        self._busy_seconds = 0.0
+
+    def start(self):
+        """Create the worker pool"""
+        if self._executor is not None:
+            return
+        # Never fork the API process: it already runs threads (aiosqlite, uvicorn)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    async def warm_up(self):
+        """Start every worker process now instead of on the first login"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self._executor, _warm_up) for _ in range(self.workers)
+        ])
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, fn, *args) -> Any:
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise PasswordHasherBusy(
+                f"Password hashing queue is full ({self._pending}/{self.max_pending})"
+            )
+
+        self.start()
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, fn, *args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+            self._busy_seconds += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        """Hash a password"""
+        return await self._submit(_hash_password, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        """Verify a password against a stored hash"""
+        return await self._submit(_verify_password, password, password_hash)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool saturation metrics"""
+        finished = self._completed + self._failed
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": min(self._pending, self.workers),
+            "queued": max(0, self._pending - self.workers),
+            "saturation": round(self._pending / self.max_pending, 3),
+            "peak_pending": self._peak_pending,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_latency_ms": round(self._busy_seconds * 1000 / finished, 1) if finished else 0.0,
+        }
+
+
+_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get the shared password hasher"""
+    global _hasher
+    if _hasher is None:
+        _hasher = PasswordHasher()
+    return _hasher
+
+
+async def init_password_hasher(workers: Optional[int] = None, max_pending: Optional[int] = None):
+    """Create the shared password hasher and start its workers"""
+    global _hasher
+    if _hasher is None:
+        _hasher = PasswordHasher(workers=workers, max_pending=max_pending)
+    await _hasher.warm_up()
+
+
+def shutdown_password_hasher():
+    """Stop the shared password hasher"""
+    global _hasher
+    if _hasher is not None:
+        _hasher.shutdown()
+        _hasher = None
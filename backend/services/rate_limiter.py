@@ -0,0 +1,239 @@
+"""
+LinkOps - Provider Request Scheduler
+Per-host token bucket that follows Git provider rate-limit headers and retries throttled calls
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+import httpx
+
+# Safe to resend after a network error or 5xx
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Server errors worth retrying for idempotent calls
+RETRYABLE_STATUS = {502, 503, 504}
+
+DEFAULT_RATE = 10.0        # requests per second
+DEFAULT_BURST = 20
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 0.5         # seconds
+BACKOFF_CAP = 30.0         # seconds
+MAX_RATE_LIMIT_WAIT = 300  # never park a request longer than this
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Rate-limit reset as seconds from now (epoch seconds or delta-seconds)"""
+    if not value:
+        return None
+    try:
+        reset = float(value)
+    except ValueError:
+        return None
+    # GitHub and GitLab send epoch seconds; the IETF draft sends a delta
+    if reset > 1_000_000_000:
+        reset -= time.time()
+    return max(0.0, reset)
+
+
+def rate_limit_headers(response: httpx.Response) -> Dict[str, Optional[str]]:
+    """Remaining/reset headers under GitHub (X-RateLimit-*) or GitLab/Gitea (RateLimit-*) names"""
+    headers = response.headers
+    return {
+        "remaining": headers.get("x-ratelimit-remaining") or headers.get("ratelimit-remaining"),
+        "reset": headers.get("x-ratelimit-reset") or headers.get("ratelimit-reset"),
+        "retry_after": headers.get("retry-after"),
+    }
+
+
+class HostScheduler:
+    """
+    Request scheduler for one API host
+
+    Every call takes a token from a bucket refilled at `rate` per second and
+    a slot from a concurrency cap. Rate-limit headers on each response
+    lower the rate to what the remaining quota allows until the window
+    resets, and pause the host entirely when the quota is exhausted.
+    """
+
+    def __init__(self, host: str, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 max_concurrency: int = DEFAULT_CONCURRENCY, max_retries: int = DEFAULT_MAX_RETRIES):
+        self.host = host
+        self.default_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self._remaining: Optional[int] = None
+        self._requests = 0
+        self._retries = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def _acquire_token(self):
+        """Wait for the host to be unblocked and for a bucket token"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def _block_for(self, seconds: float):
+        seconds = min(seconds, MAX_RATE_LIMIT_WAIT)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _observe(self, response: httpx.Response) -> Optional[float]:
+        """
+        Update the schedule from rate-limit headers
+
+        Returns:
+            Seconds to wait before retrying if the response was throttled
+        """
+        limits = rate_limit_headers(response)
+        reset_in = parse_reset(limits["reset"])
+
+        if limits["remaining"] is not None:
+            try:
+                self._remaining = int(limits["remaining"])
+            except ValueError:
+                self._remaining = None
+
+        if self._remaining is not None and reset_in is not None:
+            if self._remaining <= 0:
+                self._block_for(reset_in)
+            else:
+                # Spread what is left of the quota over the rest of the window
+                self.rate = min(self.default_rate, max(self._remaining / max(reset_in, 1.0), 0.1))
+        elif self._remaining is None:
+            self.rate = self.default_rate
+
+        throttled = response.status_code == 429 or (
+            response.status_code == 403 and (limits["retry_after"] or self._remaining == 0)
+        )
+        if not throttled:
+            return None
+
+        self._throttled += 1
+        wait = parse_retry_after(limits["retry_after"])
+        if wait is None:
+            wait = reset_in if reset_in is not None else BACKOFF_BASE
+        self._block_for(wait)
+        return wait
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+    async def send(self, http: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the scheduler
+
+        Throttled responses (429, or 403 with an exhausted quota) were not
+        processed by the provider, so they are retried for every method.
+        Network errors and 502/503/504 are retried only for idempotent
+        methods. The last response or error is returned/raised once
+        retries run out.
+        """
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+
+        for attempt in range(self.max_retries + 1):
+            queued = time.monotonic()
+            async with self._slots:
+                await self._acquire_token()
+                waited = time.monotonic() - queued
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._requests += 1
+
+                try:
+                    response = await http.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    if not idempotent or attempt == self.max_retries:
+                        raise
+                    self._retries += 1
+                    delay = self._backoff(attempt)
+                else:
+                    throttle_wait = self._observe(response)
+                    if throttle_wait is not None:
+                        if attempt == self.max_retries or throttle_wait > MAX_RATE_LIMIT_WAIT:
+                            return response
+                        delay = 0.0  # host is blocked until the window allows it
+                    elif idempotent and response.status_code in RETRYABLE_STATUS and attempt < self.max_retries:
+                        delay = self._backoff(attempt)
+                    else:
+                        return response
+                    self._retries += 1
+
+            # Back off outside the concurrency slot
+            if delay:
+                await asyncio.sleep(delay)
+
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue wait and throttling metrics"""
+        return {
+            "rate": round(self.rate, 3),
+            "burst": self.burst,
+            "max_concurrency": self.max_concurrency,
+            "remaining": self._remaining,
+            "blocked_for_s": round(max(0.0, self._blocked_until - time.monotonic()), 1),
+            "requests": self._requests,
+            "retries": self._retries,
+            "throttled": self._throttled,
+            "avg_queue_wait_ms": round(self._wait_total * 1000 / self._requests, 1) if self._requests else 0.0,
+            "max_queue_wait_ms": round(self._wait_max * 1000, 1),
+        }
+
+
+_schedulers: Dict[str, HostScheduler] = {}
+
+
+def get_host_scheduler(url: str) -> HostScheduler:
+    """Get the scheduler for the host of a URL"""
+    host = httpx.URL(url).host
+    scheduler = _schedulers.get(host)
+    if scheduler is None:
+        scheduler = HostScheduler(host)
+        _schedulers[host] = scheduler
+    return scheduler
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    """Metrics for every host seen so far"""
+    return {host: scheduler.stats() for host, scheduler in _schedulers.items()}
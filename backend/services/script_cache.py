@@ -0,0 +1,209 @@
+"""
+LinkOps - Script Cache
+Content-addressed copies of catalog scripts on target hosts, uploaded only when missing
+"""
+
+import asyncio
+import io
+import shlex
+import tarfile
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from db.database import get_db
+from services.git_object_reader import GitObjectReader
+from services.ssh_pool import PoolKey, SSHConnectionPool
+
+REMOTE_CACHE_DIR = "/var/lib/linkops/cache"
+REMOTE_MAX_AGE_DAYS = 30        # cached scripts not used for this long are pruned on upload
+LOCAL_CACHE_BYTES = 16 * 1024 * 1024
+ROUND_TRIP_TIMEOUT = 30.0
+MANIFEST = "MANIFEST"
+
+
+class ScriptCacheError(Exception):
+    """Scripts could not be made available on a target"""
+
+
+class CachedScript(NamedTuple):
+    """Catalog script with the digest computed at sync time"""
+    id: str
+    sha256: str
+    blob: str
+    size: int
+
+
+async def load_scripts(script_ids: Iterable[str]) -> Dict[str, CachedScript]:
+    """
+    Digests for the scripts of an operation
+
+    Raises:
+        ScriptCacheError: If a script is unknown or its file was not found at the last sync
+    """
+    ids = list(dict.fromkeys(script_ids))
+    if not ids:
+        return {}
+    placeholders = ",".join("?" for _ in ids)
+    rows = await get_db().fetch_all(
+        f"SELECT id, content_sha256, content_blob, content_bytes FROM scripts WHERE id IN ({placeholders})",
+        ids
+    )
+    scripts = {
+        row["id"]: CachedScript(row["id"], row["content_sha256"], row["content_blob"], row["content_bytes"] or 0)
+        for row in rows if row["content_sha256"]
+    }
+    missing = [script_id for script_id in ids if script_id not in scripts]
+    if missing:
+        raise ScriptCacheError(f"No script file synced for: {', '.join(missing)}")
+    return scripts
+
+
+class ScriptCache:
+    """
+    Ships each script to a host at most once per content version
+
+    Scripts live on targets as <cache_dir>/<sha256>. Before an operation
+    runs on a host, one command checks which of its scripts are already
+    there with the right content (and refreshes their mtime); missing or
+    damaged copies are sent together as a single tar stream, checked
+    against their digests and moved into place atomically. A host that
+    already has every script costs one short round trip and no script
+    bytes.
+    """
+
+    def __init__(self, pool: SSHConnectionPool, reader: GitObjectReader,
+                 cache_dir: str = REMOTE_CACHE_DIR, max_age_days: int = REMOTE_MAX_AGE_DAYS):
+        self.pool = pool
+        self.reader = reader
+        self.cache_dir = cache_dir.rstrip("/")
+        self.max_age_days = max_age_days
+        self._contents: "OrderedDict[str, bytes]" = OrderedDict()
+        self._content_bytes = 0
+        self._probes = 0
+        self._hits = 0
+        self._misses = 0
+        self._uploads = 0
+        self._bytes_uploaded = 0
+        self._bytes_saved = 0
+
+    def remote_path(self, digest: str) -> str:
+        return f"{self.cache_dir}/{digest}"
+
+    async def _content(self, script: CachedScript) -> bytes:
+        """Script bytes by blob id, kept in a small LRU shared by all hosts"""
+        content = self._contents.get(script.sha256)
+        if content is not None:
+            self._contents.move_to_end(script.sha256)
+            return content
+        content = await self.reader.read_blob(script.blob)
+        self._contents[script.sha256] = content
+        self._content_bytes += len(content)
+        while self._content_bytes > LOCAL_CACHE_BYTES and len(self._contents) > 1:
+            _, evicted = self._contents.popitem(last=False)
+            self._content_bytes -= len(evicted)
+        return content
+
+    def _probe_command(self, digests: List[str]) -> str:
+        return (
+            f"cd {shlex.quote(self.cache_dir)} 2>/dev/null || exit 0; "
+            f"for f in {' '.join(digests)}; do "
+            f"[ -f \"$f\" ] && echo \"$f  $f\" | sha256sum -c --status 2>/dev/null && touch -c \"$f\" && echo \"$f\"; "
+            f"done; exit 0"
+        )
+
+    def _upload_command(self) -> str:
+        directory = shlex.quote(self.cache_dir)
+        return (
+            f"set -e; umask 077; mkdir -p {directory}; "
+            f"t=$(mktemp -d {directory}/.upload.XXXXXX); trap 'rm -rf \"$t\"' EXIT; "
+            f"tar -x -C \"$t\"; cd \"$t\"; sha256sum -c {MANIFEST} >/dev/null; rm {MANIFEST}; "
+            f"mv -f * {directory}/; "
+            f"find {directory} -maxdepth 1 -type f -mtime +{self.max_age_days} -delete 2>/dev/null || true"
+        )
+
+    async def _archive(self, scripts: List[CachedScript]) -> bytes:
+        buffer = io.BytesIO()
+        manifest = "".join(f"{script.sha256}  {script.sha256}\n" for script in scripts).encode()
+        now = int(time.time())  # the age-based prune on the host reads mtimes from the archive
+        with tarfile.open(fileobj=buffer, mode="w", format=tarfile.USTAR_FORMAT) as archive:
+            for name, content in [(MANIFEST, manifest)] + [(s.sha256, await self._content(s)) for s in scripts]:
+                member = tarfile.TarInfo(name)
+                member.size = len(content)
+                member.mode = 0o600
+                member.mtime = now
+                archive.addfile(member, io.BytesIO(content))
+        return buffer.getvalue()
+
+    async def ensure(self, key: PoolKey, scripts: Iterable[CachedScript]) -> Dict[str, str]:
+        """
+        Make scripts available on a host
+
+        Returns:
+            Script id -> path of the cached copy on the host
+
+        Raises:
+            ScriptCacheError: If the probe or upload fails
+        """
+        scripts = list(scripts)
+        by_digest = {script.sha256: script for script in scripts}
+        if not by_digest:
+            return {}
+
+        async with self.pool.connection(key) as connection:
+            self._probes += 1
+            probe = await asyncio.wait_for(
+                connection.run(self._probe_command(sorted(by_digest)), check=False),
+                ROUND_TRIP_TIMEOUT
+            )
+            if probe.exit_status != 0:
+                raise ScriptCacheError(f"Cache probe failed on {key}: {(probe.stderr or '').strip()}")
+            present = set((probe.stdout or "").split()) & set(by_digest)
+            missing = [by_digest[digest] for digest in sorted(set(by_digest) - present)]
+
+            self._hits += len(present)
+            self._misses += len(missing)
+            self._bytes_saved += sum(by_digest[digest].size for digest in present)
+
+            if missing:
+                archive = await self._archive(missing)
+                upload = await asyncio.wait_for(
+                    connection.run(self._upload_command(), input=archive, encoding=None, check=False),
+                    ROUND_TRIP_TIMEOUT
+                )
+                if upload.exit_status != 0:
+                    stderr = upload.stderr.decode(errors="replace") if upload.stderr else ""
+                    raise ScriptCacheError(f"Script upload failed on {key}: {stderr.strip()}")
+                self._uploads += 1
+                self._bytes_uploaded += len(archive)
+
+        return {script.id: self.remote_path(script.sha256) for script in scripts}
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "probes": self._probes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            "uploads": self._uploads,
+            "bytes_uploaded": self._bytes_uploaded,
+            "bytes_saved": self._bytes_saved,
+            "local_cache_bytes": self._content_bytes,
+        }
+
+
+_cache: Optional[ScriptCache] = None
+
+
+def init_script_cache(pool: SSHConnectionPool, reader: GitObjectReader, **kwargs) -> ScriptCache:
+    """Create the shared script cache"""
+    global _cache
+    _cache = ScriptCache(pool, reader, **kwargs)
+    return _cache
+
+
+def get_script_cache() -> ScriptCache:
+    """Get the shared script cache"""
+    if _cache is None:
+        raise RuntimeError("Script cache not initialized, call init_script_cache() first")
+    return _cache
@@ -0,0 +1,476 @@
+"""
+LinkOps - SSH Connection Pool
+Keyed asyncssh connections shared by operations, enrollment checks, health sweeps and terminals
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+import asyncssh
+from services.inventory_index import get_inventory_index
+
+DEFAULT_MAX_PER_HOST = 4          # connections per host:port, across users and keys
+DEFAULT_MAX_CHANNELS = 8          # sessions per connection; OpenSSH MaxSessions defaults to 10
+DEFAULT_MAX_JUMP_CHANNELS = 64    # tunnels through one jump host connection
+DEFAULT_IDLE_TIMEOUT = 300.0      # close connections unused for this long
+DEFAULT_KEEPALIVE_INTERVAL = 30.0
+DEFAULT_KEEPALIVE_COUNT_MAX = 3
+HANDSHAKE_SAMPLES = 200
+
+# Errors after which a connection must not be handed out again
+CONNECTION_ERRORS = (asyncssh.ConnectionLost, asyncssh.DisconnectError, ConnectionError, BrokenPipeError)
+
+
+class PoolKey(NamedTuple):
+    """
+    Connections are only shared between identical login identities
+
+    via is the key of the jump host the connection is tunnelled through,
+    itself possibly behind another jump host.
+    """
+    host: str
+    port: int
+    user: str
+    key_ref: Optional[str]
+    via: Optional["PoolKey"] = None
+
+    @classmethod
+    def for_machine(cls, machine, index=None, _seen: FrozenSet[str] = frozenset()) -> "PoolKey":
+        """
+        Key for a MachineRecord, including its ProxyJump chain
+
+        ProxyJump hops that are machine ids in the inventory index use that
+        machine's address, credentials and own jump host; other hops are
+        read as [user@]host[:port] with this machine's user and key.
+
+        Raises:
+            ValueError: If the chain loops or a hop cannot be parsed
+        """
+        key = cls(machine.host, int(machine.port or 22), machine.user, machine.ssh_key_ref)
+        if machine.proxy_jump:
+            key = key._replace(via=jump_chain(machine.proxy_jump, key, index, _seen | {machine.id}))
+        return key
+
+    def __str__(self) -> str:
+        target = f"{self.user}@{self.host}:{self.port}"
+        return f"{target} via {self.via}" if self.via is not None else target
+
+
+def parse_hop(hop: str, target: PoolKey) -> PoolKey:
+    """[user@]host[:port] or [user@][ipv6]:port"""
+    user, _, address = hop.rpartition("@")
+    if address.startswith("["):
+        host, _, rest = address[1:].partition("]")
+        port = rest.lstrip(":")
+    else:
+        host, _, port = address.partition(":")
+    if not host or (port and not port.isdigit()):
+        raise ValueError(f"Invalid ProxyJump hop '{hop}'")
+    return PoolKey(host, int(port or 22), user or target.user, target.key_ref)
+
+
+def jump_chain(proxy_jump: str, target: PoolKey, index=None, seen: FrozenSet[str] = frozenset()) -> Optional[PoolKey]:
+    """Key of the last hop of a comma-separated ProxyJump list, with earlier hops in via"""
+    via = None
+    for hop in (part.strip() for part in proxy_jump.split(",")):
+        if not hop:
+            continue
+        machine = index.get(hop) if index is not None else None
+        if machine is not None:
+            if hop in seen:
+                raise ValueError(f"ProxyJump loop through '{hop}'")
+            hop_key = PoolKey.for_machine(machine, index, seen)
+            if via is not None:
+                # An explicit chain position overrides the hop's own jump host
+                hop_key = hop_key._replace(via=via)
+        else:
+            hop_key = parse_hop(hop, target)._replace(via=via)
+        via = hop_key
+    return via
+
+
+class _Pooled:
+    __slots__ = ("connection", "key", "created", "last_used", "in_use", "tunnels", "closed", "jump", "children")
+
+    def __init__(self, connection: asyncssh.SSHClientConnection, key: PoolKey, jump: Optional["_Pooled"] = None):
+        self.connection = connection
+        self.key = key
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.in_use = 0
+        self.tunnels = 0
+        self.closed = False
+        self.jump = jump
+        self.children: Set["_Pooled"] = set()
+
+    @property
+    def idle(self) -> bool:
+        return self.in_use == 0 and self.tunnels == 0
+
+
+class _HostState:
+    __slots__ = ("connections", "connecting", "condition")
+
+    def __init__(self):
+        self.connections: List[_Pooled] = []
+        self.connecting: Dict[PoolKey, int] = {}
+        self.condition = asyncio.Condition()
+
+
+class SSHConnectionPool:
+    """
+    One set of SSH connections for every component that talks to machines
+
+    A lease reserves a channel slot on a connection for its key; up to
+    max_channels leases share one connection (each runs its own session),
+    and a host gets at most max_per_host connections in total. Further
+    callers wait for a slot instead of handshaking. Connections are kept
+    alive with SSH keepalives, dropped as soon as they close, and evicted
+    after idle_timeout without a lease.
+
+    Machines behind a jump host are reached through a tunnel on that jump
+    host's pooled connection instead of a connection of their own to it.
+    Each tunnelled connection holds one of the jump host's
+    max_jump_channels tunnel slots for as long as it stays open; a jump
+    host only ever gets one connection for tunnels, and when its slots run
+    out, idle child connections are closed to free them. Chains nest: a
+    jump host behind another jump host is itself a tunnelled connection.
+    """
+
+    def __init__(self, keys_directory: str, known_hosts: Optional[str] = None,
+                 connect_timeout: float = 10.0,
+                 max_per_host: int = DEFAULT_MAX_PER_HOST,
+                 max_channels: int = DEFAULT_MAX_CHANNELS,
+                 max_jump_channels: int = DEFAULT_MAX_JUMP_CHANNELS,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 keepalive_interval: float = DEFAULT_KEEPALIVE_INTERVAL,
+                 keepalive_count_max: int = DEFAULT_KEEPALIVE_COUNT_MAX):
+        self.keys_directory = keys_directory
+        self.known_hosts = known_hosts
+        self.connect_timeout = connect_timeout
+        self.max_per_host = max_per_host
+        self.max_channels = max_channels
+        self.max_jump_channels = max_jump_channels
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_count_max = keepalive_count_max
+        self._hosts: Dict[Tuple[str, int], _HostState] = {}
+        self._watchers: Set[asyncio.Task] = set()
+        self._reaper: Optional[asyncio.Task] = None
+        self._closing = False
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._handshake_failures = 0
+        self._evicted_idle = 0
+        self._evicted_dead = 0
+        self._handshakes: Deque[float] = deque(maxlen=HANDSHAKE_SAMPLES)
+        self._handshake_count = 0
+        self._tunnels_opened = 0
+
+    def start(self):
+        """Start idle eviction"""
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+    def _connect_options(self, key: PoolKey) -> Dict[str, Any]:
+        options = {
+            "host": key.host,
+            "port": key.port,
+            "username": key.user,
+            "known_hosts": self.known_hosts,
+            "keepalive_interval": self.keepalive_interval,
+            "keepalive_count_max": self.keepalive_count_max,
+            "connect_timeout": self.connect_timeout,
+        }
+        if key.key_ref:
+            options["client_keys"] = [os.path.join(self.keys_directory, key.key_ref)]
+        return options
+
+    async def _connect(self, key: PoolKey,
+                       tunnel: Optional[asyncssh.SSHClientConnection] = None) -> asyncssh.SSHClientConnection:
+        options = self._connect_options(key)
+        if tunnel is not None:
+            options["tunnel"] = tunnel
+        return await asyncssh.connect(**options)
+
+    @asynccontextmanager
+    async def connection(self, key: PoolKey) -> AsyncIterator[asyncssh.SSHClientConnection]:
+        """
+        Lease a connection for key; open sessions on it inside the block
+
+        Raises:
+            asyncssh.Error / OSError: If a new connection cannot be established
+        """
+        pooled = await self._acquire(key)
+        broken = False
+        try:
+            yield pooled.connection
+        except CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            await self._release(pooled, broken)
+
+    async def run(self, key: PoolKey, command: str, timeout: Optional[float] = None,
+                  **kwargs) -> asyncssh.SSHCompletedProcess:
+        """Run one command on a pooled connection"""
+        async with self.connection(key) as connection:
+            return await connection.run(command, timeout=timeout, **kwargs)
+
+    async def _acquire(self, key: PoolKey, tunnel: bool = False) -> _Pooled:
+        """Reserve a session slot, or with tunnel=True a tunnel slot on a jump host"""
+        if self._closing:
+            raise RuntimeError("SSH connection pool is closed")
+        state = self._hosts.setdefault((key.host, key.port), _HostState())
+
+        waited = False
+        async with state.condition:
+            while True:
+                if tunnel:
+                    available = [
+                        pooled for pooled in state.connections
+                        if pooled.key == key and not pooled.closed and pooled.tunnels < self.max_jump_channels
+                    ]
+                else:
+                    available = [
+                        pooled for pooled in state.connections
+                        if pooled.key == key and not pooled.closed and pooled.in_use < self.max_channels
+                    ]
+                if available:
+                    # Least loaded first, so sessions spread over the host's connections
+                    pooled = min(available, key=lambda candidate: candidate.in_use + candidate.tunnels)
+                    if tunnel:
+                        pooled.tunnels += 1
+                    else:
+                        pooled.in_use += 1
+                    self._hits += 1
+                    return pooled
+
+                connecting = sum(state.connecting.values())
+                has_connection = state.connecting.get(key, 0) > 0 or any(
+                    pooled.key == key and not pooled.closed for pooled in state.connections
+                )
+                if tunnel and has_connection:
+                    # One connection per jump host: free a slot held by an idle child
+                    self._close_idle_child(state, key)
+                elif len(state.connections) + connecting < self.max_per_host:
+                    state.connecting[key] = state.connecting.get(key, 0) + 1
+                    break
+                else:
+                    # Host is at its cap; an idle connection for another identity can make room
+                    idle = [pooled for pooled in state.connections if pooled.idle]
+                    if idle:
+                        self._discard(state, min(idle, key=lambda candidate: candidate.last_used))
+                        self._evicted_idle += 1
+                        continue
+
+                if not waited:
+                    waited = True
+                    self._waits += 1
+                await state.condition.wait()
+
+        jump = None
+        try:
+            if key.via is not None:
+                jump = await self._acquire(key.via, tunnel=True)
+            started = time.perf_counter()
+            connection = await self._connect(key, jump.connection if jump is not None else None)
+        except BaseException:
+            if jump is not None:
+                await self._release(jump, False, tunnel=True)
+            async with state.condition:
+                state.connecting[key] -= 1
+                state.condition.notify_all()
+            self._handshake_failures += 1
+            raise
+
+        self._handshakes.append((time.perf_counter() - started) * 1000)
+        self._handshake_count += 1
+        self._misses += 1
+        pooled = _Pooled(connection, key, jump)
+        if jump is not None:
+            jump.children.add(pooled)
+            self._tunnels_opened += 1
+        if tunnel:
+            pooled.tunnels = 1
+        else:
+            pooled.in_use = 1
+        async with state.condition:
+            state.connecting[key] -= 1
+            state.connections.append(pooled)
+            state.condition.notify_all()
+
+        watcher = asyncio.create_task(self._watch(state, pooled))
+        self._watchers.add(watcher)
+        watcher.add_done_callback(self._watchers.discard)
+        return pooled
+
+    async def _release(self, pooled: _Pooled, broken: bool, tunnel: bool = False):
+        state = self._hosts[(pooled.key.host, pooled.key.port)]
+        async with state.condition:
+            if tunnel:
+                pooled.tunnels -= 1
+            else:
+                pooled.in_use -= 1
+            pooled.last_used = time.monotonic()
+            if (broken or pooled.closed or self._closing) and pooled in state.connections:
+                self._discard(state, pooled)
+                self._evicted_dead += 1
+            state.condition.notify_all()
+
+        if pooled.jump is not None and pooled.idle:
+            # Callers waiting for a tunnel slot on the jump host can now close this child
+            jump_state = self._hosts[(pooled.jump.key.host, pooled.jump.key.port)]
+            async with jump_state.condition:
+                jump_state.condition.notify_all()
+
+    def _discard(self, state: _HostState, pooled: _Pooled):
+        """Remove from the pool and close; callers hold state.condition"""
+        state.connections.remove(pooled)
+        pooled.closed = True
+        pooled.connection.close()
+
+    def _close_idle_child(self, state: _HostState, key: PoolKey):
+        """
+        Close one idle connection tunnelled through key's jump connection
+
+        The child is only marked and closed here; its watcher removes it
+        from its own host and returns the tunnel slot, waking the waiter.
+        """
+        for jump in state.connections:
+            if jump.key != key:
+                continue
+            idle = [child for child in jump.children if child.idle and not child.closed]
+            if idle:
+                child = min(idle, key=lambda candidate: candidate.last_used)
+                child.closed = True
+                child.connection.close()
+                self._evicted_idle += 1
+                return
+
+    async def _watch(self, state: _HostState, pooled: _Pooled):
+        """
+        Drop a connection as soon as the server or a failed keepalive closes it
+
+        Connections tunnelled through it are closed too: their transport is
+        gone, and leaving them pooled would hand out dead connections. Their
+        own watchers then return the tunnel slots.
+        """
+        await pooled.connection.wait_closed()
+        async with state.condition:
+            if pooled in state.connections:
+                pooled.closed = True
+                if pooled.idle:
+                    state.connections.remove(pooled)
+                    self._evicted_dead += 1
+                state.condition.notify_all()
+        for child in list(pooled.children):
+            if not child.closed:
+                child.closed = True
+                child.connection.close()
+        if pooled.jump is not None:
+            pooled.jump.children.discard(pooled)
+            await self._release(pooled.jump, False, tunnel=True)
+
+    async def _reap_idle(self):
+        interval = max(1.0, min(self.idle_timeout / 2, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for state in list(self._hosts.values()):
+                async with state.condition:
+                    for pooled in list(state.connections):
+                        if pooled.idle and now - pooled.last_used >= self.idle_timeout:
+                            self._discard(state, pooled)
+                            self._evicted_idle += 1
+                    if state.connections:
+                        state.condition.notify_all()
+
+    async def close(self):
+        """Close every connection; leases still held are closed on release"""
+        self._closing = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        connections = []
+        for state in self._hosts.values():
+            async with state.condition:
+                for pooled in list(state.connections):
+                    if pooled.idle:
+                        state.connections.remove(pooled)
+                    pooled.closed = True
+                    pooled.connection.close()
+                    connections.append(pooled.connection)
+                state.condition.notify_all()
+        await asyncio.gather(*(connection.wait_closed() for connection in connections), return_exceptions=True)
+        for watcher in list(self._watchers):
+            watcher.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Reuse, handshake cost and current pool size"""
+        handshakes = sorted(self._handshakes)
+        connections = [pooled for state in self._hosts.values() for pooled in state.connections]
+        leases = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / leases, 3) if leases else 0.0,
+            "waits": self._waits,
+            "handshakes": self._handshake_count,
+            "handshake_failures": self._handshake_failures,
+            "handshake_avg_ms": round(sum(handshakes) / len(handshakes), 1) if handshakes else None,
+            "handshake_p95_ms": round(handshakes[int(len(handshakes) * 0.95)], 1) if handshakes else None,
+            "connections": len(connections),
+            "hosts": sum(1 for state in self._hosts.values() if state.connections),
+            "channels_in_use": sum(pooled.in_use for pooled in connections),
+            "tunnels_open": sum(pooled.tunnels for pooled in connections),
+            "tunnels_opened": self._tunnels_opened,
+            "jump_hosts": sum(1 for pooled in connections if pooled.tunnels),
+            "evicted_idle": self._evicted_idle,
+            "evicted_dead": self._evicted_dead,
+        }
+
+
+def machine_key(machine_id: str) -> PoolKey:
+    """
+    Pool key for an inventory machine, with its jump chain resolved through the index
+
+    Raises:
+        KeyError: If the machine is not in the inventory
+        ValueError: If its ProxyJump chain loops or cannot be parsed
+    """
+    index = get_inventory_index()
+    machine = index.get(machine_id)
+    if machine is None:
+        raise KeyError(machine_id)
+    return PoolKey.for_machine(machine, index)
+
+
+_pool: Optional[SSHConnectionPool] = None
+
+
+def init_ssh_pool(keys_directory: str, **kwargs) -> SSHConnectionPool:
+    """Create and start the shared pool"""
+    global _pool
+    _pool = SSHConnectionPool(keys_directory, **kwargs)
+    _pool.start()
+    return _pool
+
+
+def get_ssh_pool() -> SSHConnectionPool:
+    """Get the shared pool"""
+    if _pool is None:
+        raise RuntimeError("SSH connection pool not initialized, call init_ssh_pool() first")
+    return _pool
+
+
+async def close_ssh_pool():
+    """Close the shared pool"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,120 @@
+"""
+LinkOps - Startup Tracker
+Startup phase timings and readiness of subsystems warmed up in the background
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Awaitable, Dict, Iterator, Optional, Set
+
+
+class StartupTracker:
+    """
+    Records what startup did and what is still warming up
+
+    Phases are the steps startup_event() blocks on before the port opens.
+    Subsystems are warmed up in background tasks after that; required ones
+    gate /ready, optional ones (the first Git sync) are only reported.
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self.started_at = datetime.utcnow()
+        self.phases: Dict[str, float] = {}
+        self.subsystems: Dict[str, Dict[str, Any]] = {}
+        self.serving_after_ms: Optional[float] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._origin) * 1000, 2)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a blocking startup step"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def mark_ready(self, name: str, required: bool = True):
+        """Record a subsystem that is usable as soon as its phase finished"""
+        now = self._elapsed_ms()
+        self.subsystems[name] = {
+            "status": "ready", "required": required, "started_ms": now, "duration_ms": 0.0, "error": None,
+        }
+
+    def background(self, name: str, awaitable: Awaitable[Any], required: bool = False) -> asyncio.Task:
+        """Warm a subsystem up in a background task and track the outcome"""
+        entry = {
+            "status": "warming", "required": required, "started_ms": self._elapsed_ms(),
+            "duration_ms": None, "error": None,
+        }
+        self.subsystems[name] = entry
+
+        async def run():
+            started = time.perf_counter()
+            try:
+                await awaitable
+                entry["status"] = "ready"
+            except asyncio.CancelledError:
+                entry["status"] = "cancelled"
+                raise
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+                print(f"Startup: {name} failed: {e}")
+            finally:
+                entry["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def serving(self):
+        """Mark the end of the blocking part of startup"""
+        self.serving_after_ms = self._elapsed_ms()
+        breakdown = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases.items())
+        warming = [name for name, entry in self.subsystems.items() if entry["status"] == "warming"]
+        print(f"Startup: serving after {self.serving_after_ms:.0f} ms ({breakdown}); "
+              f"warming in background: {', '.join(warming) or 'nothing'}")
+
+    def is_ready(self) -> bool:
+        """Startup finished and every required subsystem is warm"""
+        return self.serving_after_ms is not None and all(
+            entry["status"] == "ready" for entry in self.subsystems.values() if entry["required"]
+        )
+
+    def readiness(self) -> Dict[str, str]:
+        """Status per subsystem, without error details"""
+        return {name: entry["status"] for name, entry in self.subsystems.items()}
+
+    def report(self) -> Dict[str, Any]:
+        """Full startup timing breakdown"""
+        return {
+            "started_at": self.started_at.isoformat(),
+            "serving_after_ms": self.serving_after_ms,
+            "phases_ms": dict(self.phases),
+            "subsystems": {name: dict(entry) for name, entry in self.subsystems.items()},
+        }
+
+    async def cancel(self):
+        """Cancel warm-up tasks that are still running (shutdown)"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_tracker: Optional[StartupTracker] = None
+
+
+def get_startup_tracker() -> StartupTracker:
+    """Get the tracker for this process's startup"""
+    global _tracker
+    if _tracker is None:
+        _tracker = StartupTracker()
+    return _tracker
@@ -0,0 +1,184 @@
+"""
+LinkOps - Git Sync Debouncer
+Coalesces bursts of sync requests (webhook pushes, polling) into single sync runs
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+DEFAULT_QUIET_PERIOD = 2.0   # seconds without a new request before syncing
+DEFAULT_MAX_DELAY = 15.0     # never hold a requested sync longer than this
+
+
+class SyncDebouncer:
+    """
+    Runs a sync function at most once per burst of requests
+
+    A request starts a timer; further requests within the quiet period
+    push it back, up to max_delay after the first one. Requests that arrive
+    while a sync is running schedule exactly one follow-up run, so a push
+    that lands mid-sync is never missed and never causes a pile-up.
+    """
+
+    def __init__(self, sync: Callable[[], Awaitable[Any]],
+                 quiet_period: float = DEFAULT_QUIET_PERIOD, max_delay: float = DEFAULT_MAX_DELAY):
+        self.sync = sync
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+        self._wakeup = asyncio.Event()
+        self._first_request: Optional[float] = None
+        self._last_request: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._immediate = False
+        self._waiters: List[asyncio.Future] = []
+        self._running = False
+        self._requests = 0
+        self._coalesced = 0
+        self._runs = 0
+        self._failures = 0
+        self._last_reason: Optional[str] = None
+        self._last_run_at: Optional[float] = None
+        self._last_duration: Optional[float] = None
+
+    def start(self):
+        """Start the background worker"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._worker())
+
+    async def stop(self):
+        """Stop the background worker; a running sync is cancelled"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def request(self, reason: str) -> bool:
+        """
+        Ask for a sync
+
+        Returns:
+            True if this request started a new burst, False if it was
+            folded into one that is already pending
+        """
+        now = time.monotonic()
+        self._requests += 1
+        self._last_reason = reason
+        self._last_request = now
+        new_burst = self._first_request is None
+        if new_burst:
+            self._first_request = now
+        else:
+            self._coalesced += 1
+        self._wakeup.set()
+        return new_burst
+
+    async def run_now(self, reason: str) -> Any:
+        """
+        Request a sync without the quiet period and wait for it
+
+        Returns the sync function's result or raises its exception. If a
+        sync is already running, this waits for the follow-up run.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._immediate = True
+        self.request(reason)
+        return await waiter
+
+    @property
+    def pending(self) -> bool:
+        return self._first_request is not None
+
+    def seconds_since_last_run(self) -> Optional[float]:
+        if self._last_run_at is None:
+            return None
+        return time.monotonic() - self._last_run_at
+
+    async def _worker(self):
+        while True:
+            await self._wakeup.wait()
+
+            # Wait for the burst to go quiet, bounded by max_delay
+            while not self._immediate:
+                now = time.monotonic()
+                quiet_at = self._last_request + self.quiet_period
+                deadline = self._first_request + self.max_delay
+                wait = min(quiet_at, deadline) - now
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            # Requests from here on belong to the next burst
+            self._wakeup.clear()
+            self._first_request = None
+            self._immediate = False
+            waiters, self._waiters = self._waiters, []
+            self._running = True
+            started = time.monotonic()
+            try:
+                result = await self.sync()
+            except Exception as e:
+                self._failures += 1
+                print(f"Git sync error: {e}")
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            else:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(result)
+            finally:
+                # Worker cancelled mid-sync (shutdown)
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.cancel()
+                self._running = False
+                self._runs += 1
+                self._last_run_at = time.monotonic()
+                self._last_duration = self._last_run_at - started
+
+    def stats(self) -> Dict[str, Any]:
+        """Request and run counters"""
+        return {
+            "requests": self._requests,
+            "runs": self._runs,
+            "coalesced": self._coalesced,
+            "failures": self._failures,
+            "pending": self.pending,
+            "running": self._running,
+            "last_reason": self._last_reason,
+            "seconds_since_last_run": (
+                round(self.seconds_since_last_run(), 1) if self._last_run_at is not None else None
+            ),
+            "last_duration_ms": round(self._last_duration * 1000, 1) if self._last_duration is not None else None,
+        }
+
+
+_debouncer: Optional[SyncDebouncer] = None
+
+
+def init_sync_debouncer(sync: Callable[[], Awaitable[Any]], **kwargs) -> SyncDebouncer:
+    """Create and start the shared debouncer"""
+    global _debouncer
+    _debouncer = SyncDebouncer(sync, **kwargs)
+    _debouncer.start()
+    return _debouncer
+
+
+def get_sync_debouncer() -> SyncDebouncer:
+    """Get the shared debouncer"""
+    if _debouncer is None:
+        raise RuntimeError("Sync debouncer not initialized, call init_sync_debouncer() first")
+    return _debouncer
+
+
+async def close_sync_debouncer():
+    """Stop the shared debouncer"""
+    global _debouncer
+    if _debouncer is not None:
+        await _debouncer.stop()
+        _debouncer = None
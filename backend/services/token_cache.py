@@ -0,0 +1,201 @@
+"""
+LinkOps - Verified Token Cache
+LRU+TTL cache of verified JWT claims with explicit revocation
+"""
+
+import hashlib
+import heapq
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from jose import jwt
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL_SECONDS = 300
+TOKEN_LIFETIME_SECONDS = 24 * 3600  # matches the expires_in login returns
+
+
+def token_digest(token: str) -> str:
+    """Cache key for a token, so raw bearer tokens are never held as keys"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _claim(token: str, name: str) -> Optional[float]:
+    try:
+        value = jwt.get_unverified_claims(token).get(name)
+    except Exception:
+        return None
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Read the exp claim of an already-verified token"""
+    return _claim(token, "exp")
+
+
+class TokenCache:
+    """
+    Cache of tokens that already passed signature and expiry checks
+
+    Entries live for at most ttl_seconds and never past the token's own exp.
+    Revoked tokens (logout) and revoked users (lockout) are checked before
+    the cache, so revocation takes effect on the next request.
+
+    Only verified tokens are revoked. A token revocation is kept until the
+    token expires (at most token_lifetime seconds) and is never dropped
+    before that, so the list holds at most one day of logouts. A user
+    revocation rejects every token of that user issued before it.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 token_lifetime: int = TOKEN_LIFETIME_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.token_lifetime = token_lifetime
+        # digest -> (username, expires_at)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        # digest -> token exp, kept until the token would have expired anyway
+        self._revoked_tokens: Dict[str, float] = {}
+        # (exp, digest) min-heap, so expired revocations are pruned without a scan
+        self._revocation_expiry: List[Tuple[float, str]] = []
+        # username -> tokens issued before this time are rejected
+        self._revoked_users: Dict[str, float] = {}
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._revoked_rejections = 0
+
+    def get(self, token: str) -> Optional[str]:
+        """Return the cached username for a token, or None on miss"""
+        digest = token_digest(token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        username, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[digest]
+            self._expired += 1
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(digest)
+        self._hits += 1
+        return username
+
+    def put(self, token: str, username: str):
+        """Cache a verified token"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        exp = token_expiry(token)
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        if expires_at <= now or self._user_revoked(token, username):
+            return
+
+        digest = token_digest(token)
+        self._entries[digest] = (username, expires_at)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _issued_at(self, token: str) -> Optional[float]:
+        issued = _claim(token, "iat")
+        if issued is None:
+            exp = token_expiry(token)
+            issued = exp - self.token_lifetime if exp is not None else None
+        return issued
+
+    def _user_revoked(self, token: str, username: str) -> bool:
+        revoked_since = self._revoked_users.get(username)
+        if revoked_since is None:
+            return False
+        issued = self._issued_at(token)
+        return issued is None or issued <= revoked_since
+
+    def is_revoked(self, token: str, username: Optional[str] = None) -> bool:
+        """Check the token and user revocation lists"""
+        revoked_exp = self._revoked_tokens.get(token_digest(token))
+        revoked = revoked_exp is not None and revoked_exp > time.time()
+        if not revoked and username is not None:
+            revoked = self._user_revoked(token, username)
+        if revoked:
+            self._revoked_rejections += 1
+        return revoked
+
+    def revoke(self, token: str):
+        """
+        Revoke a single token (logout)
+
+        The caller must have verified the token; its exp is clamped to the
+        JWT lifetime either way.
+        """
+        now = time.time()
+        self._prune_revocations(now)
+        digest = token_digest(token)
+        self._entries.pop(digest, None)
+        if digest in self._revoked_tokens:
+            return
+        exp = token_expiry(token)
+        latest = now + self.token_lifetime
+        expires_at = min(exp, latest) if exp is not None else latest
+        self._revoked_tokens[digest] = expires_at
+        heapq.heappush(self._revocation_expiry, (expires_at, digest))
+
+    def revoke_user(self, username: str):
+        """
+        Reject every token of a user issued up to now (lockout, password change)
+
+        Cached entries of the user are dropped; tokens issued later (after
+        the user logs in again) are accepted.
+        """
+        now = time.time()
+        self._prune_revocations(now)
+        self._revoked_users[username] = now
+        stale = [digest for digest, (user, _) in self._entries.items() if user == username]
+        for digest in stale:
+            del self._entries[digest]
+
+    def _prune_revocations(self, now: float):
+        """Drop revocations of tokens that have expired anyway"""
+        while self._revocation_expiry and self._revocation_expiry[0][0] <= now:
+            _, digest = heapq.heappop(self._revocation_expiry)
+            del self._revoked_tokens[digest]
+        oldest_live = now - self.token_lifetime
+        for username in [u for u, since in self._revoked_users.items() if since <= oldest_live]:
+            del self._revoked_users[username]
+
+    def clear(self):
+        """Drop all cached entries (revocations are kept)"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate counters"""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            "expired": self._expired,
+            "evictions": self._evictions,
+            "revoked_tokens": len(self._revoked_tokens),
+            "revoked_users": len(self._revoked_users),
+            "revoked_rejections": self._revoked_rejections,
+        }
+
+
+_token_cache: Optional[TokenCache] = None
+
+
+def get_token_cache() -> TokenCache:
+    """Get the shared token cache"""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache()
+    return _token_cache
@@ -0,0 +1,9 @@
+"""
+LinkOps - Test Configuration
+Puts backend/ on the import path so tests import services.*, api.* and db.* like the app does
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,103 @@
+"""
+LinkOps - Git Webhook Endpoint Tests
+Signed push deliveries for each provider through the ASGI app, and debounce coalescing
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+
+import httpx
+from fastapi import FastAPI
+
+from api import git_webhooks
+from services import sync_debouncer
+
+SECRET = "s3cret"
+PUSH = json.dumps({"ref": "refs/heads/main", "commits": []}).encode()
+
+
+def signed_headers(provider: str, body: bytes, secret: str = SECRET) -> dict:
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    if provider == "github":
+        return {"x-github-event": "push", "x-hub-signature-256": f"sha256={digest}"}
+    if provider == "gitlab":
+        return {"x-gitlab-event": "Push Hook", "x-gitlab-token": secret}
+    return {f"x-{provider}-event": "push", f"x-{provider}-signature": digest}
+
+
+async def deliver(deliveries, quiet_period: float = 0.05):
+    """POST (provider, headers, body) deliveries; returns the responses and how often sync ran"""
+    runs = []
+
+    async def sync():
+        runs.append(True)
+
+    app = FastAPI()
+    app.include_router(git_webhooks.router)
+    git_webhooks.init_webhook_secret(SECRET, "main")
+    debouncer = sync_debouncer.init_sync_debouncer(sync, quiet_period=quiet_period, max_delay=1.0)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://linkops.test") as client:
+            responses = [
+                await client.post(f"/api/git/webhook/{provider}", headers=headers, content=body)
+                for provider, headers, body in deliveries
+            ]
+        await asyncio.sleep(quiet_period * 4)
+        return responses, len(runs)
+    finally:
+        await debouncer.stop()
+
+
+def test_valid_signatures_are_accepted_for_every_provider():
+    for provider in ("github", "gitlab", "gitea", "forgejo"):
+        (response,), runs = asyncio.run(deliver([(provider, signed_headers(provider, PUSH), PUSH)]))
+        assert response.status_code == 202, provider
+        assert response.json()["queued"] is True
+        assert runs == 1
+
+
+def test_invalid_signatures_are_rejected_for_every_provider():
+    for provider in ("github", "gitlab", "gitea", "forgejo"):
+        headers = signed_headers(provider, PUSH, secret="wrong")
+        (response,), runs = asyncio.run(deliver([(provider, headers, PUSH)]))
+        assert response.status_code == 401, provider
+        assert runs == 0
+
+
+def test_tampered_body_is_rejected():
+    headers = signed_headers("github", PUSH)
+    (response,), _ = asyncio.run(deliver([("github", headers, PUSH.replace(b"main", b"evil"))]))
+    assert response.status_code == 401
+
+
+def test_non_ascii_signature_headers_are_rejected_not_errors():
+    deliveries = [
+        ("github", {"x-github-event": "push", "x-hub-signature-256": "sha256=\xe9".encode("latin-1")}, PUSH),
+        ("gitlab", {"x-gitlab-event": "Push Hook", "x-gitlab-token": "\xe9t\xe9".encode("latin-1")}, PUSH),
+        ("gitea", {"x-gitea-event": "push", "x-gitea-signature": "\xff".encode("latin-1")}, PUSH),
+    ]
+    responses, runs = asyncio.run(deliver(deliveries))
+    assert [response.status_code for response in responses] == [401, 401, 401]
+    assert runs == 0
+
+
+def test_burst_of_pushes_is_coalesced_into_one_sync():
+    deliveries = [("github", signed_headers("github", PUSH), PUSH)] * 5
+    responses, runs = asyncio.run(deliver(deliveries))
+    assert [response.json()["message"] for response in responses] == ["Sync queued"] + ["Sync already queued"] * 4
+    assert runs == 1
+    assert sync_debouncer.get_sync_debouncer().stats()["coalesced"] == 4
+
+
+def test_non_push_events_and_other_branches_are_ignored():
+    ping = dict(signed_headers("github", PUSH), **{"x-github-event": "ping"})
+    other = json.dumps({"ref": "refs/heads/feature"}).encode()
+    responses, runs = asyncio.run(deliver([
+        ("github", ping, PUSH),
+        ("gitlab", signed_headers("gitlab", other), other),
+    ]))
+    assert [response.json()["accepted"] for response in responses] == [False, False]
+    assert runs == 0
@@ -0,0 +1,74 @@
+"""
+LinkOps - Operation Event Stream Tests
+SSE endpoint against a temporary database and the shared event bus
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from api import operation_events
+from db.database import close_database, get_db, init_database
+from services.event_bus import init_event_bus
+
+
+def frames(body: str):
+    """(event, data) pairs of an SSE body, ignoring retry and comment lines"""
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith((":", "retry")))
+        if "event" in fields:
+            parsed.append((fields["event"], fields["data"]))
+    return parsed
+
+
+async def run(tmp_path, scenario):
+    await init_database(str(tmp_path / "linkops.db"), readers=1)
+    bus = init_event_bus()
+    app = FastAPI()
+    app.include_router(operation_events.router)
+    try:
+        for operation_id, state in (("op-queued", "queued"), ("op-done", "success")):
+            await get_db().execute(
+                "INSERT INTO operations (id, scripts, targets, status) VALUES (?, '[]', '[]', ?)",
+                (operation_id, state)
+            )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://linkops.test") as client:
+            return await scenario(client, bus)
+    finally:
+        await close_database()
+
+
+def test_viewer_of_a_queued_operation_waits_for_its_events(tmp_path):
+    async def scenario(client, bus):
+        response = asyncio.create_task(client.get("/api/operations/op-queued/events"))
+        await asyncio.sleep(0.2)
+        assert not response.done()  # not closed with the queued status
+
+        bus.publish("op-queued", "script_start", {"target": "vm-1", "script": "install"})
+        bus.complete("op-queued", {"operationId": "op-queued", "status": "success"})
+        return await asyncio.wait_for(response, 5)
+
+    response = asyncio.run(run(tmp_path, scenario))
+    assert response.status_code == 200
+    assert [event for event, _ in frames(response.text)] == ["script_start", "operation_complete"]
+    assert '"status":"success"' in response.text
+
+
+def test_finished_operation_gets_its_final_status_only(tmp_path):
+    async def scenario(client, bus):
+        return await client.get("/api/operations/op-done/events")
+
+    response = asyncio.run(run(tmp_path, scenario))
+    assert frames(response.text) == [
+        ("operation_complete", '{"operationId":"op-done","status":"success","replay":false}')
+    ]
+
+
+def test_unknown_operation_is_not_found(tmp_path):
+    async def scenario(client, bus):
+        return await client.get("/api/operations/missing/events")
+
+    assert asyncio.run(run(tmp_path, scenario)).status_code == 404
@@ -0,0 +1,99 @@
+"""
+LinkOps - Enrollment Batch Verifier Tests
+Shared in-flight checks against a fake SSH pool and a temporary database
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from db.database import close_database, get_db, init_database
+from parsers.yaml_parser import MachineRecord
+from services import inventory_index
+from services.enrollment_batch import EnrollmentBatchVerifier
+from services.inventory_index import InventoryIndex
+
+CLIENT_ID = "LINKOPS-8f3a2c6d-1b7e-4c7a-9c2a-3f1a7d2c9c10"
+
+
+class FakePool:
+    """Answers `cat` with the client ID once the gate opens"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.commands = []
+
+    async def run(self, key, command, check=True):
+        self.commands.append((key.host, command))
+        await self.gate.wait()
+        return SimpleNamespace(exit_status=0, stdout=f"{CLIENT_ID}\n")
+
+
+@pytest.fixture(autouse=True)
+def inventory(monkeypatch):
+    machines = [
+        MachineRecord(machine_id, machine_id, "VM", None, host, 22, "root", (), True,
+                      CLIENT_ID, "prod_ed25519", None, None, None)
+        for machine_id, host in (("vm-web-01", "192.168.1.11"), ("vm-web-02", "192.168.1.12"))
+    ]
+    monkeypatch.setattr(inventory_index, "_index", InventoryIndex(machines))
+    return machines
+
+
+async def with_database(tmp_path, scenario):
+    await init_database(str(tmp_path / "linkops.db"), readers=1)
+    try:
+        for machine_id in ("vm-web-01", "vm-web-02"):
+            await get_db().execute(
+                "INSERT INTO machines (id, name, type, host, port, user, ssh_key_ref, client_id, enrollment_required)"
+                " VALUES (?, ?, 'VM', '192.168.1.1', 22, 'root', 'prod_ed25519', ?, TRUE)",
+                (machine_id, machine_id, CLIENT_ID)
+            )
+        return await scenario()
+    finally:
+        await close_database()
+
+
+def test_cancelled_caller_does_not_fail_callers_sharing_its_checks(tmp_path):
+    async def scenario():
+        pool = FakePool()
+        verifier = EnrollmentBatchVerifier(pool)
+        first = asyncio.create_task(verifier.verify_batch(["vm-web-01", "vm-web-02"]))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(verifier.verify("vm-web-01"))
+        await asyncio.sleep(0.05)
+
+        first.cancel()
+        await asyncio.sleep(0.05)
+        pool.gate.set()
+        result = await asyncio.wait_for(second, 5)
+
+        await asyncio.wait_for(asyncio.gather(*verifier._running_batches), 5)
+        rows = await get_db().fetch_all("SELECT id, enrolled FROM machines ORDER BY id")
+        return first, result, len(pool.commands), verifier.stats(), [(row["id"], bool(row["enrolled"])) for row in rows]
+
+    first, result, checks, stats, rows = asyncio.run(with_database(tmp_path, scenario))
+    assert first.cancelled()
+    assert result.enrolled and result.cached and result.error is None
+    assert checks == 2  # the second caller joined the first caller's check
+    # The batch outlived the caller that launched it: results were cached and stored
+    assert stats["cache_entries"] == 2 and stats["rows_written"] == 2
+    assert rows == [("vm-web-01", True), ("vm-web-02", True)]
+
+
+def test_results_are_cached_until_forced(tmp_path):
+    async def scenario():
+        pool = FakePool()
+        pool.gate.set()
+        verifier = EnrollmentBatchVerifier(pool)
+        fresh = await verifier.verify("vm-web-01")
+        cached = await verifier.verify("vm-web-01")
+        forced = await verifier.verify("vm-web-01", force=True)
+        return fresh, cached, forced, len(pool.commands)
+
+    fresh, cached, forced, checks = asyncio.run(with_database(tmp_path, scenario))
+    assert fresh.enrolled and not fresh.cached
+    assert cached.enrolled and cached.cached
+    assert not forced.cached
+    assert checks == 2
@@ -0,0 +1,167 @@
+"""
+LinkOps - Event Bus Tests
+Resume, gaps, lag policies and reaping of the shared per-operation event logs
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from services import event_bus
+from services.event_bus import LAG_DROP, LAG_SAMPLE, OUTPUT, REAP_INTERVAL, SCRIPT_COMPLETE, SCRIPT_START, EventBus
+
+
+class Clock:
+    """Stands in for time.monotonic inside the event bus module only"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(event_bus, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def parse(chunks):
+    """(id, event, data) of every event frame, skipping retry and ping lines"""
+    frames = []
+    for block in b"".join(chunks).decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith((":", "retry")))
+        if "event" in fields:
+            frames.append((int(fields["id"]) if "id" in fields else None, fields["event"], json.loads(fields["data"])))
+    return frames
+
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def publish_script(bus, operation_id, lines):
+    bus.publish(operation_id, SCRIPT_START, {"target": "vm-1", "script": "install"})
+    for n in range(lines):
+        bus.publish(operation_id, OUTPUT, {"target": "vm-1", "line": n})
+    bus.publish(operation_id, SCRIPT_COMPLETE, {"target": "vm-1", "exitCode": 0})
+
+
+def test_reconnect_resumes_after_last_event_id():
+    async def scenario():
+        bus = EventBus()
+        publish_script(bus, "op-1", 3)
+        bus.complete("op-1", {"status": "success"})
+        log = bus.get("op-1")
+        return await collect(bus.stream(log, last_event_id=3)), await collect(bus.stream(log)), bus.stats()
+
+    resumed, replayed, stats = asyncio.run(scenario())
+    assert [(seq, event) for seq, event, _ in parse(resumed)] == [(4, OUTPUT), (5, SCRIPT_COMPLETE), (6, "operation_complete")]
+    assert [seq for seq, _, _ in parse(replayed)] == [1, 2, 3, 4, 5, 6]
+    assert stats["resumed"] == 1
+
+
+def test_subscriber_behind_the_retained_window_gets_a_gap_event():
+    async def scenario():
+        bus = EventBus(retention=3)
+        publish_script(bus, "op-1", 3)
+        bus.complete("op-1", {"status": "success"})
+        return await collect(bus.stream(bus.get("op-1"), last_event_id=1)), bus.stats()
+
+    chunks, stats = asyncio.run(scenario())
+    frames = parse(chunks)
+    assert frames[0] == (None, "gap", {"missed": 2, "resumeFrom": 4})
+    assert [seq for seq, _, _ in frames[1:]] == [4, 5, 6]
+    assert stats["gaps"] == 1
+
+
+def test_sampled_subscriber_skips_output_but_keeps_lifecycle_events():
+    async def scenario():
+        bus = EventBus(max_lag=3, lag_policy=LAG_SAMPLE)
+        publish_script(bus, "op-1", 10)
+        stream = asyncio.create_task(collect(bus.stream(bus.get("op-1"))))
+        await asyncio.sleep(0.05)
+        bus.complete("op-1", {"status": "success"})
+        return await asyncio.wait_for(stream, 5), bus.stats()
+
+    chunks, stats = asyncio.run(scenario())
+    assert [event for _, event, _ in parse(chunks)] == [SCRIPT_START, SCRIPT_COMPLETE, "operation_complete"]
+    assert stats["sampled"] == 10
+
+
+def test_finished_log_is_replayed_in_full_whatever_the_lag():
+    async def scenario():
+        bus = EventBus(max_lag=3, lag_policy=LAG_DROP)
+        publish_script(bus, "op-1", 10)
+        bus.complete("op-1", {"status": "success"})
+        return await collect(bus.stream(bus.get("op-1")))
+
+    assert len(parse(asyncio.run(scenario()))) == 13
+
+
+def test_dropped_subscriber_is_told_where_to_resume():
+    async def scenario():
+        bus = EventBus(max_lag=3, lag_policy=LAG_DROP)
+        publish_script(bus, "op-1", 10)
+        chunks = await asyncio.wait_for(collect(bus.stream(bus.get("op-1"), last_event_id=1)), 5)
+        return chunks, bus.stats()
+
+    chunks, stats = asyncio.run(scenario())
+    assert parse(chunks) == [(None, "lagged", {"behind": 11, "resumeFrom": 2})]
+    assert stats["dropped"] == 1
+
+
+def test_finished_log_is_reaped_after_linger_once_unwatched(clock):
+    bus = EventBus(linger=60)
+    bus.complete("op-1", {"status": "success"})
+    log = bus.get("op-1")
+
+    clock.advance(59)
+    assert bus.get("op-1") is log
+
+    log.subscribers += 1  # a viewer still replaying it
+    clock.advance(REAP_INTERVAL)
+    assert bus.get("op-1") is log
+
+    log.subscribers -= 1
+    clock.advance(REAP_INTERVAL)
+    assert bus.get("op-1") is None
+    assert bus.stats()["operations"] == 0
+
+
+def test_live_log_without_events_expires_and_ends_its_streams(clock):
+    async def scenario():
+        bus = EventBus(idle_expiry=600)
+        # Opened for an operation row stuck in "running" after a crash
+        log = bus.open("op-stale")
+        stream = asyncio.create_task(collect(bus.stream(log, heartbeat=0.02)))
+        await asyncio.sleep(0.1)
+        assert not stream.done()  # pinging while within idle_expiry
+
+        clock.advance(601)
+        chunks = await asyncio.wait_for(stream, 5)
+        fresh = bus.open("op-stale")
+        return chunks, log, fresh, bus.stats()
+
+    chunks, log, fresh, stats = asyncio.run(scenario())
+    assert parse(chunks) == []
+    assert b": ping" in b"".join(chunks)
+    assert log.expired and fresh is not log  # a later publish or viewer gets a new log
+    assert stats["expired"] == 1
+
+
+def test_events_keep_a_live_log_from_expiring(clock):
+    bus = EventBus(idle_expiry=600)
+    bus.open("op-1")
+    for _ in range(3):
+        clock.advance(400)
+        bus.publish("op-1", OUTPUT, {"line": "still working"})
+    assert not bus.get("op-1").expired
+    assert bus.stats()["expired"] == 0
@@ -0,0 +1,123 @@
+"""
+LinkOps - Git Mirror Tests
+Shallow, blob-filtered sparse clone, fetch and gc against a local bare repository
+"""
+
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+from services.git_mirror import GitMirror, GitMirrorError
+
+GIT_ENV = dict(
+    os.environ,
+    GIT_AUTHOR_NAME="LinkOps", GIT_AUTHOR_EMAIL="linkops@example.test",
+    GIT_COMMITTER_NAME="LinkOps", GIT_COMMITTER_EMAIL="linkops@example.test",
+)
+
+
+def git(*args: str, cwd=None) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def write(root, path: str, content: str):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(content)
+
+
+def push(work, message: str) -> str:
+    git("add", "-A", cwd=work)
+    git("commit", "-q", "-m", message, cwd=work)
+    git("push", "-q", "origin", "main", cwd=work)
+    return git("rev-parse", "HEAD", cwd=work)
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Bare repository with two commits of config plus files the mirror should not check out"""
+    bare = tmp_path / "config.git"
+    git("init", "-q", "--bare", "-b", "main", str(bare))
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    git("config", "uploadpack.allowAnySHA1InWant", "true", cwd=bare)
+
+    work = tmp_path / "work"
+    git("clone", "-q", str(bare), str(work))
+    git("checkout", "-q", "-b", "main", cwd=work)
+    write(work, "links.yaml", "links: {}\n")
+    write(work, "scripts.yaml", "scripts: {}\n")
+    write(work, "docs/guide.md", "# Guide\n")
+    push(work, "Old configuration")
+    write(work, "scripts/install.sh", "#!/bin/sh\necho install\n")
+    write(work, "links.d/web.yaml", "web: {}\n")
+    head = push(work, "Initial configuration")
+    return {"url": f"file://{bare}", "work": work, "head": head}
+
+
+def test_clone_is_shallow_blob_filtered_and_sparse(tmp_path, remote):
+    mirror = GitMirror(remote["url"], "main", str(tmp_path / "mirror"))
+    result = asyncio.run(mirror.sync())
+    path = mirror.repo_path
+
+    assert result.success and result.cloned
+    assert result.commit_hash == remote["head"]
+    assert git("rev-parse", "--is-shallow-repository", cwd=path) == "true"
+    assert git("rev-list", "--count", "HEAD", cwd=path) == "1"
+    assert git("config", "remote.origin.partialclonefilter", cwd=path) == "blob:none"
+
+    # Sparse cone: top-level files and the listed directories only
+    assert os.path.isfile(os.path.join(path, "links.yaml"))
+    assert os.path.isfile(os.path.join(path, "scripts", "install.sh"))
+    assert os.path.isfile(os.path.join(path, "links.d", "web.yaml"))
+    assert not os.path.exists(os.path.join(path, "docs"))
+
+
+def test_fetch_picks_up_a_new_commit(tmp_path, remote):
+    mirror = GitMirror(remote["url"], "main", str(tmp_path / "mirror"))
+    asyncio.run(mirror.sync())
+
+    unchanged = asyncio.run(mirror.sync())
+    assert not unchanged.cloned and not unchanged.changed
+
+    write(remote["work"], "scripts/install.sh", "#!/bin/sh\necho v2\n")
+    new_head = push(remote["work"], "Update install script")
+    result = asyncio.run(mirror.sync())
+
+    assert result.changed
+    assert result.previous_hash == remote["head"] and result.commit_hash == new_head
+    with open(os.path.join(mirror.repo_path, "scripts", "install.sh")) as f:
+        assert f.read() == "#!/bin/sh\necho v2\n"
+    assert git("rev-list", "--count", "HEAD", cwd=mirror.repo_path) == "1"
+    assert mirror.stats()["fetches"] == 3
+
+
+def test_gc_repacks_and_keeps_the_checkout(tmp_path, remote):
+    mirror = GitMirror(remote["url"], "main", str(tmp_path / "mirror"), gc_interval_hours=0)
+
+    async def run():
+        await mirror.sync()
+        write(remote["work"], "links.yaml", "links: {web: {}}\n")
+        push(remote["work"], "Add web")
+        await mirror.sync()
+        assert mirror.gc_due()
+        assert await mirror.maybe_gc() is True
+        return await mirror.disk_usage()
+
+    disk = asyncio.run(run())
+    assert mirror.stats()["gc_runs"] == 1
+    assert mirror.stats()["fetches_since_gc"] == 0
+    assert disk["loose_objects"] == 0 and disk["packs"] >= 1
+    assert git("status", "--porcelain", cwd=mirror.repo_path) == ""
+    assert git("rev-parse", "HEAD", cwd=mirror.repo_path) == mirror.stats()["head"]
+
+
+def test_missing_remote_raises_and_counts_a_failure(tmp_path):
+    mirror = GitMirror(f"file://{tmp_path}/missing.git", "main", str(tmp_path / "mirror"))
+    with pytest.raises(GitMirrorError):
+        asyncio.run(mirror.sync())
+    assert mirror.stats()["failures"] == 1
@@ -0,0 +1,87 @@
+"""
+LinkOps - Git Object Reader Tests
+Persistent cat-file channels against a local repository, including cancelled requests
+"""
+
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+from services.git_object_reader import GitObjectError, GitObjectReader
+
+GIT_ENV = dict(
+    os.environ,
+    GIT_AUTHOR_NAME="LinkOps", GIT_AUTHOR_EMAIL="linkops@example.test",
+    GIT_COMMITTER_NAME="LinkOps", GIT_COMMITTER_EMAIL="linkops@example.test",
+)
+
+
+def git(*args: str, cwd=None) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+async def close(reader: GitObjectReader, *processes):
+    """Stop the processes and wait for them, so no transport outlives the loop"""
+    processes += tuple(channel.process for channel in (reader._check, reader._batch) if channel.process)
+    reader.close()
+    for process in processes:
+        await asyncio.wait_for(process.wait(), 5)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git("init", "-q", str(tmp_path))
+    (tmp_path / "links.yaml").write_text("links: {}\n")
+    (tmp_path / "big.bin").write_bytes(os.urandom(8 * 1024 * 1024))
+    os.makedirs(tmp_path / "scripts")
+    (tmp_path / "scripts" / "install.sh").write_text("#!/bin/sh\n")
+    git("add", "-A", cwd=tmp_path)
+    git("commit", "-q", "-m", "Initial", cwd=tmp_path)
+    return str(tmp_path)
+
+
+def test_reads_blobs_trees_and_missing_names(repo):
+    async def run():
+        reader = GitObjectReader(repo)
+        try:
+            blob = await reader.read_blob("HEAD:links.yaml")
+            names = [entry.name for entry in await reader.read_tree("HEAD")]
+            missing = await reader.info("HEAD:nope")
+            with pytest.raises(GitObjectError):
+                await reader.read("HEAD:nope")
+            return blob, names, missing, reader.stats()
+        finally:
+            await close(reader)
+
+    blob, names, missing, stats = asyncio.run(run())
+    assert blob == b"links: {}\n"
+    assert names == ["big.bin", "links.yaml", "scripts"]
+    assert missing is None
+    assert stats["process_starts"] == 2
+
+
+def test_cancelled_read_does_not_leak_into_the_next_request(repo):
+    async def run():
+        reader = GitObjectReader(repo)
+        cancelled = None
+        try:
+            await reader.read_blob("HEAD:links.yaml")  # start the --batch process
+            cancelled = reader._batch.process
+            large = asyncio.create_task(reader.read_blob("HEAD:big.bin"))
+            while reader._requests < 2:  # header read, body still on the pipe
+                await asyncio.sleep(0)
+            large.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await large
+            # Without the restart this reads the rest of big.bin as a header and hangs
+            return await asyncio.wait_for(reader.read_blob("HEAD:links.yaml"), 5), reader.stats()
+        finally:
+            await close(reader, *([cancelled] if cancelled else []))
+
+    data, stats = asyncio.run(run())
+    assert data == b"links: {}\n"
+    assert stats["process_starts"] == 2  # --batch restarted once; --batch-check never started
@@ -0,0 +1,173 @@
+"""
+LinkOps - Git Provider Client Tests
+Multi-file commits against an in-process HTTP stand-in (httpx.MockTransport) for each provider
+"""
+
+import asyncio
+import base64
+import json
+
+import httpx
+
+from services.git_providers import GitHubClient, GitLabClient, GiteaClient, ProviderHTTPPool, get_http_pool
+
+FILES = {
+    "links.yaml": "links: {}\n",
+    "scripts.yaml": "scripts: {}\n",
+    "secrets.ini.example": "[tokens]\n",
+}
+
+
+class StandIn:
+    """Records every request and answers from a (method, path) -> (status, body) table"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else None
+        path = request.url.raw_path.decode().split("?")[0]  # keep GitLab's %2F-encoded project paths
+        self.requests.append((request.method, path, body))
+        status, payload = self.routes.get((request.method, path), (404, {"message": "not found"}))
+        return httpx.Response(status, json=payload)
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    def calls(self):
+        return [(method, path) for method, path, _ in self.requests]
+
+
+def commit(client, **kwargs) -> bool:
+    async def run():
+        try:
+            return await client.commit_files(
+                owner="ops", repo_name="config", files=FILES, message="Initialize LinkOps configuration", **kwargs
+            )
+        finally:
+            await client.http.aclose()
+    return asyncio.run(run())
+
+
+def github_routes(repo: str, tree_status: int = 201):
+    return {
+        ("GET", f"{repo}/ref/heads/main"): (200, {"object": {"sha": "parent"}}),
+        ("GET", f"{repo}/commits/parent"): (200, {"tree": {"sha": "base-tree"}}),
+        ("POST", f"{repo}/blobs"): (201, {"sha": "blob"}),
+        ("POST", f"{repo}/trees"): (tree_status, {"sha": "new-tree"}),
+        ("POST", f"{repo}/commits"): (201, {"sha": "new-commit"}),
+        ("PATCH", f"{repo}/refs/heads/main"): (200, {"object": {"sha": "new-commit"}}),
+    }
+
+
+def test_github_commits_all_files_through_git_data_api():
+    repo = "/repos/ops/config/git"
+    stand_in = StandIn(github_routes(repo))
+    client = GitHubClient("https://github.test", "token", http=stand_in.client())
+
+    assert commit(client) is True
+    assert stand_in.calls() == [
+        ("GET", f"{repo}/ref/heads/main"),
+        ("GET", f"{repo}/commits/parent"),
+        ("POST", f"{repo}/blobs"),
+        ("POST", f"{repo}/blobs"),
+        ("POST", f"{repo}/blobs"),
+        ("POST", f"{repo}/trees"),
+        ("POST", f"{repo}/commits"),
+        ("PATCH", f"{repo}/refs/heads/main"),
+    ]
+
+    blobs = [body for method, path, body in stand_in.requests if path.endswith("/blobs")]
+    assert sorted(base64.b64decode(blob["content"]).decode() for blob in blobs) == sorted(FILES.values())
+    assert all(blob["encoding"] == "base64" for blob in blobs)
+
+    bodies = {(method, path): body for method, path, body in stand_in.requests}
+    tree = bodies[("POST", f"{repo}/trees")]
+    assert tree["base_tree"] == "base-tree"
+    assert sorted(entry["path"] for entry in tree["tree"]) == sorted(FILES)
+    assert all(entry["type"] == "blob" and entry["mode"] == "100644" for entry in tree["tree"])
+
+    # One commit carries every file
+    new_commit = bodies[("POST", f"{repo}/commits")]
+    assert new_commit == {"message": "Initialize LinkOps configuration", "tree": "new-tree", "parents": ["parent"]}
+    assert bodies[("PATCH", f"{repo}/refs/heads/main")] == {"sha": "new-commit"}
+
+
+def test_github_stops_when_the_tree_is_rejected():
+    repo = "/repos/ops/config/git"
+    stand_in = StandIn(github_routes(repo, tree_status=422))
+    client = GitHubClient("https://github-reject.test", "token", http=stand_in.client())
+
+    assert commit(client) is False
+    assert ("POST", f"{repo}/commits") not in stand_in.calls()
+
+
+def test_gitlab_sends_one_commit_with_an_action_per_file():
+    stand_in = StandIn({
+        ("GET", "/api/v4/projects/ops%2Fconfig"): (200, {"id": 42}),
+        ("POST", "/api/v4/projects/42/repository/commits"): (201, {"id": "abc"}),
+    })
+    client = GitLabClient("https://gitlab.test", "token", http=stand_in.client())
+
+    assert commit(client, branch="trunk") is True
+    commits = [body for method, path, body in stand_in.requests if path.endswith("/repository/commits")]
+    assert len(commits) == 1
+    assert commits[0]["branch"] == "trunk"
+    assert commits[0]["commit_message"] == "Initialize LinkOps configuration"
+    assert {action["file_path"]: action["content"] for action in commits[0]["actions"]} == FILES
+    assert all(action["action"] == "create" for action in commits[0]["actions"])
+
+
+def test_gitea_uses_change_files_in_one_request():
+    stand_in = StandIn({
+        ("POST", "/api/v1/repos/ops/config/contents"): (201, {"commit": {"sha": "abc"}}),
+    })
+    client = GiteaClient("https://gitea.test", "token", http=stand_in.client())
+
+    assert commit(client) is True
+    assert stand_in.calls() == [("POST", "/api/v1/repos/ops/config/contents")]
+    body = stand_in.requests[0][2]
+    assert body["branch"] == "main"
+    assert body["message"] == "Initialize LinkOps configuration"
+    assert {
+        change["path"]: base64.b64decode(change["content"]).decode() for change in body["files"]
+    } == FILES
+    assert all(change["operation"] == "create" for change in body["files"])
+
+
+def test_gitlab_caches_created_projects_by_their_real_path():
+    stand_in = StandIn({
+        # Created in the token user's namespace, not the requested owner's
+        ("POST", "/api/v4/projects"): (201, {"id": 7, "path_with_namespace": "alice/config"}),
+        ("POST", "/api/v4/projects/7/repository/commits"): (201, {"id": "abc"}),
+        ("GET", "/api/v4/projects/alice%2Fconfig"): (200, {"id": 7, "path_with_namespace": "alice/config"}),
+    })
+    base_url = "https://gitlab-namespace.test"
+    creator = GitLabClient(base_url, "token", http=stand_in.client())
+
+    async def create():
+        return await creator.create_repository(owner="ops", repo_name="config")
+
+    assert asyncio.run(create())["success"]
+    assert commit(creator) is True
+    assert stand_in.calls() == [("POST", "/api/v4/projects"), ("POST", "/api/v4/projects/7/repository/commits")]
+
+    pool = get_http_pool()
+    assert pool.get_project_id("gitlab", base_url, "alice/config") == 7
+    assert pool.get_project_id("gitlab", base_url, "ops/config") is None
+
+    # A later client (another request) finds the project by its real path without a lookup
+    later = GitLabClient(base_url, "token", http=stand_in.client())
+    stand_in.requests.clear()
+    assert asyncio.run(later.commit_files("alice", "config", FILES, "Update")) is True
+    assert stand_in.calls() == [("POST", "/api/v4/projects/7/repository/commits")]
+
+
+def test_project_id_cache_is_bounded_per_endpoint():
+    pool = ProviderHTTPPool(project_id_cache_size=2)
+    for index, path in enumerate(("a/one", "a/two", "a/three")):
+        pool.set_project_id("gitlab", "https://gitlab.test", path, index)
+    assert pool.get_project_id("gitlab", "https://gitlab.test", "a/one") is None
+    assert pool.get_project_id("gitlab", "https://gitlab.test", "a/three") == 2
+    assert pool.get_project_id("gitlab", "https://other.test", "a/three") is None
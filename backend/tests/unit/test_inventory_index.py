@@ -0,0 +1,43 @@
+"""
+LinkOps - Inventory Index Tests
+Machine rows with JSON and legacy comma-list tags, and tag expression selection
+"""
+
+import json
+
+import pytest
+
+from services.inventory_index import InventoryIndex, record_from_row
+
+
+def row(machine_id: str, tags) -> dict:
+    return {
+        "id": machine_id, "name": machine_id, "type": "server", "provider": None, "host": "10.0.0.1",
+        "port": 22, "user": "root", "tags": tags, "enrollment_required": False, "client_id": None,
+        "ssh_key_ref": None, "proxy_jump": None, "icon": None, "metadata": None,
+    }
+
+
+@pytest.mark.parametrize("tags, expected", [
+    (json.dumps(["web", "prod"]), ("web", "prod")),
+    ("web, prod", ("web", "prod")),
+    ("2024", ("2024",)),
+    ("true", ("true",)),
+    ("null", ("null",)),
+    ('"web"', ('"web"',)),
+    ("[1, 2]", ("[1", "2]")),
+    ("", ()),
+    (None, ()),
+])
+def test_tags_are_always_a_tuple_of_strings(tags, expected):
+    assert record_from_row(row("vm", tags)).tags == expected
+
+
+def test_legacy_rows_do_not_break_the_index():
+    index = InventoryIndex([
+        record_from_row(row("vm-1", json.dumps(["web"]))),
+        record_from_row(row("vm-2", "2024")),
+        record_from_row(row("vm-3", "web,2024")),
+    ])
+    assert index.select("web") == {"vm-1", "vm-3"}
+    assert index.select("2024") == {"vm-2", "vm-3"}
@@ -0,0 +1,219 @@
+"""
+LinkOps - Operation Scheduler Tests
+Admission limits, longest-first ordering, timings and duration estimates
+"""
+
+import asyncio
+from collections import defaultdict
+
+import pytest
+
+from db.database import close_database, get_db, init_database
+from parsers.yaml_parser import MachineRecord
+from services import inventory_index
+from services.inventory_index import InventoryIndex
+from services.operation_scheduler import (
+    BLOCKED_GLOBAL, BLOCKED_PARENT, BLOCKED_TARGET, HISTORY_RUNS, PRIOR_WEIGHT,
+    OperationScheduler, WorkItem, estimate_durations
+)
+
+
+def machine(machine_id: str, proxy_jump=None) -> MachineRecord:
+    return MachineRecord(
+        machine_id, machine_id, "VM", None, f"{machine_id}.lan", 22, "root", (), False,
+        None, "prod_ed25519", proxy_jump, None, None
+    )
+
+
+@pytest.fixture(autouse=True)
+def inventory(monkeypatch):
+    monkeypatch.setattr(inventory_index, "_index", InventoryIndex([
+        machine("proxmox-01"),
+        *(machine(f"vm-{n}", proxy_jump="proxmox-01") for n in range(1, 5)),
+        machine("standalone"),
+    ]))
+
+
+class Tracker:
+    """Work items that record start order and peak concurrency per key"""
+
+    def __init__(self, group=lambda target: "all"):
+        self.group = group
+        self.started = []
+        self.running = defaultdict(int)
+        self.peak = defaultdict(int)
+
+    def item(self, target: str, estimate: float = 60.0, seconds: float = 0.02, label=None) -> WorkItem:
+        async def run():
+            key = self.group(target)
+            self.started.append(label or target)
+            self.running[key] += 1
+            self.peak[key] = max(self.peak[key], self.running[key])
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                self.running[key] -= 1
+            return target
+        return WorkItem(target, run, estimate)
+
+
+def test_global_limit_caps_work_across_operations():
+    tracker = Tracker()
+    scheduler = OperationScheduler(global_limit=2)
+
+    async def scenario():
+        return await asyncio.gather(
+            scheduler.run([tracker.item(f"a-{n}") for n in range(4)]),
+            scheduler.run([tracker.item(f"b-{n}") for n in range(4)]),
+        )
+
+    reports = asyncio.run(scenario())
+    assert tracker.peak["all"] == 2
+    assert len(tracker.started) == 8
+    assert any(BLOCKED_GLOBAL in report.wait_by_reason_ms for report in reports)
+    assert scheduler.stats()["running"] == 0
+
+
+def test_operation_concurrency_is_its_own_limit():
+    tracker = Tracker()
+    scheduler = OperationScheduler(global_limit=10)
+    asyncio.run(scheduler.run([tracker.item(f"t-{n}") for n in range(6)], concurrency=3))
+    assert tracker.peak["all"] == 3
+
+
+def test_scripts_never_overlap_on_one_target():
+    tracker = Tracker(group=lambda target: target)
+    scheduler = OperationScheduler(global_limit=10)
+
+    async def scenario():
+        return await asyncio.gather(*(scheduler.run([tracker.item("vm-1")]) for _ in range(3)))
+
+    reports = asyncio.run(scenario())
+    assert tracker.peak["vm-1"] == 1
+    assert sum(1 for report in reports if BLOCKED_TARGET in report.wait_by_reason_ms) == 2
+
+
+def test_parent_limit_shares_one_budget_with_the_hypervisor_and_backfills():
+    group = OperationScheduler.group_of
+    tracker = Tracker(group=group)
+    scheduler = OperationScheduler(global_limit=10, per_parent=2)
+
+    assert group("vm-3") == "proxmox-01" and group("proxmox-01") == "proxmox-01"
+    items = [tracker.item(target, estimate=100.0) for target in ("proxmox-01", "vm-1", "vm-2", "vm-3", "vm-4")]
+    # Shortest item: not held back by the busy hypervisor ahead of it
+    items.append(tracker.item("standalone", estimate=1.0))
+
+    report = asyncio.run(scheduler.run(items))
+    assert tracker.peak["proxmox-01"] == 2
+    assert tracker.started.index("standalone") == 2
+    assert BLOCKED_PARENT in report.wait_by_reason_ms
+    assert next(result for result in report.results if result.target == "standalone").queue_wait_ms < 15
+
+
+def test_longest_estimate_starts_first_and_ties_keep_submission_order():
+    tracker = Tracker()
+    scheduler = OperationScheduler(global_limit=1)
+    estimates = {"t-1": 5.0, "t-2": 30.0, "t-3": 5.0, "t-4": 120.0, "t-5": 30.0}
+
+    report = asyncio.run(scheduler.run([tracker.item(target, estimate, seconds=0) for target, estimate in estimates.items()]))
+    assert tracker.started == ["t-4", "t-2", "t-5", "t-1", "t-3"]
+    assert [result.target for result in report.results] == tracker.started
+
+
+def test_queue_wait_and_execution_time_are_reported_separately():
+    tracker = Tracker()
+    scheduler = OperationScheduler(global_limit=1)
+
+    report = asyncio.run(scheduler.run([tracker.item("t-1", seconds=0.1), tracker.item("t-2", seconds=0.1)]))
+    first, second = report.results
+    assert first.queue_wait_ms < 20 and first.blocked_by is None
+    assert 90 <= first.exec_ms < 300
+    assert 90 <= second.queue_wait_ms < 300 and second.blocked_by == BLOCKED_GLOBAL
+    assert 90 <= second.exec_ms < 300
+    assert report.wait_by_reason_ms == {BLOCKED_GLOBAL: second.queue_wait_ms}
+    assert report.makespan_ms >= first.exec_ms + second.exec_ms
+
+    summary = report.summary()
+    assert summary["items"] == 2 and summary["failed"] == 0
+    assert summary["queue_wait_ms_max"] == second.queue_wait_ms
+
+
+def test_failed_item_is_captured_and_frees_its_slot():
+    scheduler = OperationScheduler(global_limit=1)
+
+    async def fail():
+        raise RuntimeError("exit 1")
+
+    async def succeed():
+        return "ok"
+
+    report = asyncio.run(scheduler.run([WorkItem("t-1", fail, 10.0), WorkItem("t-2", succeed, 1.0)]))
+    assert isinstance(report.results[0].error, RuntimeError)
+    assert report.results[1].result == "ok"
+    assert report.summary()["failed"] == 1
+
+
+async def with_history(tmp_path, rows, scenario):
+    await init_database(str(tmp_path / "linkops.db"), readers=1)
+    try:
+        await get_db().execute(
+            "INSERT INTO scripts (id, name, path, estimated_duration) VALUES ('install', 'install', 'install.sh', 40)"
+        )
+        await get_db().execute(
+            "INSERT INTO scripts (id, name, path, estimated_duration) VALUES ('backup', 'backup', 'backup.sh', 90)"
+        )
+        async with get_db().write() as conn:
+            await conn.execute("INSERT INTO operations (id, scripts, targets, status) VALUES ('op', '[]', '[]', 'success')")
+            await conn.executemany(
+                "INSERT INTO operation_logs (operation_id, target, script, exit_code, duration, started)"
+                " VALUES ('op', ?, 'install', ?, ?, ?)",
+                rows
+            )
+        return await scenario()
+    finally:
+        await close_database()
+
+
+def test_estimates_use_recent_history_for_the_requested_targets(tmp_path):
+    rows = [
+        # vm-1: an old slow run beyond the history window, then recent 20 s runs
+        ("vm-1", 0, 500.0, "2026-01-01T00:00:00"),
+        *(("vm-1", 0, 20.0, f"2026-02-01T00:{n:02d}:00") for n in range(HISTORY_RUNS)),
+        # vm-1 failures do not count
+        ("vm-1", 1, 900.0, "2026-03-01T00:00:00"),
+        # other machines only shape the fleet-wide prior
+        *((f"vm-{n}", 0, 60.0, f"2026-02-02T00:{n:02d}:00") for n in range(2, 5)),
+    ]
+
+    async def scenario():
+        return await estimate_durations(["vm-1", "standalone"], ["install", "backup"])
+
+    estimates = asyncio.run(with_history(tmp_path, rows, scenario))
+    assert set(estimates) == {(target, script) for target in ("vm-1", "standalone") for script in ("install", "backup")}
+
+    # 14 successful runs fleet-wide; the prior averages all of them
+    prior = (500.0 + 20.0 * HISTORY_RUNS + 60.0 * 3) / (HISTORY_RUNS + 4)
+    assert estimates[("standalone", "install")] == pytest.approx(prior)
+    assert estimates[("vm-1", "install")] == pytest.approx(
+        (20.0 * HISTORY_RUNS + prior * PRIOR_WEIGHT) / (HISTORY_RUNS + PRIOR_WEIGHT)
+    )
+    # No history: the catalog estimate
+    assert estimates[("vm-1", "backup")] == 90.0
+
+
+def test_history_queries_are_bounded_index_walks(tmp_path):
+    async def scenario():
+        plans = []
+        for query in (
+            "SELECT duration FROM operation_logs WHERE script = ? AND exit_code = 0 AND duration IS NOT NULL"
+            " ORDER BY started DESC LIMIT 50",
+            "SELECT id FROM operation_logs WHERE script = ? AND target = 'vm-1' AND exit_code = 0"
+            " AND duration IS NOT NULL ORDER BY started DESC LIMIT 10",
+        ):
+            rows = await get_db().fetch_all(f"EXPLAIN QUERY PLAN {query}", ("install",))
+            plans.append(" ".join(row["detail"] for row in rows))
+        return plans
+
+    prior_plan, target_plan = asyncio.run(with_history(tmp_path, [], scenario))
+    assert "idx_operation_logs_script_history" in prior_plan and "TEMP B-TREE" not in prior_plan
+    assert "idx_operation_logs_script_target" in target_plan and "TEMP B-TREE" not in target_plan
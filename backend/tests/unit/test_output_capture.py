@@ -0,0 +1,133 @@
+"""
+LinkOps - Output Capture Tests
+Spilling, range reads, spill failures and the retention sweep
+"""
+
+import asyncio
+import gzip
+import os
+import time
+
+import pytest
+
+from services.output_capture import OutputCaptureError, OutputStore
+
+CHUNK = 4096
+
+
+def output(size: int) -> bytes:
+    return bytes(index * 7 % 251 for index in range(size))
+
+
+async def capture_all(store: OutputStore, data: bytes, operation_id: str = "op-1", piece: int = 1000):
+    capture = store.capture(operation_id, "vm-1", "install", "stdout")
+    for start in range(0, len(data), piece):
+        await capture.write(data[start:start + piece])
+    return capture, await capture.finish()
+
+
+def test_small_output_stays_inline(tmp_path):
+    store = OutputStore(str(tmp_path), tail_bytes=1024, chunk_bytes=CHUNK)
+    _, result = asyncio.run(capture_all(store, b"hello\n"))
+    assert result.text == "hello\n" and result.ref is None
+    assert not os.listdir(tmp_path)
+
+
+def test_large_output_spills_and_reads_back_by_range(tmp_path):
+    store = OutputStore(str(tmp_path), tail_bytes=1024, chunk_bytes=CHUNK)
+    data = output(5 * CHUNK + 123)
+    capture, result = asyncio.run(capture_all(store, data))
+
+    assert result.ref and result.total_bytes == len(data)
+    assert capture.buffered_bytes == 0 and store.stats()["active_captures"] == 0
+    with gzip.open(os.path.join(tmp_path, result.ref + ".gz")) as f:
+        assert f.read() == data
+
+    async def ranges():
+        return [await store.read(result.ref, offset, 3000) for offset in (0, CHUNK - 10, len(data) - 50)]
+
+    (first, total), (middle, _), (last, _) = asyncio.run(ranges())
+    assert total == len(data)
+    assert first == data[:3000]
+    assert middle == data[CHUNK - 10:CHUNK + 2990]
+    assert last == data[-50:]
+
+
+def test_failed_spill_keeps_output_and_releases_the_capture(tmp_path, monkeypatch):
+    store = OutputStore(str(tmp_path), tail_bytes=1024, chunk_bytes=CHUNK)
+
+    def full_disk(*args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(store, "_append", full_disk)
+    data = output(CHUNK + 500)
+
+    async def run():
+        capture = store.capture("op-1", "vm-1", "install", "stdout")
+        await capture.write(data[:CHUNK - 1])
+        with pytest.raises(OutputCaptureError):
+            await capture.write(data[CHUNK - 1:])
+        assert store.stats()["active_captures"] == 0
+        with pytest.raises(OutputCaptureError):
+            await capture.write(b"more")
+        return await capture.finish()
+
+    result = asyncio.run(run())
+    # Nothing reached disk, so the whole output is returned inline
+    assert result.ref is None
+    assert result.text.encode("utf-8") == data.decode(errors="replace").encode("utf-8")
+    assert result.total_bytes == len(data)
+    assert store.stats()["spill_failures"] == 1
+
+
+def test_failed_final_spill_still_finishes(tmp_path, monkeypatch):
+    store = OutputStore(str(tmp_path), tail_bytes=1024, chunk_bytes=CHUNK)
+    data = output(CHUNK + 500)
+
+    async def run():
+        capture = store.capture("op-1", "vm-1", "install", "stdout")
+        await capture.write(data)
+
+        def full_disk(*args):
+            raise OSError(28, "No space left on device")
+
+        monkeypatch.setattr(store, "_append", full_disk)
+        return await capture.finish()
+
+    result = asyncio.run(run())
+    assert result.ref is not None
+    assert store.stats()["active_captures"] == 0
+    data_on_disk, total = asyncio.run(store.read(result.ref))
+    assert data_on_disk == data[:CHUNK] and total == CHUNK
+
+
+def test_sweep_removes_only_expired_operations(tmp_path):
+    store = OutputStore(str(tmp_path), tail_bytes=1024, chunk_bytes=CHUNK, retention_days=7)
+
+    async def run():
+        _, old = await capture_all(store, output(2 * CHUNK), "old-op")
+        _, recent = await capture_all(store, output(2 * CHUNK), "recent-op")
+        running = store.capture("running-op", "vm-1", "install", "stdout")
+        await running.write(output(2 * CHUNK))
+
+        month_ago = time.time() - 30 * 86400
+        for operation_id in ("old-op", "running-op"):
+            directory = os.path.join(tmp_path, operation_id)
+            for name in os.listdir(directory):
+                os.utime(os.path.join(directory, name), (month_ago, month_ago))
+            os.utime(directory, (month_ago, month_ago))
+
+        removed = await store.sweep()
+        await running.finish()
+        return removed
+
+    assert asyncio.run(run()) == 1
+    assert sorted(os.listdir(tmp_path)) == ["recent-op", "running-op"]
+    assert store.stats()["swept_operations"] == 1
+
+
+def test_sweep_disabled_with_zero_retention(tmp_path):
+    store = OutputStore(str(tmp_path), chunk_bytes=CHUNK, retention_days=0)
+    asyncio.run(capture_all(store, output(2 * CHUNK)))
+    assert asyncio.run(store.sweep()) == 0
+    assert os.listdir(tmp_path) == ["op-1"]
@@ -0,0 +1,134 @@
+"""
+LinkOps - Script Cache Tests
+Probe and upload commands run by a local shell standing in for the target host
+"""
+
+import asyncio
+import hashlib
+import os
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from services.script_cache import CachedScript, ScriptCache, ScriptCacheError
+from services.ssh_pool import PoolKey
+
+HOST = PoolKey("10.0.0.10", 22, "root", "prod_ed25519")
+
+
+class LocalHost:
+    """Connection whose commands run in a local sh, like asyncssh's run()"""
+
+    def __init__(self):
+        self.commands = []
+
+    async def run(self, command, input=None, encoding="utf-8", check=True):
+        self.commands.append(command)
+        process = await asyncio.create_subprocess_exec(
+            "sh", "-c", command,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate(input.encode() if isinstance(input, str) else input)
+        if encoding is not None:
+            stdout, stderr = stdout.decode(encoding), stderr.decode(encoding)
+        return SimpleNamespace(exit_status=process.returncode, stdout=stdout, stderr=stderr)
+
+    @property
+    def uploads(self):
+        return [command for command in self.commands if "tar -x" in command]
+
+
+class FakePool:
+    def __init__(self, host):
+        self.host = host
+
+    @asynccontextmanager
+    async def connection(self, key):
+        yield self.host
+
+
+class FakeReader:
+    """Blobs by id, counting reads"""
+
+    def __init__(self):
+        self.blobs = {}
+        self.reads = 0
+
+    async def read_blob(self, blob):
+        self.reads += 1
+        return self.blobs[blob]
+
+
+def script(reader, script_id, content: bytes, blob=None) -> CachedScript:
+    blob = blob or hashlib.sha1(content).hexdigest()
+    reader.blobs[blob] = content
+    return CachedScript(script_id, hashlib.sha256(content).hexdigest(), blob, len(content))
+
+
+@pytest.fixture
+def setup(tmp_path):
+    host, reader = LocalHost(), FakeReader()
+    cache = ScriptCache(FakePool(host), reader, cache_dir=str(tmp_path / "cache"))
+    return cache, host, reader
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_second_ensure_is_a_hit_without_upload(setup):
+    cache, host, reader = setup
+    install = script(reader, "install", b"#!/bin/sh\necho install\n")
+    backup = script(reader, "backup", b"#!/bin/sh\necho backup\n")
+
+    paths = asyncio.run(cache.ensure(HOST, [install, backup]))
+    assert len(host.uploads) == 1
+    assert read(paths["install"]) == b"#!/bin/sh\necho install\n"
+    assert read(paths["backup"]) == b"#!/bin/sh\necho backup\n"
+
+    assert asyncio.run(cache.ensure(HOST, [install, backup])) == paths
+    stats = cache.stats()
+    assert len(host.uploads) == 1
+    assert (stats["hits"], stats["misses"], stats["probes"]) == (2, 2, 2)
+    assert stats["bytes_saved"] == install.size + backup.size
+
+
+def test_damaged_copy_on_host_is_uploaded_again(setup):
+    cache, host, reader = setup
+    install = script(reader, "install", b"#!/bin/sh\necho install\n")
+    path = asyncio.run(cache.ensure(HOST, [install]))["install"]
+
+    with open(path, "wb") as f:
+        f.write(b"#!/bin/sh\necho tampered\n")
+
+    asyncio.run(cache.ensure(HOST, [install]))
+    assert len(host.uploads) == 2
+    assert cache.stats()["misses"] == 2
+    assert read(path) == b"#!/bin/sh\necho install\n"
+
+
+def test_content_not_matching_its_digest_is_rejected_on_upload(setup):
+    cache, host, reader = setup
+    install = script(reader, "install", b"#!/bin/sh\necho install\n")
+    reader.blobs[install.blob] = b"#!/bin/sh\necho something else\n"
+
+    with pytest.raises(ScriptCacheError, match="upload failed"):
+        asyncio.run(cache.ensure(HOST, [install]))
+    assert not os.path.exists(cache.remote_path(install.sha256))
+
+
+def test_changed_script_gets_a_new_path(setup):
+    cache, host, reader = setup
+    before = script(reader, "install", b"#!/bin/sh\necho v1\n")
+    after = script(reader, "install", b"#!/bin/sh\necho v2\n")
+
+    old_path = asyncio.run(cache.ensure(HOST, [before]))["install"]
+    new_path = asyncio.run(cache.ensure(HOST, [after]))["install"]
+
+    assert new_path != old_path
+    assert new_path == cache.remote_path(after.sha256)
+    assert len(host.uploads) == 2
+    assert read(new_path) == b"#!/bin/sh\necho v2\n"
+    assert read(old_path) == b"#!/bin/sh\necho v1\n"  # left for the age-based prune
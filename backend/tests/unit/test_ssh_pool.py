@@ -0,0 +1,321 @@
+"""
+LinkOps - SSH Connection Pool Tests
+Reuse, caps, eviction, cancellation and ProxyJump tunnels against a fake asyncssh.connect
+"""
+
+import asyncio
+
+import asyncssh
+import pytest
+
+from parsers.yaml_parser import MachineRecord
+from services import ssh_pool
+from services.inventory_index import InventoryIndex
+from services.ssh_pool import PoolKey, SSHConnectionPool
+
+WEB = PoolKey("10.0.0.10", 22, "root", "prod_ed25519")
+
+
+class FakeConnection:
+    """Stands in for asyncssh.SSHClientConnection"""
+
+    def __init__(self, options):
+        self.options = options
+        self.closed = False
+        self._closed = asyncio.Event()
+
+    def close(self):
+        self.closed = True
+        self._closed.set()
+
+    async def wait_closed(self):
+        await self._closed.wait()
+
+    async def run(self, command, timeout=None, **kwargs):
+        return f"{self.options['username']}@{self.options['host']}: {command}"
+
+
+class FakeSSH:
+    """Counts handshakes; connects can be held open with a gate or made to fail"""
+
+    def __init__(self):
+        self.connections = []
+        self.attempts = 0
+        self.gate = None
+        self.unreachable = set()
+
+    async def connect(self, **options):
+        self.attempts += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if options["host"] in self.unreachable:
+            raise OSError(f"connect to {options['host']} failed")
+        connection = FakeConnection(options)
+        self.connections.append(connection)
+        return connection
+
+    def to(self, host: str):
+        return [connection for connection in self.connections if connection.options["host"] == host]
+
+
+@pytest.fixture
+def fake_ssh(monkeypatch):
+    fake = FakeSSH()
+    monkeypatch.setattr(ssh_pool.asyncssh, "connect", fake.connect)
+    return fake
+
+
+def run(scenario, **options):
+    async def main():
+        pool = SSHConnectionPool("/keys", **options)
+        try:
+            return await scenario(pool)
+        finally:
+            await pool.close()
+    return asyncio.run(main())
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def hold(pool, key, release: asyncio.Event, leased: list):
+    async with pool.connection(key) as connection:
+        leased.append(connection)
+        await release.wait()
+
+
+def test_sequential_leases_reuse_one_connection(fake_ssh):
+    async def scenario(pool):
+        first = await pool.run(WEB, "uptime")
+        second = await pool.run(WEB, "hostname")
+        await pool.run(WEB._replace(user="deploy"), "id")  # another identity gets its own connection
+        return first, second, pool.stats()
+
+    first, second, stats = run(scenario)
+    assert first == "root@10.0.0.10: uptime" and second == "root@10.0.0.10: hostname"
+    assert fake_ssh.attempts == 2
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["handshakes"] == 2
+    assert fake_ssh.connections[0].options["client_keys"] == ["/keys/prod_ed25519"]
+
+
+def test_channels_are_multiplexed_up_to_max_channels(fake_ssh):
+    async def scenario(pool):
+        release, leased = asyncio.Event(), []
+        holders = [asyncio.create_task(hold(pool, WEB, release, leased)) for _ in range(2)]
+        await settle()
+        waiter = asyncio.create_task(pool.run(WEB, "uptime"))
+        await settle()
+        assert not waiter.done() and pool.stats()["waits"] == 1
+        assert pool.stats()["channels_in_use"] == 2
+
+        release.set()
+        await asyncio.gather(*holders)
+        await waiter
+        return leased, pool.stats()
+
+    leased, stats = run(scenario, max_channels=2, max_per_host=1)
+    assert leased[0] is leased[1]
+    assert fake_ssh.attempts == 1 and stats["connections"] == 1
+
+
+def test_per_host_cap_opens_connections_then_queues(fake_ssh):
+    async def scenario(pool):
+        release, leased = asyncio.Event(), []
+        holders = [asyncio.create_task(hold(pool, WEB, release, leased)) for _ in range(3)]
+        await settle()
+        assert len(leased) == 2 and pool.stats()["connections"] == 2
+        release.set()
+        await asyncio.gather(*holders)
+        return leased
+
+    leased = run(scenario, max_channels=1, max_per_host=2)
+    assert len(leased) == 3 and fake_ssh.attempts == 2
+    assert leased[2] in leased[:2]
+
+
+def test_idle_connection_of_another_identity_makes_room(fake_ssh):
+    async def scenario(pool):
+        await pool.run(WEB, "uptime")
+        await pool.run(WEB._replace(user="deploy"), "id")
+        return pool.stats(), [connection.closed for connection in fake_ssh.connections]
+
+    stats, closed = run(scenario, max_per_host=1)
+    assert stats["evicted_idle"] == 1 and stats["connections"] == 1
+    assert closed == [True, False]
+
+
+def test_connections_closed_by_the_server_are_replaced(fake_ssh):
+    async def scenario(pool):
+        await pool.run(WEB, "uptime")
+        fake_ssh.connections[0].close()  # keepalive failed / server went away
+        await settle()
+        assert pool.stats()["connections"] == 0
+        await pool.run(WEB, "uptime")
+        return pool.stats()
+
+    stats = run(scenario)
+    assert fake_ssh.attempts == 2 and stats["evicted_dead"] == 1 and stats["connections"] == 1
+
+
+def test_connection_errors_inside_a_lease_discard_the_connection(fake_ssh):
+    async def scenario(pool):
+        with pytest.raises(asyncssh.ConnectionLost):
+            async with pool.connection(WEB):
+                raise asyncssh.ConnectionLost("reset")
+        await pool.run(WEB, "uptime")
+        return pool.stats()
+
+    stats = run(scenario)
+    assert fake_ssh.connections[0].closed
+    assert fake_ssh.attempts == 2 and stats["evicted_dead"] == 1
+
+
+def test_idle_connections_are_evicted_after_idle_timeout(fake_ssh):
+    async def scenario(pool):
+        pool.start()
+        await pool.run(WEB, "uptime")
+        await asyncio.sleep(1.2)  # the reaper runs at most once a second
+        return pool.stats()
+
+    stats = run(scenario, idle_timeout=0.05)
+    assert stats["connections"] == 0 and stats["evicted_idle"] == 1
+    assert fake_ssh.connections[0].closed
+
+
+def test_cancelled_connect_releases_its_slot(fake_ssh):
+    async def scenario(pool):
+        fake_ssh.gate = asyncio.Event()
+        connecting = asyncio.create_task(pool.run(WEB, "uptime"))
+        await settle()
+        queued = asyncio.create_task(pool.run(WEB._replace(user="deploy"), "id"))
+        await settle()
+        assert not queued.done()  # max_per_host=1 is taken by the pending handshake
+
+        connecting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await connecting
+        fake_ssh.gate.set()
+        return await asyncio.wait_for(queued, 5), pool.stats()
+
+    result, stats = run(scenario, max_per_host=1)
+    assert result == "deploy@10.0.0.10: id"
+    assert stats["handshake_failures"] == 1 and stats["connections"] == 1
+
+
+def test_failed_handshake_does_not_hold_the_host_slot(fake_ssh):
+    async def scenario(pool):
+        fake_ssh.unreachable.add(WEB.host)
+        with pytest.raises(OSError):
+            await pool.run(WEB, "uptime")
+        fake_ssh.unreachable.clear()
+        return await pool.run(WEB, "uptime"), pool.stats()
+
+    result, stats = run(scenario, max_per_host=1)
+    assert result == "root@10.0.0.10: uptime" and stats["handshake_failures"] == 1
+
+
+def test_closed_pool_refuses_new_leases(fake_ssh):
+    async def scenario(pool):
+        await pool.run(WEB, "uptime")
+        await pool.close()
+        with pytest.raises(RuntimeError):
+            await pool.run(WEB, "uptime")
+
+    run(scenario)
+    assert fake_ssh.connections[0].closed
+
+
+def machine(machine_id: str, host: str, proxy_jump=None) -> MachineRecord:
+    return MachineRecord(
+        machine_id, machine_id, "VM", None, host, 22, "root", (), True,
+        "LINKOPS-8f3a2c6d-1b7e-4c7a-9c2a-3f1a7d2c9c10", "prod_ed25519", proxy_jump, None, None
+    )
+
+
+INVENTORY = InventoryIndex([
+    machine("bastion", "203.0.113.1"),
+    machine("proxmox-01", "10.0.0.2", proxy_jump="bastion"),
+    machine("vm-web-01", "192.168.1.11", proxy_jump="proxmox-01"),
+    machine("vm-web-02", "192.168.1.12", proxy_jump="proxmox-01"),
+    machine("vm-db-01", "192.168.1.21", proxy_jump="proxmox-01"),
+])
+
+
+def key(machine_id: str) -> PoolKey:
+    return PoolKey.for_machine(INVENTORY.get(machine_id), INVENTORY)
+
+
+def test_jump_chain_is_resolved_through_the_inventory():
+    web = key("vm-web-01")
+    assert web.via == key("proxmox-01")
+    assert web.via.via == PoolKey("203.0.113.1", 22, "root", "prod_ed25519")
+    assert key("vm-web-02").via == web.via
+
+
+def test_targets_behind_one_jump_host_share_its_connection(fake_ssh):
+    async def scenario(pool):
+        results = await asyncio.gather(*(pool.run(key(vm), "uptime") for vm in ("vm-web-01", "vm-web-02", "vm-db-01")))
+        return results, pool.stats()
+
+    results, stats = run(scenario)
+    assert [result.split(":")[0] for result in results] == [
+        "root@192.168.1.11", "root@192.168.1.12", "root@192.168.1.21"
+    ]
+    # One handshake per hop: bastion, proxmox-01 (through bastion), then each VM through proxmox-01
+    assert len(fake_ssh.to("203.0.113.1")) == 1 and len(fake_ssh.to("10.0.0.2")) == 1
+    proxmox = fake_ssh.to("10.0.0.2")[0]
+    assert proxmox.options["tunnel"] is fake_ssh.to("203.0.113.1")[0]
+    assert all(
+        fake_ssh.to(host)[0].options["tunnel"] is proxmox
+        for host in ("192.168.1.11", "192.168.1.12", "192.168.1.21")
+    )
+    assert stats["handshakes"] == 5 and stats["tunnels_opened"] == 4
+    assert stats["jump_hosts"] == 2 and stats["tunnels_open"] == 4
+
+
+def test_jump_channel_limit_closes_idle_children_instead_of_connecting_again(fake_ssh):
+    async def scenario(pool):
+        await pool.run(key("vm-web-01"), "uptime")
+        await pool.run(key("vm-web-02"), "uptime")  # needs proxmox-01's only tunnel slot
+        return pool.stats()
+
+    stats = run(scenario, max_jump_channels=1)
+    assert len(fake_ssh.to("10.0.0.2")) == 1
+    assert fake_ssh.to("192.168.1.11")[0].closed and stats["evicted_idle"] == 1
+
+
+def test_losing_the_jump_host_invalidates_its_tunnelled_connections(fake_ssh):
+    async def scenario(pool):
+        await asyncio.gather(pool.run(key("vm-web-01"), "uptime"), pool.run(key("vm-web-02"), "uptime"))
+        proxmox = fake_ssh.to("10.0.0.2")[0]
+        children = [fake_ssh.to(host)[0] for host in ("192.168.1.11", "192.168.1.12")]
+
+        proxmox.close()  # hypervisor rebooted
+        await settle()
+        assert all(child.closed for child in children)
+        lost = pool.stats()
+
+        await pool.run(key("vm-web-01"), "uptime")
+        return lost, pool.stats()
+
+    lost, after = run(scenario)
+    # Only the bastion connection survives; proxmox-01 and both VMs are gone
+    assert lost["connections"] == 1 and lost["tunnels_open"] == 0
+    assert len(fake_ssh.to("10.0.0.2")) == 2 and len(fake_ssh.to("203.0.113.1")) == 1
+    assert fake_ssh.to("192.168.1.11")[1].options["tunnel"] is fake_ssh.to("10.0.0.2")[1]
+    assert after["connections"] == 3
+
+
+def test_failed_jump_handshake_fails_the_target_and_frees_the_slot(fake_ssh):
+    async def scenario(pool):
+        fake_ssh.unreachable.add("10.0.0.2")
+        with pytest.raises(OSError):
+            await pool.run(key("vm-web-01"), "uptime")
+        fake_ssh.unreachable.clear()
+        return await pool.run(key("vm-web-01"), "uptime"), pool.stats()
+
+    result, stats = run(scenario)
+    assert result.startswith("root@192.168.1.11")
+    assert stats["connections"] == 3 and stats["tunnels_open"] == 2
@@ -0,0 +1,98 @@
+"""
+LinkOps - Token Cache Tests
+Token revocation (logout), user revocation (lockout) and pruning
+"""
+
+import time
+
+from jose import jwt
+
+from services import token_cache as token_cache_module
+from services.token_cache import TokenCache
+
+SECRET = "test-secret"
+
+
+def issue(username: str, issued_at: float = None, lifetime: float = 3600) -> str:
+    issued_at = time.time() if issued_at is None else issued_at
+    return jwt.encode(
+        {"sub": username, "iat": int(issued_at), "exp": int(issued_at + lifetime), "jti": f"{username}-{issued_at}"},
+        SECRET, algorithm="HS256"
+    )
+
+
+def test_logged_out_tokens_stay_revoked_however_many_logouts_follow():
+    cache = TokenCache()
+    victim = issue("alice")
+    cache.revoke(victim)
+    for index in range(20000):
+        cache.revoke(issue("mallory", issued_at=time.time() - index % 60 - 1))
+    assert cache.is_revoked(victim)
+
+
+def test_expired_revocations_are_pruned(monkeypatch):
+    cache = TokenCache()
+    now = time.time()
+    cache.revoke(issue("alice", issued_at=now, lifetime=60))
+    cache.revoke(issue("bob", issued_at=now, lifetime=7200))
+    assert cache.stats()["revoked_tokens"] == 2
+
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now + 120)
+    cache.revoke(issue("carol", issued_at=now + 120))
+    assert cache.stats()["revoked_tokens"] == 2
+
+
+def test_revocation_expiry_is_clamped_to_the_token_lifetime(monkeypatch):
+    cache = TokenCache(token_lifetime=3600)
+    now = time.time()
+    cache.revoke(issue("alice", issued_at=now, lifetime=10 * 365 * 86400))
+
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now + 3601)
+    cache.revoke(issue("bob", issued_at=now + 3601))
+    assert cache.stats()["revoked_tokens"] == 1
+
+
+def test_revoked_token_is_dropped_from_the_cache():
+    cache = TokenCache()
+    token = issue("alice")
+    cache.put(token, "alice")
+    cache.revoke(token)
+    assert cache.get(token) is None
+    assert cache.is_revoked(token, "alice")
+
+
+def test_user_revocation_rejects_older_tokens_even_on_cache_hits():
+    cache = TokenCache()
+    old_tokens = [issue("alice", issued_at=time.time() - 10), issue("alice", issued_at=time.time() - 5)]
+    other = issue("bob")
+    for token in old_tokens:
+        cache.put(token, "alice")
+    cache.put(other, "bob")
+
+    cache.revoke_user("alice")
+
+    for token in old_tokens:
+        assert cache.get(token) is None
+        assert cache.is_revoked(token, "alice")
+        cache.put(token, "alice")  # a verify that raced the lockout must not re-cache it
+        assert cache.get(token) is None
+    assert cache.get(other) == "bob"
+    assert not cache.is_revoked(other, "bob")
+
+
+def test_tokens_issued_after_a_user_revocation_are_accepted():
+    cache = TokenCache()
+    cache.revoke_user("alice")
+    fresh = issue("alice", issued_at=time.time() + 2)
+    assert not cache.is_revoked(fresh, "alice")
+    cache.put(fresh, "alice")
+    assert cache.get(fresh) == "alice"
+
+
+def test_user_revocations_expire_with_the_tokens_they_cover(monkeypatch):
+    cache = TokenCache(token_lifetime=3600)
+    now = time.time()
+    cache.revoke_user("alice")
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now + 3601)
+    cache.revoke_user("bob")
+    assert cache.stats()["revoked_users"] == 1
@@ -0,0 +1,44 @@
+"""
+LinkOps - Inventory YAML Parser Tests
+Empty sections in both parse paths, and the files committed when a repository is bootstrapped
+"""
+
+import pytest
+
+from api.git_onboarding import LINKS_TEMPLATE, SCRIPTS_TEMPLATE
+from parsers.yaml_parser import InventoryParseError, parse_links_yaml, parse_scripts_yaml
+
+CLIENT_ID = "LINKOPS-8f3a2c6d-1b7e-4c7a-9c2a-3f1a7d2c9c10"
+
+
+def test_bootstrap_templates_parse_as_empty_inventory():
+    assert parse_links_yaml(LINKS_TEMPLATE) == {}
+    assert parse_scripts_yaml(SCRIPTS_TEMPLATE) == {}
+
+
+def test_bootstrap_example_entries_are_valid_when_uncommented():
+    def uncomment(template: str, section: str) -> str:
+        example = template.split(f"# {section}:\n", 1)[1]
+        return f"{section}:\n" + "".join(line[2:] + "\n" for line in example.splitlines())
+
+    links = parse_links_yaml(uncomment(LINKS_TEMPLATE, "links").replace(
+        "LINKOPS-00000000-0000-0000-0000-000000000000", CLIENT_ID
+    ))
+    assert list(links) == ["web-server-01"]
+    scripts = parse_scripts_yaml(uncomment(SCRIPTS_TEMPLATE, "scripts"))
+    assert list(scripts) == ["update-system"]
+
+
+# The anchored forms cannot be streamed and go through the fully loaded path
+@pytest.mark.parametrize("content", [
+    "", "scripts:\n", "scripts: null\n", "scripts: []\n", "scripts: {}\n",
+    "scripts: &empty []\n", "scripts: &empty {}\n", "other: [1]\nscripts: []\n",
+])
+def test_empty_sections_parse_as_empty(content):
+    assert parse_scripts_yaml(content) == {}
+
+
+@pytest.mark.parametrize("content", ["scripts: [a]\n", "scripts: &list [a]\n", "scripts: 3\n"])
+def test_non_empty_lists_are_still_rejected(content):
+    with pytest.raises(InventoryParseError, match="must be a mapping of id to entry"):
+        parse_scripts_yaml(content)